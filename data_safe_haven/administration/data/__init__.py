@@ -0,0 +1,11 @@
+from .data_downloader import DataDownloader, DownloadCheckpoint, DownloadSummary
+from .data_uploader import DataUploader, UploadCheckpoint, UploadSummary
+
+__all__ = [
+    "DataDownloader",
+    "DataUploader",
+    "DownloadCheckpoint",
+    "DownloadSummary",
+    "UploadCheckpoint",
+    "UploadSummary",
+]
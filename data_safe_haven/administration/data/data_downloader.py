@@ -0,0 +1,282 @@
+"""Download the contents of an SRE blob container to a local directory"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError
+from azure.storage.blob import BlobClient, BlobProperties, ContainerClient
+
+from data_safe_haven.exceptions import DataSafeHavenAzureStorageError
+from data_safe_haven.logging import get_logger
+
+from .transfer_checkpoint import TransferCheckpoint
+
+
+@dataclass
+class DownloadSummary:
+    """Outcome of a download"""
+
+    failed: list[str] = field(default_factory=list)
+    skipped: int = 0
+    downloaded: int = 0
+    downloaded_bytes: int = 0
+
+
+class DownloadCheckpoint(TransferCheckpoint):
+    """
+    Record of the blobs which have been downloaded and verified
+
+    Each entry holds the blob name, the ETag and size of the blob, the fingerprint
+    of the local file and its SHA256.
+    """
+
+    def record(self, blob: BlobProperties, fingerprint: list[int], sha256: str) -> None:
+        self.append(
+            {
+                "blob_name": blob.name,
+                "etag": blob.etag,
+                "fingerprint": fingerprint,
+                "sha256": sha256,
+                "size": blob.size,
+            }
+        )
+
+    def sha256(self, blob: BlobProperties, fingerprint: list[int]) -> str | None:
+        """The SHA256 of a local file if it holds an unchanged copy of the blob"""
+        entry = self.entries.get(blob.name, {})
+        if (entry.get("etag"), entry.get("size"), entry.get("fingerprint")) == (
+            blob.etag,
+            blob.size,
+            fingerprint,
+        ):
+            return str(entry["sha256"])
+        return None
+
+
+class DataDownloader:
+    """
+    Download blobs to local files using concurrent ranged reads
+
+    Blobs are listed lazily, page by page, and only a bounded number are in flight
+    at once. Each blob is written to a preallocated partial file, with each range
+    streamed to its offset by a shared pool of workers, so memory use does not
+    depend on the size or number of blobs. Once every range has been written the
+    file is hashed, checked against the Content-MD5 of the blob if it has one and
+    moved into place. A SHA256 manifest of the downloaded files is written to the
+    destination directory, in the format read by 'sha256sum --check'.
+
+    Downloaded files are recorded in a local checkpoint with the ETag of their blob,
+    so unchanged files are skipped on later runs even if the blob has no Content-MD5,
+    as is the case for files written through the NFS mount of a container.
+    """
+
+    manifest_name = "manifest.sha256"
+
+    def __init__(
+        self,
+        container_client: ContainerClient,
+        checkpoint: DownloadCheckpoint,
+        *,
+        chunk_size: int = 4 * 1024 * 1024,
+        max_workers: int = 8,
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.container_client = container_client
+        self.logger = get_logger()
+        self.max_workers = max_workers
+        self._range_slots = threading.BoundedSemaphore(2 * max_workers)
+
+    @staticmethod
+    def file_hashes(path: Path) -> tuple[str, bytes]:
+        """
+        Hash a file in a single pass
+
+        Returns:
+            tuple[str, bytes]: the SHA256 hex digest and the MD5 digest
+        """
+        md5 = hashlib.md5(usedforsecurity=False)
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f_local:
+            while data := f_local.read(1024 * 1024):
+                md5.update(data)
+                sha256.update(data)
+        return sha256.hexdigest(), md5.digest()
+
+    @staticmethod
+    def fingerprint(path: Path) -> list[int]:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def destination_path(self, destination: Path, blob_name: str, prefix: str) -> Path:
+        """
+        Local path for a blob, relative to the download prefix
+
+        Raises:
+            DataSafeHavenAzureStorageError if the path would be outside the destination
+        """
+        root = destination.resolve()
+        path = (root / blob_name.removeprefix(prefix)).resolve()
+        if path == root or not path.is_relative_to(root):
+            msg = f"Blob '{blob_name}' cannot be saved inside '{destination}'."
+            raise DataSafeHavenAzureStorageError(msg)
+        return path
+
+    def download(self, destination: Path, prefix: str = "") -> DownloadSummary:
+        """
+        Download all blobs with a given prefix
+
+        Returns:
+            DownloadSummary: the numbers of files downloaded and skipped and any failures
+
+        Raises:
+            DataSafeHavenAzureStorageError if the blobs could not be listed
+        """
+        summary = DownloadSummary()
+        manifest: dict[str, str] = {}
+        destination.mkdir(parents=True, exist_ok=True)
+
+        def finish(future: Future[tuple[str, bool]], blob: BlobProperties) -> None:
+            try:
+                sha256, downloaded = future.result()
+            except (AzureError, DataSafeHavenAzureStorageError, OSError) as exc:
+                self.logger.error(f"Failed to download [green]{blob.name}[/]: {exc}")
+                summary.failed.append(blob.name)
+                return
+            path = self.destination_path(destination, blob.name, prefix)
+            manifest[path.relative_to(destination.resolve()).as_posix()] = sha256
+            if downloaded:
+                summary.downloaded += 1
+                summary.downloaded_bytes += blob.size
+                self.logger.debug(f"Downloaded [green]{blob.name}[/].")
+            else:
+                summary.skipped += 1
+
+        with (
+            ThreadPoolExecutor(max_workers=self.max_workers) as blob_pool,
+            ThreadPoolExecutor(max_workers=self.max_workers) as range_pool,
+        ):
+            pending: dict[Future[tuple[str, bool]], BlobProperties] = {}
+            try:
+                for blob in self.container_client.list_blobs(
+                    name_starts_with=prefix or None, include=["metadata"]
+                ):
+                    # Directories in storage accounts with a hierarchical namespace
+                    if (blob.metadata or {}).get("hdi_isfolder") == "true":
+                        continue
+                    if len(pending) >= 2 * self.max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finish(future, pending.pop(future))
+                    future = blob_pool.submit(
+                        self.download_blob, blob, destination, prefix, range_pool
+                    )
+                    pending[future] = blob
+            except AzureError as exc:
+                msg = (
+                    f"Could not list blobs in '{self.container_client.container_name}'."
+                )
+                raise DataSafeHavenAzureStorageError(msg) from exc
+            for future in as_completed(pending):
+                finish(future, pending[future])
+        summary.failed.sort()
+        with open(
+            destination / self.manifest_name, "w", encoding="utf-8"
+        ) as f_manifest:
+            f_manifest.writelines(
+                f"{sha256}  {name}\n" for name, sha256 in sorted(manifest.items())
+            )
+        return summary
+
+    def download_blob(
+        self,
+        blob: BlobProperties,
+        destination: Path,
+        prefix: str,
+        range_pool: ThreadPoolExecutor,
+    ) -> tuple[str, bool]:
+        """
+        Download a single blob unless an identical local file already exists
+
+        Returns:
+            tuple[str, bool]: the SHA256 of the local file and whether it was downloaded
+
+        Raises:
+            DataSafeHavenAzureStorageError if the downloaded file does not match
+        """
+        path = self.destination_path(destination, blob.name, prefix)
+        content_md5 = bytes(blob.content_settings.content_md5 or b"")
+        if path.is_file():
+            fingerprint = self.fingerprint(path)
+            if sha256_recorded := self.checkpoint.sha256(blob, fingerprint):
+                return sha256_recorded, False
+            if content_md5 and fingerprint[0] == blob.size:
+                sha256, md5 = self.file_hashes(path)
+                if md5 == content_md5:
+                    self.checkpoint.record(blob, fingerprint, sha256)
+                    return sha256, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = path.with_name(f"{path.name}.partial")
+        with open(partial_path, "wb") as f_partial:
+            f_partial.truncate(blob.size)
+        blob_client = self.container_client.get_blob_client(blob.name)
+        futures: list[Future[None]] = []
+        try:
+            for offset in range(0, blob.size, self.chunk_size):
+                self._range_slots.acquire()
+                futures.append(
+                    range_pool.submit(
+                        self.download_range,
+                        blob_client,
+                        partial_path,
+                        offset,
+                        min(self.chunk_size, blob.size - offset),
+                        blob.etag,
+                    )
+                )
+        finally:
+            for future in futures:
+                future.result()
+        sha256, md5 = self.file_hashes(partial_path)
+        if content_md5 and md5 != content_md5:
+            partial_path.unlink()
+            msg = f"Downloaded file '{path}' does not match blob '{blob.name}'."
+            raise DataSafeHavenAzureStorageError(msg)
+        os.replace(partial_path, path)
+        self.checkpoint.record(blob, self.fingerprint(path), sha256)
+        return sha256, True
+
+    def download_range(
+        self,
+        blob_client: BlobClient,
+        path: Path,
+        offset: int,
+        length: int,
+        etag: str,
+    ) -> None:
+        """Stream one range of a blob to the same offset in a local file"""
+        try:
+            # Fail rather than mixing ranges from different versions of the blob
+            stream = blob_client.download_blob(
+                offset=offset,
+                length=length,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+                validate_content=True,
+            )
+            with open(path, "r+b") as f_partial:
+                f_partial.seek(offset)
+                stream.readinto(f_partial)
+        finally:
+            self._range_slots.release()
@@ -0,0 +1,244 @@
+"""Upload a local directory tree to SRE blob storage"""
+
+import base64
+import hashlib
+import json
+import math
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar
+
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+from azure.storage.blob import BlobBlock, BlobClient, ContainerClient, ContentSettings
+
+from data_safe_haven.exceptions import DataSafeHavenAzureStorageError
+from data_safe_haven.logging import get_logger
+
+from .transfer_checkpoint import TransferCheckpoint
+
+
+@dataclass
+class UploadSummary:
+    """Outcome of an upload"""
+
+    failed: list[str] = field(default_factory=list)
+    skipped: int = 0
+    uploaded: int = 0
+    uploaded_bytes: int = 0
+
+
+class UploadCheckpoint(TransferCheckpoint):
+    """
+    Record of the files which have been uploaded and verified
+
+    Each entry holds the blob name, the fingerprint of the local file and its MD5.
+    """
+
+    def is_complete(self, blob_name: str, fingerprint: list[int]) -> bool:
+        return self.entries.get(blob_name, {}).get("fingerprint") == fingerprint
+
+    def record(self, blob_name: str, fingerprint: list[int], md5: str) -> None:
+        self.append({"blob_name": blob_name, "fingerprint": fingerprint, "md5": md5})
+
+
+class DataUploader:
+    """
+    Upload files to a blob container, staging blocks of large files in parallel
+
+    Files are read sequentially so that each can be hashed as it is read, while
+    their blocks are staged by a shared pool of workers. The number of blocks in
+    flight is bounded, so memory use does not depend on file size.
+
+    Block IDs are derived from the size and modification time of the local file
+    and from the MD5 of the block data. If an upload is interrupted, blocks which
+    were already staged with the same data are found in the uncommitted block list
+    of the blob and not sent again. Files which were completely uploaded are
+    recorded in a local checkpoint.
+
+    Large files use larger blocks where needed to stay within the maximum number of
+    blocks in a blob.
+    """
+
+    max_block_count: ClassVar[int] = 50000
+    max_block_size: ClassVar[int] = 4000 * 1024 * 1024
+
+    def __init__(
+        self,
+        container_client: ContainerClient,
+        checkpoint: UploadCheckpoint,
+        *,
+        block_size: int = 8 * 1024 * 1024,
+        max_workers: int = 8,
+    ) -> None:
+        self.block_size = block_size
+        self.checkpoint = checkpoint
+        self.container_client = container_client
+        self.logger = get_logger()
+        self.max_workers = max_workers
+        self._block_slots = threading.BoundedSemaphore(2 * max_workers)
+
+    @staticmethod
+    def blob_names(source: Path, prefix: str) -> dict[str, Path]:
+        """Map blob names to the files under a local directory"""
+        if source.is_file():
+            return {f"{prefix}{source.name}": source}
+        files = {}
+        for root, directories, filenames in os.walk(source):
+            directories.sort()
+            for filename in sorted(filenames):
+                path = Path(root) / filename
+                files[f"{prefix}{path.relative_to(source).as_posix()}"] = path
+        return files
+
+    def block_id(self, fingerprint: list[int], index: int, data: bytes) -> str:
+        """Block IDs must have the same length for every block in a blob"""
+        token = hashlib.sha256(json.dumps(fingerprint).encode()).hexdigest()[:16]
+        digest = hashlib.md5(data, usedforsecurity=False).hexdigest()
+        return base64.b64encode(f"{token}-{index:08d}-{digest}".encode()).decode()
+
+    def block_size_for(self, size: int) -> int:
+        """
+        Size of the blocks to upload a file in
+
+        Raises:
+            DataSafeHavenAzureStorageError if the file is too large for a blob
+        """
+        block_size = max(self.block_size, math.ceil(size / self.max_block_count))
+        if block_size > self.max_block_size:
+            msg = f"Files of {size} bytes are too large to upload to a blob."
+            raise DataSafeHavenAzureStorageError(msg)
+        return block_size
+
+    def fingerprint(self, path: Path) -> list[int]:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns, self.block_size_for(stat.st_size)]
+
+    def stage_block(self, blob_client: BlobClient, block_id: str, data: bytes) -> None:
+        try:
+            blob_client.stage_block(block_id, data, validate_content=True)
+        finally:
+            self._block_slots.release()
+
+    def staged_blocks(self, blob_client: BlobClient) -> dict[str, int]:
+        """Uncommitted blocks left by an earlier attempt, by ID"""
+        try:
+            _, uncommitted = blob_client.get_block_list("uncommitted")
+        except ResourceNotFoundError:
+            return {}
+        return {block.id: block.size for block in uncommitted}
+
+    def upload(self, source: Path, prefix: str = "") -> UploadSummary:
+        """
+        Upload a file or a directory tree
+
+        Returns:
+            UploadSummary: the numbers of files uploaded and skipped and any failures
+        """
+        summary = UploadSummary()
+        files = self.blob_names(source, prefix)
+        self.logger.info(
+            f"Uploading {len(files)} files to [green]{self.container_client.container_name}[/]."
+        )
+        with (
+            ThreadPoolExecutor(max_workers=self.max_workers) as block_pool,
+            ThreadPoolExecutor(max_workers=self.max_workers) as file_pool,
+        ):
+            futures = {
+                file_pool.submit(self.upload_file, path, blob_name, block_pool): (
+                    blob_name
+                )
+                for blob_name, path in files.items()
+            }
+            for future in as_completed(futures):
+                blob_name = futures[future]
+                try:
+                    uploaded_bytes = future.result()
+                except (AzureError, DataSafeHavenAzureStorageError, OSError) as exc:
+                    self.logger.error(f"Failed to upload [green]{blob_name}[/]: {exc}")
+                    summary.failed.append(blob_name)
+                    continue
+                if uploaded_bytes is None:
+                    summary.skipped += 1
+                else:
+                    summary.uploaded += 1
+                    summary.uploaded_bytes += uploaded_bytes
+                    self.logger.debug(f"Uploaded [green]{blob_name}[/].")
+        summary.failed.sort()
+        return summary
+
+    def upload_file(
+        self, path: Path, blob_name: str, block_pool: ThreadPoolExecutor
+    ) -> int | None:
+        """
+        Upload and verify a single file
+
+        Returns:
+            int | None: the size of the file, or None if it was already uploaded
+
+        Raises:
+            DataSafeHavenAzureStorageError if the uploaded blob does not match
+        """
+        fingerprint = self.fingerprint(path)
+        if self.checkpoint.is_complete(blob_name, fingerprint):
+            return None
+        blob_client = self.container_client.get_blob_client(blob_name)
+        block_size = fingerprint[2]
+        md5 = hashlib.md5(usedforsecurity=False)
+        if fingerprint[0] <= block_size:
+            data = path.read_bytes()
+            md5.update(data)
+            blob_client.upload_blob(
+                data,
+                content_settings=ContentSettings(content_md5=bytearray(md5.digest())),
+                overwrite=True,
+                validate_content=True,
+            )
+        else:
+            staged = self.staged_blocks(blob_client)
+            block_list: list[BlobBlock] = []
+            futures: list[Future[None]] = []
+            try:
+                with open(path, "rb") as f_source:
+                    while data := f_source.read(block_size):
+                        md5.update(data)
+                        block_id = self.block_id(fingerprint, len(block_list), data)
+                        block_list.append(BlobBlock(block_id))
+                        if staged.get(block_id) == len(data):
+                            continue
+                        self._block_slots.acquire()
+                        futures.append(
+                            block_pool.submit(
+                                self.stage_block, blob_client, block_id, data
+                            )
+                        )
+            finally:
+                for future in futures:
+                    future.result()
+            blob_client.commit_block_list(
+                block_list,
+                content_settings=ContentSettings(content_md5=bytearray(md5.digest())),
+            )
+        self.verify(blob_client, fingerprint[0], md5.digest())
+        self.checkpoint.record(blob_name, fingerprint, md5.hexdigest())
+        return fingerprint[0]
+
+    def verify(self, blob_client: BlobClient, size: int, md5: bytes) -> None:
+        """
+        Check that a blob has the expected size and MD5
+
+        Blobs committed from a block list have no checksum calculated by the service,
+        so their Content-MD5 is the value set when committing. This confirms that the
+        commit completed with the expected metadata, while the content itself is
+        checked as each block is staged and by the MD5 in each block ID.
+
+        Raises:
+            DataSafeHavenAzureStorageError if the blob does not match
+        """
+        properties = blob_client.get_blob_properties()
+        content_md5 = properties.content_settings.content_md5
+        if properties.size != size or bytes(content_md5 or b"") != md5:
+            msg = f"Uploaded blob '{blob_client.blob_name}' does not match the local file."
+            raise DataSafeHavenAzureStorageError(msg)
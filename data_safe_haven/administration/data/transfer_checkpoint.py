@@ -0,0 +1,35 @@
+"""Append-only records of completed transfers"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+
+class TransferCheckpoint:
+    """
+    Append-only record of the blobs which have been transferred and verified
+
+    Each line holds a JSON entry for one blob. Later lines take precedence, and an
+    incomplete final line from an interrupted run is ignored.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.path = path
+        if path.exists():
+            with open(path, encoding="utf-8") as f_checkpoint:
+                for line in f_checkpoint:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["blob_name"]] = entry
+                    except (KeyError, TypeError, ValueError):
+                        continue
+
+    def append(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[entry["blob_name"]] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f_checkpoint:
+                f_checkpoint.write(json.dumps(entry) + "\n")
@@ -2,7 +2,7 @@ import pathlib
 from collections.abc import Sequence
 
 from data_safe_haven.config import Context, DSHPulumiConfig, SREConfig
-from data_safe_haven.external import AzurePostgreSQLDatabase, AzureSdk
+from data_safe_haven.external import AzurePostgreSQLDatabase
 from data_safe_haven.infrastructure import SREProjectManager
 
 from .research_user import ResearchUser
@@ -23,10 +23,10 @@ class GuacamoleUsers:
             pulumi_config=pulumi_config,
         )
         # Read the SRE database secret from key vault
-        azure_sdk = AzureSdk(context.subscription_name)
-        connection_db_server_password = azure_sdk.get_keyvault_secret(
-            sre_stack.output("data")["key_vault_name"],
-            sre_stack.output("data")["password_user_database_admin_secret"],
+        data_outputs = sre_stack.output("data")
+        connection_db_server_password = context.azure_sdk.get_keyvault_secret(
+            data_outputs["key_vault_name"],
+            data_outputs["password_user_database_admin_secret"],
         )
         self.postgres_provisioner = AzurePostgreSQLDatabase(
             sre_stack.output("remote_desktop")["connection_db_name"],
@@ -0,0 +1,7 @@
+from .smoke_tests import SmokeTestRunner, TapResult, WorkspaceTestResult
+
+__all__ = [
+    "SmokeTestRunner",
+    "TapResult",
+    "WorkspaceTestResult",
+]
@@ -0,0 +1,171 @@
+"""Run the smoke tests on every workspace in an SRE"""
+
+import re
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.logging import get_logger
+
+
+@dataclass
+class TapResult:
+    """A single test result from a TAP stream"""
+
+    number: int
+    description: str
+    ok: bool
+    skipped: bool = False
+
+
+@dataclass
+class WorkspaceTestResult:
+    """Smoke test results for one workspace"""
+
+    vm_name: str
+    elapsed: float = 0
+    error: str | None = None
+    output: str = ""
+    planned: int | None = None
+    results: list[TapResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> list[TapResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def passed(self) -> bool:
+        """Whether every planned test ran and none of them failed"""
+        return (
+            not self.error
+            and not self.failed
+            and self.planned is not None
+            and len(self.results) == self.planned
+        )
+
+    @property
+    def skipped(self) -> list[TapResult]:
+        return [result for result in self.results if result.skipped]
+
+
+class SmokeTestRunner:
+    """
+    Run the workspace smoke tests on many VMs at once
+
+    The bats test suite installed on each workspace is started with Azure Run
+    Command and its TAP output is parsed into structured results. A bounded pool of
+    workers runs the tests on several VMs concurrently. Each run is limited by a
+    timeout on the VM itself and by a slightly longer timeout on the Azure operation.
+
+    Run Command executes as root, but the tests check what an ordinary user can do,
+    such as writing to their home directory and not to the input volume. They are
+    therefore run with a login shell as an unprivileged account, which is created on
+    each workspace together with the smoke tests.
+    """
+
+    result_pattern = re.compile(
+        r"^(?P<ok>ok|not ok)\s+(?P<number>\d+)\s*-?\s*(?P<description>[^#]*?)\s*(?:#\s*(?P<directive>\w+).*)?$"
+    )
+    plan_pattern = re.compile(r"^1\.\.(?P<planned>\d+)")
+    # Run Command only returns the end of the output, so the full TAP stream is kept
+    # in a log file on the VM and only the plan and result lines are returned
+    script_template = (
+        "id -u {username} > /dev/null 2>&1 ||"
+        " {{ echo 'Smoke test account {username} does not exist.'; exit 1; }};"
+        " timeout --kill-after=30 {timeout} runuser --login {username} --command"
+        " 'cd /usr/local/smoke_tests && bats --tap run_all_tests.bats' > {log_path} 2>&1;"
+        " grep -E '^(1\\.\\.[0-9]+|ok |not ok )' {log_path}"
+    )
+    tap_log_path = "/var/log/dsh-smoke-tests.tap"
+    username = "dsh-smoke-tests"
+
+    def __init__(
+        self,
+        azure_sdk: AzureSdk,
+        resource_group_name: str,
+        *,
+        max_workers: int = 8,
+        timeout: int = 1800,
+    ) -> None:
+        self.azure_sdk = azure_sdk
+        self.logger = get_logger()
+        self.max_workers = max_workers
+        self.resource_group_name = resource_group_name
+        self.timeout = timeout
+
+    @classmethod
+    def parse_tap(cls, output: str, result: WorkspaceTestResult) -> None:
+        """Parse TAP lines from the output of a Run Command"""
+        for line in output.splitlines():
+            if match := cls.plan_pattern.match(line.strip()):
+                result.planned = int(match.group("planned"))
+            elif match := cls.result_pattern.match(line.strip()):
+                result.results.append(
+                    TapResult(
+                        number=int(match.group("number")),
+                        description=match.group("description"),
+                        ok=match.group("ok") == "ok",
+                        skipped=(match.group("directive") or "").lower() == "skip",
+                    )
+                )
+
+    def run(self, vm_names: Sequence[str]) -> list[WorkspaceTestResult]:
+        """
+        Run the smoke tests on each VM
+
+        Returns:
+            list[WorkspaceTestResult]: the results for each VM, in the order given
+        """
+        results: dict[str, WorkspaceTestResult] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.run_vm, vm_name): vm_name for vm_name in vm_names
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.vm_name] = result
+                if result.passed:
+                    self.logger.info(
+                        f"Smoke tests [green]passed[/] on [green]{result.vm_name}[/]."
+                    )
+                else:
+                    self.logger.error(
+                        f"Smoke tests [red]failed[/] on [green]{result.vm_name}[/]."
+                    )
+        return [results[vm_name] for vm_name in vm_names]
+
+    def run_vm(self, vm_name: str) -> WorkspaceTestResult:
+        """Run the smoke tests on a single VM, recording any error in the result"""
+        result = WorkspaceTestResult(vm_name=vm_name)
+        started = time.monotonic()
+        self.logger.debug(f"Running smoke tests on [green]{vm_name}[/].")
+        try:
+            result.output = self.azure_sdk.run_remote_script_waiting(
+                self.resource_group_name,
+                self.script_template.format(
+                    log_path=self.tap_log_path,
+                    timeout=self.timeout,
+                    username=self.username,
+                ),
+                {},
+                vm_name,
+                timeout=self.timeout + 300,
+            )
+            self.parse_tap(result.output, result)
+            if result.planned is None:
+                result.error = (
+                    f"Smoke test account '{self.username}' does not exist."
+                    if "does not exist" in result.output
+                    else "No TAP output was produced."
+                )
+            elif len(result.results) < result.planned:
+                result.error = (
+                    f"Only {len(result.results)} of {result.planned} tests finished."
+                )
+        except DataSafeHavenAzureError as exc:
+            result.error = str(exc)
+        result.elapsed = time.monotonic() - started
+        return result
@@ -1,23 +1,336 @@
 """Command-line application for managing SRE infrastructure."""
 
-from typing import Annotated
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Annotated, Any
 
 import typer
 
-from data_safe_haven.config import ContextManager, DSHPulumiConfig, SHMConfig, SREConfig
+from data_safe_haven import console
+from data_safe_haven.administration.workspaces import SmokeTestRunner
+from data_safe_haven.config import (
+    Context,
+    ContextManager,
+    DSHPulumiConfig,
+    SHMConfig,
+    SREConfig,
+)
 from data_safe_haven.exceptions import DataSafeHavenConfigError, DataSafeHavenError
 from data_safe_haven.external import AzureSdk, GraphApi
 from data_safe_haven.functions import current_ip_address, ip_address_in_list
-from data_safe_haven.infrastructure import SREProjectManager
+from data_safe_haven.infrastructure import PulumiProgress, SREProjectManager
 from data_safe_haven.logging import get_logger
 from data_safe_haven.provisioning import SREProvisioningManager
+from data_safe_haven.types import PulumiRefreshPolicy
+
+from .sre_data import sre_data_command_group
 
 sre_command_group = typer.Typer()
+sre_command_group.add_typer(
+    sre_data_command_group,
+    name="data",
+    help="Transfer data into and out of an SRE.",
+)
+
+
+def select_sre_names(
+    name: str | None,
+    *,
+    all_sres: bool,
+    available: Callable[[], list[str]],
+    names: str | None,
+) -> list[str]:
+    """Determine which SREs a command should act on
+
+    Exactly one of a single name, a comma-separated list of names or 'all' must be
+    given. The 'available' callable is only evaluated when 'all' is requested.
+
+    Raises:
+        DataSafeHavenConfigError if the selection is missing or ambiguous
+    """
+    selections = [name is not None, names is not None, all_sres]
+    if sum(selections) != 1:
+        msg = "Provide exactly one of an SRE name, '--names' or '--all'."
+        raise DataSafeHavenConfigError(msg)
+    if name is not None:
+        return [name]
+    if names is not None:
+        selected = [n.strip() for n in names.split(",") if n.strip()]
+    else:
+        selected = available()
+    if not selected:
+        msg = "No SREs were selected."
+        raise DataSafeHavenConfigError(msg)
+    return list(dict.fromkeys(selected))
+
+
+def run_with_graph_api_token(
+    action: Callable[..., None], name: str, graph_api_token: str, **kwargs: Any
+) -> None:
+    """Run an action for an SRE in a worker process which only has a Graph API token"""
+    PulumiProgress.show_live = False
+    action(name, graph_api=GraphApi.from_token(graph_api_token), **kwargs)
+
+
+def run_for_each_sre(
+    action: Callable[..., None],
+    sre_names: list[str],
+    *,
+    graph_api: GraphApi,
+    max_workers: int,
+    pulumi_config: DSHPulumiConfig,
+    **kwargs: Any,
+) -> list[str]:
+    """Run an action for each SRE, using a separate process for each one
+
+    Processes are forked so that they inherit any credentials which have already
+    been confirmed by the user.
+
+    Returns:
+        list[str]: names of the SREs where the action failed
+    """
+    logger = get_logger()
+    failed: list[str] = []
+    remaining = list(sre_names)
+    if not pulumi_config.encrypted_key:
+        # All stacks share one encryption key, so let the first SRE create it
+        # before starting any others
+        first = remaining.pop(0)
+        try:
+            action(first, graph_api=graph_api, pulumi_config=pulumi_config, **kwargs)
+            logger.info(f"Finished working on SRE '[green]{first}[/]'.")
+        except DataSafeHavenError as exc:
+            logger.error(f"Failed to work on SRE '[green]{first}[/]': {exc}")
+            failed.append(first)
+    if not remaining:
+        return failed
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(remaining)),
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        futures: dict[str, Future[None]] = {
+            sre_name: executor.submit(
+                run_with_graph_api_token,
+                action,
+                sre_name,
+                graph_api.token,
+                pulumi_config=pulumi_config,
+                **kwargs,
+            )
+            for sre_name in remaining
+        }
+        for sre_name, future in futures.items():
+            try:
+                future.result()
+                logger.info(f"Finished working on SRE '[green]{sre_name}[/]'.")
+            except Exception as exc:
+                logger.error(f"Failed to work on SRE '[green]{sre_name}[/]': {exc}")
+                failed.append(sre_name)
+    return failed
+
+
+def deploy_sre(
+    name: str,
+    *,
+    context: Context,
+    shm_config: SHMConfig,
+    graph_api: GraphApi,
+    pulumi_config: DSHPulumiConfig,
+    force: bool,
+    only: list[str] | None,
+    only_changed: bool,
+    parallel: int | None,
+    preview: bool,
+    refresh: PulumiRefreshPolicy,
+) -> None:
+    """Deploy a single SRE using already loaded SHM and Pulumi configs
+
+    Raises:
+        DataSafeHavenError if any part of the deployment fails
+    """
+    logger = get_logger()
+    sre_config = SREConfig.from_remote_by_name(context, name)
+
+    # Check whether current IP address is authorised to take administrator actions
+    if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
+        logger.warning(
+            f"IP address '{current_ip_address()}' is not authorised to deploy SRE '{sre_config.description}'."
+        )
+        msg = (
+            "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
+        )
+        raise DataSafeHavenConfigError(msg)
+
+    # Initialise Pulumi stack
+    stack = SREProjectManager(
+        context=context,
+        config=sre_config,
+        pulumi_config=pulumi_config,
+        create_project=True,
+        graph_api_token=graph_api.token,
+    )
+    # Set Azure options
+    stack.add_option("azure-native:location", sre_config.azure.location, replace=False)
+    stack.add_option(
+        "azure-native:subscriptionId",
+        sre_config.azure.subscription_id,
+        replace=False,
+    )
+    stack.add_option("azure-native:tenantId", sre_config.azure.tenant_id, replace=False)
+    # Get SRE subscription name
+    azure_sdk = AzureSdk(subscription_name=context.subscription_name)
+    sre_subscription_name = azure_sdk.get_subscription_name(
+        sre_config.azure.subscription_id
+    )
+    stack.add_option(
+        "sre-subscription-name",
+        sre_subscription_name,
+        replace=True,
+    )
+    logger.info(
+        f"SRE will be deployed to subscription '[green]{sre_subscription_name}[/]'"
+        f" ({sre_config.azure.subscription_id})"
+    )
+    # Set Entra options
+    application = graph_api.get_application_by_name(context.entra_application_name)
+    if not application:
+        msg = f"No Entra application '{context.entra_application_name}' was found. Please redeploy your SHM."
+        raise DataSafeHavenConfigError(msg)
+    stack.add_option("azuread:clientId", application.get("appId", ""), replace=True)
+    if not context.entra_application_secret:
+        msg = f"No Entra application secret '{context.entra_application_secret_name}' was found. Please redeploy your SHM."
+        raise DataSafeHavenConfigError(msg)
+    stack.add_secret(
+        "azuread:clientSecret", context.entra_application_secret, replace=True
+    )
+    stack.add_option("azuread:tenantId", shm_config.shm.entra_tenant_id, replace=True)
+    # Load SHM outputs
+    stack.add_option(
+        "shm-admin-group-id",
+        shm_config.shm.admin_group_id,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-entra-tenant-id",
+        shm_config.shm.entra_tenant_id,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-fqdn",
+        shm_config.shm.fqdn,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-location",
+        shm_config.azure.location,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-subscription-id",
+        shm_config.azure.subscription_id,
+        replace=True,
+    )
+    logger.info(f"SRE will be registered in SHM '[green]{shm_config.shm.fqdn}[/]'")
+    shm_subscription_name = azure_sdk.get_subscription_name(
+        shm_config.azure.subscription_id
+    )
+    logger.info(
+        f"SHM is deployed to subscription '[green]{shm_subscription_name}[/]'"
+        f" ({shm_config.azure.subscription_id})"
+    )
+
+    # Select the components to deploy
+    components = set(only) if only else None
+    if only_changed:
+        components = stack.changed_components()
+        if components is None:
+            logger.info("Deploying all components of the SRE.")
+
+    # Deploy Azure infrastructure with Pulumi
+    try:
+        if components == set():
+            logger.info("No configuration changes found since the last deployment.")
+        else:
+            stack.deploy(
+                components=components,
+                force=force,
+                parallel=parallel,
+                preview=preview,
+                refresh=refresh,
+            )
+    finally:
+        # Upload this SRE's Pulumi config to blob storage
+        pulumi_config.upload_project(context, name)
+
+    # Provision SRE with anything that could not be done in Pulumi
+    manager = SREProvisioningManager(
+        graph_api_token=graph_api.token,
+        location=sre_config.azure.location,
+        sre_name=sre_config.name,
+        sre_stack=stack,
+        subscription_name=sre_subscription_name,
+        timezone=sre_config.sre.timezone,
+    )
+    manager.run()
+
+
+def teardown_sre(
+    name: str,
+    *,
+    context: Context,
+    graph_api: GraphApi,
+    pulumi_config: DSHPulumiConfig,
+    force: bool,
+) -> None:
+    """Tear down a single SRE using an already loaded Pulumi config
+
+    Raises:
+        DataSafeHavenError if any part of the teardown fails
+    """
+    logger = get_logger()
+    sre_config = SREConfig.from_remote_by_name(context, name)
+
+    # Check whether current IP address is authorised to take administrator actions
+    if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
+        logger.warning(
+            f"IP address '{current_ip_address()}' is not authorised to teardown SRE '{sre_config.description}'."
+        )
+        msg = (
+            "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
+        )
+        raise DataSafeHavenConfigError(msg)
+
+    # Remove infrastructure deployed with Pulumi
+    # N.B. We allow the creation of a project (which is immediately removed)
+    # to stop Pulumi operations from crashing due to a missing stack
+    stack = SREProjectManager(
+        context=context,
+        config=sre_config,
+        pulumi_config=pulumi_config,
+        graph_api_token=graph_api.token,
+        create_project=True,
+    )
+    stack.teardown(force=force)
+
+    # Remove Pulumi project from Pulumi config file
+    del pulumi_config[name]
+
+    # Upload Pulumi config to blob storage
+    pulumi_config.upload_project(context, name)
 
 
 @sre_command_group.command()
 def deploy(
-    name: Annotated[str, typer.Argument(help="Name of SRE to deploy")],
+    name: Annotated[str | None, typer.Argument(help="Name of SRE to deploy")] = None,
+    all_sres: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--all",
+            help="Deploy every SRE with a configuration in this context.",
+        ),
+    ] = False,
     force: Annotated[  # noqa: FBT002
         bool,
         typer.Option(
@@ -26,15 +339,90 @@ def deploy(
             help="Force this operation, cancelling any others that are in progress.",
         ),
     ] = False,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            help="Maximum number of SREs to deploy at the same time.",
+            min=1,
+        ),
+    ] = 4,
+    names: Annotated[
+        str | None,
+        typer.Option(
+            "--names",
+            help="Comma-separated list of SREs to deploy.",
+        ),
+    ] = None,
+    only: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--only",
+            help="Only deploy this component and anything depending on it. May be repeated.",
+        ),
+    ] = None,
+    only_changed: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--only-changed",
+            help="Only deploy components affected by configuration changes since the last deployment.",
+        ),
+    ] = False,
+    parallel: Annotated[
+        int | None,
+        typer.Option(
+            "--parallel",
+            "-p",
+            help="Number of resources to refresh or preview in parallel.",
+            min=1,
+        ),
+    ] = None,
+    refresh_drift_prone_only: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--refresh-drift-prone-only",
+            help="Only refresh resources which are prone to change outside Pulumi.",
+        ),
+    ] = False,
+    skip_preview: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--skip-preview",
+            help="Apply changes without previewing them first.",
+        ),
+    ] = False,
+    skip_refresh: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--skip-refresh",
+            help="Do not refresh the state of existing resources before deploying.",
+        ),
+    ] = False,
 ) -> None:
-    """Deploy a Secure Research Environment"""
+    """Deploy one or more Secure Research Environments"""
     logger = get_logger()
     try:
         # Load context and SHM config
         context = ContextManager.from_file().assert_context()
         shm_config = SHMConfig.from_remote(context)
 
+        # Select SREs to deploy
+        def available() -> list[str]:
+            azure_sdk = AzureSdk(subscription_name=context.subscription_name)
+            blobs = azure_sdk.list_blobs(
+                container_name=context.storage_container_name,
+                prefix="sre",
+                resource_group_name=context.resource_group_name,
+                storage_account_name=context.storage_account_name,
+            )
+            return [blob.removeprefix("sre-").removesuffix(".yaml") for blob in blobs]
+
+        sre_names = select_sre_names(
+            name, all_sres=all_sres, available=available, names=names
+        )
+
         # Load GraphAPI
+        # Note that requesting a GraphApi token will trigger possible user-interaction
         graph_api = GraphApi.from_scopes(
             scopes=[
                 "Application.ReadWrite.All",
@@ -45,132 +433,67 @@ def deploy(
             tenant_id=shm_config.shm.entra_tenant_id,
         )
 
-        # Load Pulumi and SRE configs
+        # Load Pulumi config
         pulumi_config = DSHPulumiConfig.from_remote_or_create(
             context, encrypted_key=None, projects={}
         )
-        sre_config = SREConfig.from_remote_by_name(context, name)
-
-        # Check whether current IP address is authorised to take administrator actions
-        if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
-            logger.warning(
-                f"IP address '{current_ip_address()}' is not authorised to deploy SRE '{sre_config.description}'."
-            )
-            msg = "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
-            raise DataSafeHavenConfigError(msg)
-
-        # Initialise Pulumi stack
-        # Note that requesting a GraphApi token will trigger possible user-interaction
-        stack = SREProjectManager(
-            context=context,
-            config=sre_config,
-            pulumi_config=pulumi_config,
-            create_project=True,
-            graph_api_token=graph_api.token,
-        )
-        # Set Azure options
-        stack.add_option(
-            "azure-native:location", sre_config.azure.location, replace=False
-        )
-        stack.add_option(
-            "azure-native:subscriptionId",
-            sre_config.azure.subscription_id,
-            replace=False,
-        )
-        stack.add_option(
-            "azure-native:tenantId", sre_config.azure.tenant_id, replace=False
-        )
-        # Get SRE subscription name
-        azure_sdk = AzureSdk(subscription_name=context.subscription_name)
-        sre_subscription_name = azure_sdk.get_subscription_name(
-            sre_config.azure.subscription_id
-        )
-        stack.add_option(
-            "sre-subscription-name",
-            sre_subscription_name,
-            replace=True,
-        )
-        logger.info(
-            f"SRE will be deployed to subscription '[green]{sre_subscription_name}[/]'"
-            f" ({sre_config.azure.subscription_id})"
-        )
-        # Set Entra options
-        application = graph_api.get_application_by_name(context.entra_application_name)
-        if not application:
-            msg = f"No Entra application '{context.entra_application_name}' was found. Please redeploy your SHM."
-            raise DataSafeHavenConfigError(msg)
-        stack.add_option("azuread:clientId", application.get("appId", ""), replace=True)
-        if not context.entra_application_secret:
-            msg = f"No Entra application secret '{context.entra_application_secret_name}' was found. Please redeploy your SHM."
-            raise DataSafeHavenConfigError(msg)
-        stack.add_secret(
-            "azuread:clientSecret", context.entra_application_secret, replace=True
-        )
-        stack.add_option(
-            "azuread:tenantId", shm_config.shm.entra_tenant_id, replace=True
-        )
-        # Load SHM outputs
-        stack.add_option(
-            "shm-admin-group-id",
-            shm_config.shm.admin_group_id,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-entra-tenant-id",
-            shm_config.shm.entra_tenant_id,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-fqdn",
-            shm_config.shm.fqdn,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-location",
-            shm_config.azure.location,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-subscription-id",
-            shm_config.azure.subscription_id,
-            replace=True,
-        )
-        logger.info(f"SRE will be registered in SHM '[green]{shm_config.shm.fqdn}[/]'")
-        shm_subscription_name = azure_sdk.get_subscription_name(
-            shm_config.azure.subscription_id
-        )
-        logger.info(
-            f"SHM is deployed to subscription '[green]{shm_subscription_name}[/]'"
-            f" ({shm_config.azure.subscription_id})"
-        )
-
-        # Deploy Azure infrastructure with Pulumi
-        try:
-            stack.deploy(force=force)
-        finally:
-            # Upload Pulumi config to blob storage
-            pulumi_config.upload(context)
-
-        # Provision SRE with anything that could not be done in Pulumi
-        manager = SREProvisioningManager(
-            graph_api_token=graph_api.token,
-            location=sre_config.azure.location,
-            sre_name=sre_config.name,
-            sre_stack=stack,
-            subscription_name=sre_subscription_name,
-            timezone=sre_config.sre.timezone,
-        )
-        manager.run()
     except DataSafeHavenError as exc:
         logger.critical(
-            f"Could not deploy Secure Research Environment '[green]{name}[/]'."
+            f"Could not deploy Secure Research Environment '[green]{name or names or 'all'}[/]'."
         )
         raise typer.Exit(code=1) from exc
 
+    if skip_refresh:
+        refresh = PulumiRefreshPolicy.NONE
+    elif refresh_drift_prone_only:
+        refresh = PulumiRefreshPolicy.DRIFT_PRONE
+    else:
+        refresh = PulumiRefreshPolicy.ALL
+    options: dict[str, Any] = {
+        "context": context,
+        "shm_config": shm_config,
+        "graph_api": graph_api,
+        "force": force,
+        "only": only,
+        "only_changed": only_changed,
+        "parallel": parallel,
+        "preview": not skip_preview,
+        "refresh": refresh,
+    }
+
+    if len(sre_names) == 1:
+        try:
+            deploy_sre(sre_names[0], pulumi_config=pulumi_config, **options)
+        except DataSafeHavenError as exc:
+            logger.critical(
+                f"Could not deploy Secure Research Environment '[green]{sre_names[0]}[/]'."
+            )
+            raise typer.Exit(code=1) from exc
+    else:
+        failed = run_for_each_sre(
+            deploy_sre,
+            sre_names,
+            max_workers=max_workers,
+            pulumi_config=pulumi_config,
+            **options,
+        )
+        if failed:
+            logger.critical(
+                f"Could not deploy Secure Research Environments '[green]{', '.join(failed)}[/]'."
+            )
+            raise typer.Exit(code=1)
+
 
 @sre_command_group.command()
 def teardown(
-    name: Annotated[str, typer.Argument(help="Name of SRE to teardown.")],
+    name: Annotated[str | None, typer.Argument(help="Name of SRE to teardown.")] = None,
+    all_sres: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--all",
+            help="Tear down every SRE which has been deployed in this context.",
+        ),
+    ] = False,
     force: Annotated[  # noqa: FBT002
         bool,
         typer.Option(
@@ -179,8 +502,23 @@ def teardown(
             help="Force this operation, cancelling any others that are in progress.",
         ),
     ] = False,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            help="Maximum number of SREs to tear down at the same time.",
+            min=1,
+        ),
+    ] = 4,
+    names: Annotated[
+        str | None,
+        typer.Option(
+            "--names",
+            help="Comma-separated list of SREs to tear down.",
+        ),
+    ] = None,
 ) -> None:
-    """Tear down a deployed a Secure Research Environment."""
+    """Tear down one or more deployed Secure Research Environments."""
     logger = get_logger()
     try:
         # Load context and SHM config
@@ -193,37 +531,146 @@ def teardown(
             tenant_id=shm_config.shm.entra_tenant_id,
         )
 
-        # Load Pulumi and SRE configs
+        # Load Pulumi config and select SREs to tear down
         pulumi_config = DSHPulumiConfig.from_remote(context)
-        sre_config = SREConfig.from_remote_by_name(context, name)
+        sre_names = select_sre_names(
+            name,
+            all_sres=all_sres,
+            available=lambda: pulumi_config.project_names,
+            names=names,
+        )
+    except DataSafeHavenError as exc:
+        logger.critical(
+            f"Could not teardown Secure Research Environment '[green]{name or names or 'all'}[/]'."
+        )
+        raise typer.Exit(1) from exc
 
-        # Check whether current IP address is authorised to take administrator actions
-        if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
-            logger.warning(
-                f"IP address '{current_ip_address()}' is not authorised to teardown SRE '{sre_config.description}'."
+    options: dict[str, Any] = {
+        "context": context,
+        "graph_api": graph_api,
+        "force": force,
+    }
+
+    if len(sre_names) == 1:
+        try:
+            teardown_sre(sre_names[0], pulumi_config=pulumi_config, **options)
+        except DataSafeHavenError as exc:
+            logger.critical(
+                f"Could not teardown Secure Research Environment '[green]{sre_names[0]}[/]'."
             )
-            msg = "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
-            raise DataSafeHavenConfigError(msg)
+            raise typer.Exit(1) from exc
+    else:
+        failed = run_for_each_sre(
+            teardown_sre,
+            sre_names,
+            max_workers=max_workers,
+            pulumi_config=pulumi_config,
+            **options,
+        )
+        if failed:
+            logger.critical(
+                f"Could not teardown Secure Research Environments '[green]{', '.join(failed)}[/]'."
+            )
+            raise typer.Exit(1)
+
 
-        # Remove infrastructure deployed with Pulumi
-        # N.B. We allow the creation of a project (which is immediately removed)
-        # to stop Pulumi operations from crashing due to a missing stack
+@sre_command_group.command()
+def test(
+    name: Annotated[str, typer.Argument(help="Name of SRE to test.")],
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            help="Maximum number of workspaces to test at the same time.",
+            min=1,
+        ),
+    ] = 8,
+    output_directory: Annotated[
+        Path | None,
+        typer.Option(
+            "--output-directory",
+            help="Directory in which to save the TAP output from each workspace.",
+            file_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    timeout: Annotated[
+        int,
+        typer.Option(
+            "--timeout",
+            help="Maximum number of seconds that the tests may take on each workspace.",
+            min=1,
+        ),
+    ] = 1800,
+) -> None:
+    """Run the smoke tests on every workspace in a deployed SRE."""
+    logger = get_logger()
+    try:
+        context = ContextManager.from_file().assert_context()
+        sre_config = SREConfig.from_remote_by_name(context, name)
+        pulumi_config = DSHPulumiConfig.from_remote(context)
+        if sre_config.name not in pulumi_config.project_names:
+            msg = f"Could not load Pulumi settings for '{sre_config.name}'. Have you deployed the SRE?"
+            raise DataSafeHavenConfigError(msg)
         stack = SREProjectManager(
             context=context,
             config=sre_config,
             pulumi_config=pulumi_config,
-            graph_api_token=graph_api.token,
-            create_project=True,
         )
-        stack.teardown(force=force)
-
-        # Remove Pulumi project from Pulumi config file
-        del pulumi_config[name]
-
-        # Upload Pulumi config to blob storage
-        pulumi_config.upload(context)
+        data_outputs = stack.output("data")
+        if "resource_group_name" not in data_outputs:
+            msg = f"Resource group details for '{sre_config.name}' are missing. Please redeploy the SRE."
+            raise DataSafeHavenConfigError(msg)
+        vm_names = [vm["name"] for vm in stack.output("workspaces")["vm_outputs"]]
+        sre_subscription_name = AzureSdk(
+            context.subscription_name
+        ).get_subscription_name(sre_config.azure.subscription_id)
+        runner = SmokeTestRunner(
+            AzureSdk(sre_subscription_name),
+            data_outputs["resource_group_name"],
+            max_workers=max_workers,
+            timeout=timeout,
+        )
+        logger.info(
+            f"Running smoke tests on {len(vm_names)} workspaces in SRE '[green]{name}[/]'."
+        )
+        results = runner.run(vm_names)
     except DataSafeHavenError as exc:
         logger.critical(
-            f"Could not teardown Secure Research Environment '[green]{name}[/]'."
+            f"Could not test Secure Research Environment '[green]{name}[/]'."
         )
         raise typer.Exit(1) from exc
+
+    if output_directory:
+        output_directory.mkdir(parents=True, exist_ok=True)
+        for result in results:
+            (output_directory / f"{result.vm_name}.tap").write_text(
+                result.output, encoding="utf-8"
+            )
+
+    console.tabulate(
+        ["Workspace", "Passed", "Failed", "Skipped", "Time", "Result"],
+        [
+            [
+                result.vm_name,
+                str(len(result.results) - len(result.failed)),
+                str(len(result.failed)),
+                str(len(result.skipped)),
+                f"{result.elapsed:.0f}s",
+                "pass" if result.passed else (result.error or "fail"),
+            ]
+            for result in results
+        ],
+    )
+    for result in results:
+        for failure in result.failed:
+            logger.error(
+                f"[green]{result.vm_name}[/]: test {failure.number} '{failure.description}' failed."
+            )
+    failed = [result.vm_name for result in results if not result.passed]
+    if failed:
+        logger.critical(
+            f"Smoke tests failed on {len(failed)} of {len(results)} workspaces."
+        )
+        raise typer.Exit(1)
+    logger.info(f"Smoke tests passed on all {len(results)} workspaces.")
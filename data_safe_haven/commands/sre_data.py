@@ -0,0 +1,221 @@
+"""Command-line application for transferring data into and out of an SRE."""
+
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from azure.storage.blob import ContainerClient
+
+from data_safe_haven.administration.data import (
+    DataDownloader,
+    DataUploader,
+    DownloadCheckpoint,
+    UploadCheckpoint,
+)
+from data_safe_haven.config import Context, ContextManager, DSHPulumiConfig, SREConfig
+from data_safe_haven.directories import config_dir
+from data_safe_haven.exceptions import DataSafeHavenConfigError, DataSafeHavenError
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.functions import current_ip_address, ip_address_in_list, sha256hash
+from data_safe_haven.infrastructure import SREProjectManager
+from data_safe_haven.logging import get_logger
+
+sre_data_command_group = typer.Typer()
+
+
+def sensitive_data_container(
+    context: Context, name: str, container_name: str
+) -> ContainerClient:
+    """Load a client for a container in the sensitive data storage account of an SRE
+
+    Raises:
+        DataSafeHavenError if the SRE is not deployed or cannot be reached from here
+    """
+    logger = get_logger()
+    sre_config = SREConfig.from_remote_by_name(context, name)
+    pulumi_config = DSHPulumiConfig.from_remote(context)
+    if sre_config.name not in pulumi_config.project_names:
+        msg = f"Could not load Pulumi settings for '{sre_config.name}'. Have you deployed the SRE?"
+        raise DataSafeHavenConfigError(msg)
+
+    # The storage account only accepts connections from admin and data provider IP addresses
+    if not ip_address_in_list(
+        sre_config.sre.admin_ip_addresses + sre_config.sre.data_provider_ip_addresses
+    ):
+        logger.warning(
+            f"IP address '{current_ip_address()}' is not authorised to transfer data for SRE '{sre_config.description}'."
+        )
+        msg = "Check that 'admin_ip_addresses' or 'data_provider_ip_addresses' are set correctly in your SRE config file."
+        raise DataSafeHavenConfigError(msg)
+
+    # Load storage account details from the SRE stack outputs
+    stack = SREProjectManager(
+        context=context,
+        config=sre_config,
+        pulumi_config=pulumi_config,
+    )
+    data_outputs = stack.output("data")
+    if "storage_account_data_private_sensitive_name" not in data_outputs:
+        msg = f"Storage account details for '{sre_config.name}' are missing. Please redeploy the SRE."
+        raise DataSafeHavenConfigError(msg)
+    sre_subscription_name = AzureSdk(context.subscription_name).get_subscription_name(
+        sre_config.azure.subscription_id
+    )
+    return AzureSdk(sre_subscription_name).blob_container_client(
+        data_outputs["resource_group_name"],
+        data_outputs["storage_account_data_private_sensitive_name"],
+        container_name,
+    )
+
+
+@sre_data_command_group.command()
+def download(
+    name: Annotated[str, typer.Argument(help="Name of SRE to download data from.")],
+    destination: Annotated[
+        Path,
+        typer.Argument(
+            help="A directory to download into.",
+            file_okay=False,
+            resolve_path=True,
+        ),
+    ],
+    chunk_size: Annotated[
+        int,
+        typer.Option(
+            "--chunk-size",
+            help="Size in MiB of the ranges that each file is downloaded in.",
+            min=1,
+        ),
+    ] = 4,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            help="Maximum number of files and ranges to download at the same time.",
+            min=1,
+        ),
+    ] = 8,
+    prefix: Annotated[
+        str,
+        typer.Option(
+            "--prefix",
+            help="Only download files under this path in the egress container.",
+        ),
+    ] = "",
+) -> None:
+    """Download approved outputs from the egress container of an SRE.
+
+    A SHA256 manifest of the downloaded files is written to the destination.
+    Files which have already been downloaded are not downloaded again.
+    """
+    logger = get_logger()
+    prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+    try:
+        context = ContextManager.from_file().assert_context()
+        container_client = sensitive_data_container(context, name, "egress")
+        # Record progress separately for each source and destination
+        checkpoint = DownloadCheckpoint(
+            config_dir()
+            / "transfers"
+            / f"download-{name}-{sha256hash(f'{destination}:{prefix}')[:16]}.jsonl"
+        )
+        downloader = DataDownloader(
+            container_client,
+            checkpoint,
+            chunk_size=chunk_size * 1024 * 1024,
+            max_workers=max_workers,
+        )
+        summary = downloader.download(destination, prefix)
+    except DataSafeHavenError as exc:
+        logger.critical(f"Could not download data from SRE '[green]{name}[/]'.")
+        raise typer.Exit(1) from exc
+
+    logger.info(
+        f"Downloaded {summary.downloaded} files ({summary.downloaded_bytes} bytes)"
+        f" and skipped {summary.skipped} unchanged files."
+    )
+    logger.info(
+        f"Checksums are in [green]{destination / DataDownloader.manifest_name}[/]."
+    )
+    if summary.failed:
+        logger.critical(
+            f"Could not download {len(summary.failed)} files. Run this command again to retry."
+        )
+        raise typer.Exit(1)
+
+
+@sre_data_command_group.command()
+def upload(
+    name: Annotated[str, typer.Argument(help="Name of SRE to upload data to.")],
+    source: Annotated[
+        Path,
+        typer.Argument(
+            help="A file or directory to upload.",
+            exists=True,
+            resolve_path=True,
+        ),
+    ],
+    block_size: Annotated[
+        int,
+        typer.Option(
+            "--block-size",
+            help=(
+                "Size in MiB of the blocks that large files are uploaded in."
+                " Very large files use larger blocks where needed."
+            ),
+            min=1,
+            max=4000,
+        ),
+    ] = 8,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            "--max-workers",
+            help="Maximum number of files and blocks to upload at the same time.",
+            min=1,
+        ),
+    ] = 8,
+    prefix: Annotated[
+        str,
+        typer.Option(
+            "--prefix",
+            help="Path inside the ingress container to upload to.",
+        ),
+    ] = "",
+) -> None:
+    """Upload data to the ingress container of an SRE.
+
+    Each block is checked against its MD5 hash by the storage service as it is
+    uploaded. Interrupted uploads can be resumed by running the same command again.
+    """
+    logger = get_logger()
+    prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+    try:
+        context = ContextManager.from_file().assert_context()
+        container_client = sensitive_data_container(context, name, "ingress")
+        # Record progress separately for each source and destination
+        checkpoint = UploadCheckpoint(
+            config_dir()
+            / "transfers"
+            / f"upload-{name}-{sha256hash(f'{source}:{prefix}')[:16]}.jsonl"
+        )
+        uploader = DataUploader(
+            container_client,
+            checkpoint,
+            block_size=block_size * 1024 * 1024,
+            max_workers=max_workers,
+        )
+        summary = uploader.upload(source, prefix)
+    except DataSafeHavenError as exc:
+        logger.critical(f"Could not upload data to SRE '[green]{name}[/]'.")
+        raise typer.Exit(1) from exc
+
+    logger.info(
+        f"Uploaded {summary.uploaded} files ({summary.uploaded_bytes} bytes)"
+        f" and skipped {summary.skipped} unchanged files."
+    )
+    if summary.failed:
+        logger.critical(
+            f"Could not upload {len(summary.failed)} files. Run this command again to retry."
+        )
+        raise typer.Exit(1)
@@ -30,9 +30,17 @@ class Context(ContextBase, BaseModel, validate_assignment=True):
     name: SafeString
     subscription_name: AzureSubscriptionName
 
+    _azure_sdk = None
     _pulumi_encryption_key = None
     _entra_application_secret = None
 
+    @property
+    def azure_sdk(self) -> AzureSdk:
+        """A single AzureSdk, so that credentials and clients are reused"""
+        if not self._azure_sdk:
+            self._azure_sdk = AzureSdk(subscription_name=self.subscription_name)
+        return self._azure_sdk
+
     @property
     def entra_application_name(self) -> str:
         return f"Data Safe Haven ({self.name}) Pulumi Service Principal"
@@ -40,25 +48,23 @@ class Context(ContextBase, BaseModel, validate_assignment=True):
     @property
     def entra_application_secret(self) -> str:
         if not self._entra_application_secret:
-            azure_sdk = AzureSdk(subscription_name=self.subscription_name)
             try:
-                application_secret = azure_sdk.get_keyvault_secret(
+                self._entra_application_secret = self.azure_sdk.get_keyvault_secret(
                     secret_name=self.entra_application_kvsecret_name,
                     key_vault_name=self.key_vault_name,
                 )
-                self._entra_application_secret = application_secret
             except DataSafeHavenAzureError:
                 return ""
         return self._entra_application_secret
 
     @entra_application_secret.setter
     def entra_application_secret(self, application_secret: str) -> None:
-        azure_sdk = AzureSdk(subscription_name=self.subscription_name)
-        azure_sdk.set_keyvault_secret(
+        self.azure_sdk.set_keyvault_secret(
             secret_name=self.entra_application_kvsecret_name,
             secret_value=application_secret,
             key_vault_name=self.key_vault_name,
         )
+        self._entra_application_secret = application_secret
 
     @property
     def key_vault_name(self) -> str:
@@ -76,8 +82,7 @@ class Context(ContextBase, BaseModel, validate_assignment=True):
     @property
     def pulumi_encryption_key(self) -> KeyVaultKey:
         if not self._pulumi_encryption_key:
-            azure_sdk = AzureSdk(subscription_name=self.subscription_name)
-            self._pulumi_encryption_key = azure_sdk.get_keyvault_key(
+            self._pulumi_encryption_key = self.azure_sdk.get_keyvault_key(
                 key_name=self.pulumi_encryption_key_name,
                 key_vault_name=self.key_vault_name,
             )
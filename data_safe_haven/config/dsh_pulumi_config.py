@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from typing import ClassVar
 
-from data_safe_haven.serialisers import AzureSerialisableModel
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.serialisers import AzureSerialisableModel, ContextBase
 
 from .dsh_pulumi_project import DSHPulumiProject
 
@@ -12,6 +13,7 @@ class DSHPulumiConfig(AzureSerialisableModel):
 
     config_type: ClassVar[str] = "Pulumi"
     default_filename: ClassVar[str] = "pulumi.yaml"
+    lock_filename: ClassVar[str] = "pulumi.yaml.lock"
 
     encrypted_key: str | None
     projects: dict[str, DSHPulumiProject]
@@ -62,3 +64,28 @@ class DSHPulumiConfig(AzureSerialisableModel):
         if project_name not in self.project_names:
             self[project_name] = DSHPulumiProject(stack_config={})
         return self[project_name]
+
+    def upload_project(self, context: ContextBase, project_name: str) -> None:
+        """
+        Upload the state of a single project, leaving all other projects untouched.
+
+        The remote file is re-read and rewritten while holding a lease on a lock
+        blob, so that several processes can safely update different projects.
+        """
+        azure_sdk = AzureSdk(subscription_name=context.subscription_name)
+        with azure_sdk.blob_lease(
+            self.lock_filename,
+            context.resource_group_name,
+            context.storage_account_name,
+            context.storage_container_name,
+        ):
+            remote = DSHPulumiConfig.from_remote_or_create(
+                context, encrypted_key=self.encrypted_key, projects={}
+            )
+            if not remote.encrypted_key:
+                remote.encrypted_key = self.encrypted_key
+            if project_name in self.project_names:
+                remote.projects[project_name] = self[project_name]
+            else:
+                remote.projects.pop(project_name, None)
+            remote.upload(context)
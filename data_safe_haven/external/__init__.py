@@ -1,5 +1,6 @@
 from .api.azure_sdk import AzureSdk
 from .api.graph_api import GraphApi
+from .interface.azure_blob_container_acl import AzureBlobContainerAcl
 from .interface.azure_container_instance import AzureContainerInstance
 from .interface.azure_ipv4_range import AzureIPv4Range
 from .interface.azure_postgresql_database import AzurePostgreSQLDatabase
@@ -7,6 +8,7 @@ from .interface.pulumi_account import PulumiAccount
 
 __all__ = [
     "AzureSdk",
+    "AzureBlobContainerAcl",
     "AzureContainerInstance",
     "AzureIPv4Range",
     "AzurePostgreSQLDatabase",
@@ -1,8 +1,11 @@
 """Interface to the Azure Python SDK"""
 
+import random
+import threading
 import time
-from contextlib import suppress
-from typing import Any, cast
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, suppress
+from typing import IO, Any, cast
 
 from azure.core.exceptions import (
     AzureError,
@@ -14,7 +17,7 @@ from azure.core.exceptions import (
 )
 from azure.keyvault.certificates import CertificateClient, KeyVaultCertificate
 from azure.keyvault.keys import KeyClient, KeyVaultKey
-from azure.keyvault.secrets import KeyVaultSecret, SecretClient
+from azure.keyvault.secrets import KeyVaultSecret
 from azure.mgmt.compute.v2021_07_01 import ComputeManagementClient
 from azure.mgmt.compute.v2021_07_01.models import (
     ResourceSkuCapabilities,
@@ -58,8 +61,7 @@ from azure.mgmt.storage.v2021_08_01.models import (
     StorageAccountKey,
     StorageAccountListKeysResult,
 )
-from azure.storage.blob import BlobClient, BlobServiceClient
-from azure.storage.filedatalake import DataLakeServiceClient
+from azure.storage.blob import BlobClient, BlobServiceClient, ContainerClient
 
 from data_safe_haven.exceptions import (
     DataSafeHavenAzureAPIAuthenticationError,
@@ -72,6 +74,7 @@ from data_safe_haven.types import AzureSdkCredentialScope
 
 from .credentials import AzureSdkCredential
 from .graph_api import GraphApi
+from .secret_cache import KeyVaultSecretCache
 
 
 class AzureSdk:
@@ -130,6 +133,28 @@ class AzureSdk:
             msg = f"Could not load blob client for storage account '{storage_account_name}'."
             raise DataSafeHavenAzureStorageError(msg) from exc
 
+    def blob_container_client(
+        self,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> ContainerClient:
+        """Construct a client for a blob container, for operations on many blobs
+
+        Raises:
+            DataSafeHavenAzureStorageError if the client could not be loaded
+        """
+        blob_service_client = self.blob_service_client(
+            resource_group_name, storage_account_name
+        )
+        container_client = blob_service_client.get_container_client(
+            storage_container_name
+        )
+        if not isinstance(container_client, ContainerClient):
+            msg = f"Could not load container client for '{storage_container_name}' in '{storage_account_name}'."
+            raise DataSafeHavenAzureStorageError(msg)
+        return container_client
+
     def blob_exists(
         self,
         blob_name: str,
@@ -162,6 +187,75 @@ class AzureSdk:
         )
         return exists
 
+    @contextmanager
+    def blob_lease(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+        *,
+        lease_duration: float = 60,
+        timeout: int = 300,
+    ) -> Iterator[None]:
+        """Hold an exclusive lease on a blob, waiting for any other holder to finish
+
+        The blob is created if it does not exist. Leases are short so that a crashed
+        holder cannot block others for long, and are renewed in the background for as
+        long as they are held.
+
+        Raises:
+            DataSafeHavenAzureError if the lease could not be acquired
+        """
+        try:
+            blob_client = self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            with suppress(ResourceExistsError):
+                blob_client.upload_blob(b"", overwrite=False)
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    lease = blob_client.acquire_lease(
+                        lease_duration=int(lease_duration)
+                    )
+                    break
+                except HttpResponseError as exc:
+                    # 409 Conflict means that another process holds the lease
+                    lease_held = exc.status_code == 409  # noqa: PLR2004
+                    if not lease_held or time.monotonic() > deadline:
+                        raise
+                    self.logger.debug(
+                        f"Waiting for lease on blob [green]{blob_name}[/]."
+                    )
+                    time.sleep(2)
+        except (AzureError, DataSafeHavenAzureStorageError) as exc:
+            msg = f"Could not acquire a lease on blob '{blob_name}' in '{storage_account_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+        released = threading.Event()
+
+        def renew() -> None:
+            while not released.wait(lease_duration / 3):
+                try:
+                    lease.renew()
+                except AzureError as exc:
+                    self.logger.warning(
+                        f"Could not renew lease on blob [green]{blob_name}[/]: {exc}"
+                    )
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            released.set()
+            renewer.join()
+            with suppress(AzureError):
+                lease.release()
+
     def blob_service_client(
         self,
         resource_group_name: str,
@@ -208,11 +302,40 @@ class AzureSdk:
         storage_account_name: str,
         storage_container_name: str,
     ) -> str:
-        """Download a blob file from Azure storage
+        """Download a UTF-8 encoded blob file from Azure storage
 
         Returns:
             str: The contents of the blob
 
+        Raises:
+            DataSafeHavenAzureError if the blob could not be downloaded
+        """
+        blob_content = self.download_blob_bytes(
+            blob_name,
+            resource_group_name,
+            storage_account_name,
+            storage_container_name,
+        )
+        try:
+            return blob_content.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            msg = f"Blob file '{blob_name}' in '{storage_account_name}' is not valid UTF-8."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    def download_blob_bytes(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+        *,
+        max_concurrency: int = 1,
+    ) -> bytes:
+        """Download a blob file from Azure storage without decoding it
+
+        Returns:
+            bytes: The contents of the blob
+
         Raises:
             DataSafeHavenAzureError if the blob could not be downloaded
         """
@@ -225,11 +348,13 @@ class AzureSdk:
                 blob_name,
             )
             # Download the requested file
-            blob_content = blob_client.download_blob(encoding="utf-8").readall()
+            blob_content = blob_client.download_blob(
+                max_concurrency=max_concurrency
+            ).readall()
             self.logger.debug(
                 f"Downloaded file [green]{blob_name}[/] from blob storage.",
             )
-            return str(blob_content)
+            return bytes(blob_content)
         except (AzureError, DataSafeHavenAzureStorageError) as exc:
             msg = f"Blob file '{blob_name}' could not be downloaded from '{storage_account_name}'."
             raise DataSafeHavenAzureError(msg) from exc
@@ -635,6 +760,33 @@ class AzureSdk:
             msg = f"Failed to create storage container '{container_name}'."
             raise DataSafeHavenAzureStorageError(msg) from exc
 
+    def get_blob_etag(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> str:
+        """Read the ETag of a blob file in Azure storage without downloading it
+
+        Returns:
+            str: The ETag, which changes whenever the blob is modified
+
+        Raises:
+            DataSafeHavenAzureError if the blob properties could not be read
+        """
+        try:
+            blob_client = self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            return str(blob_client.get_blob_properties().etag)
+        except (AzureError, DataSafeHavenAzureStorageError) as exc:
+            msg = f"Could not read properties of blob file '{blob_name}' in '{storage_account_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+
     def get_keyvault_certificate(
         self, certificate_name: str, key_vault_name: str
     ) -> KeyVaultCertificate:
@@ -682,22 +834,25 @@ class AzureSdk:
     def get_keyvault_secret(self, key_vault_name: str, secret_name: str) -> str:
         """Read a secret from the KeyVault
 
+        Secrets are cached in memory for a short time, so repeated reads of the same
+        secret within a process only make one request.
+
         Returns:
             str: The secret value
 
         Raises:
             DataSafeHavenAzureError if the secret could not be read
         """
-        # Connect to Azure clients
-        secret_client = SecretClient(
-            credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-            vault_url=f"https://{key_vault_name}.vault.azure.net",
+        if cached := KeyVaultSecretCache.get(key_vault_name, secret_name):
+            return cached.value
+        secret_client = KeyVaultSecretCache.client(
+            key_vault_name, self.credential(AzureSdkCredentialScope.KEY_VAULT)
         )
         # Get secret if it exists
         try:
             secret = secret_client.get_secret(secret_name)
-            if secret.value:
-                return str(secret.value)
+            if cached := KeyVaultSecretCache.set(key_vault_name, secret):
+                return cached.value
             msg = f"Secret {secret_name} has no value."
             raise DataSafeHavenAzureError(msg)
         except AzureError as exc:
@@ -940,6 +1095,7 @@ class AzureSdk:
                 ):
                     msg = f"Key Vault '{key_vault_name}' exists in deleted state."
                     raise AzureError(msg)
+            KeyVaultSecretCache.invalidate(key_vault_name)
             self.logger.info(f"Purged Key Vault [green]{key_vault_name}[/].")
             return True
         except AzureError as exc:
@@ -1079,6 +1235,9 @@ class AzureSdk:
                 f"Removing certificate [green]{certificate_name}[/] from Key Vault [green]{key_vault_name}[/]...",
             )
 
+            # The secret backing this certificate will be removed too
+            KeyVaultSecretCache.invalidate(key_vault_name, certificate_name)
+
             # Start by attempting to delete
             # This might fail if the certificate does not exist or was already deleted
             self.logger.debug(
@@ -1150,16 +1309,9 @@ class AzureSdk:
             )
             while not poller.done():
                 poller.wait(10)
-            # Cast to correct spurious type hint in Azure libraries
-            resource_groups = [
-                rg
-                for rg in cast(
-                    list[ResourceGroup], resource_client.resource_groups.list()
-                )
-                if rg.name == resource_group_name
-            ]
-            if resource_groups:
-                msg = f"There are still {len(resource_groups)} resource group(s) remaining."
+            # Confirm the deletion without listing every resource group
+            if resource_client.resource_groups.check_existence(resource_group_name):
+                msg = f"Resource group '{resource_group_name}' still exists."
                 raise DataSafeHavenAzureError(msg)
             self.logger.info(
                 f"Ensured that resource group [green]{resource_group_name}[/] does not exist.",
@@ -1174,6 +1326,8 @@ class AzureSdk:
         script: str,
         script_parameters: dict[str, str],
         vm_name: str,
+        *,
+        timeout: float | None = None,
     ) -> str:
         """Run a script on a remote virtual machine
 
@@ -1181,7 +1335,7 @@ class AzureSdk:
             str: The script output
 
         Raises:
-            DataSafeHavenAzureError if running the script failed
+            DataSafeHavenAzureError if running the script failed or timed out
         """
         try:
             # Connect to Azure clients
@@ -1212,6 +1366,10 @@ class AzureSdk:
             poller = compute_client.virtual_machines.begin_run_command(
                 resource_group_name, vm_name, run_command_parameters
             )
+            poller.wait(timeout)
+            if not poller.done():
+                msg = f"Command on '{vm_name}' did not finish within {timeout} seconds."
+                raise DataSafeHavenAzureError(msg)
             # Cast to correct spurious type hint in Azure libraries
             result = cast(RunCommandResult, poller.result())
             # Return any stdout/stderr from the command
@@ -1226,81 +1384,46 @@ class AzureSdk:
         script: str,
         script_parameters: dict[str, str],
         vm_name: str,
+        *,
+        timeout: float | None = None,
     ) -> str:
         """Run a script on a remote virtual machine waiting for other scripts to complete
 
+        Only one command can run on a VM at a time, so conflicting requests are
+        retried with jittered exponential backoff. Any timeout applies to the whole
+        operation, including time spent waiting for other commands.
+
         Returns:
             str: The script output
 
         Raises:
-            DataSafeHavenAzureError if running the script failed
+            DataSafeHavenAzureError if running the script failed or timed out
         """
+        deadline = time.monotonic() + timeout if timeout else None
+        delay = 5.0
         while True:
             try:
-                script_output = self.run_remote_script(
+                return self.run_remote_script(
                     resource_group_name=resource_group_name,
                     script=script,
                     script_parameters=script_parameters,
                     vm_name=vm_name,
+                    timeout=max(deadline - time.monotonic(), 0) if deadline else None,
                 )
-                break
-            except AzureError as exc:
+            except DataSafeHavenAzureError as exc:
                 if all(
-                    reason not in str(exc)
+                    reason not in str(exc.__cause__)
                     for reason in (
                         "The request failed due to conflict with a concurrent request",
                         "Run command extension execution is in progress",
                     )
                 ):
                     raise
-                time.sleep(5)
-        return script_output
-
-    def set_blob_container_acl(
-        self,
-        container_name: str,
-        desired_acl: str,
-        resource_group_name: str,
-        storage_account_name: str,
-    ) -> None:
-        """Set the ACL for a blob container
-
-        Raises:
-            DataSafeHavenAzureError if the ACL could not be set
-        """
-        try:
-            # Ensure that storage container exists in the storage account
-            storage_client = StorageManagementClient(
-                self.credential(), self.subscription_id
-            )
-            try:
-                container = storage_client.blob_containers.get(
-                    resource_group_name, storage_account_name, container_name
-                )
-                if container.name != container_name:
-                    msg = f"Container '{container_name}' could not be found."
-                    raise HttpResponseError(msg)
-            except HttpResponseError:
-                self.logger.warning(
-                    f"Blob container '[green]{container_name}[/]' could not be found"
-                    f" in storage account '[green]{storage_account_name}[/]'."
-                )
-                return
-
-            # Connect to Azure clients
-            service_client = DataLakeServiceClient(
-                account_url=f"https://{storage_account_name}.dfs.core.windows.net",
-                credential=self.credential(),
-            )
-            file_system_client = service_client.get_file_system_client(
-                file_system=container_name
-            )
-            directory_client = file_system_client._get_root_directory_client()
-            # Set the desired ACL
-            directory_client.set_access_control_recursive(acl=desired_acl)
-        except AzureError as exc:
-            msg = f"Failed to set ACL '{desired_acl}' on container '{container_name}'."
-            raise DataSafeHavenAzureError(msg) from exc
+                if deadline and time.monotonic() + delay > deadline:
+                    msg = f"Command on '{vm_name}' did not start within {timeout} seconds."
+                    raise DataSafeHavenAzureError(msg) from exc
+                time.sleep(delay * random.uniform(0.5, 1.5))  # noqa: S311
+                delay = min(delay * 2, 60)
 
     def set_keyvault_secret(
         self,
@@ -1318,14 +1441,14 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            secret_client = SecretClient(
-                credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-                vault_url=f"https://{key_vault_name}.vault.azure.net",
+            secret_client = KeyVaultSecretCache.client(
+                key_vault_name, self.credential(AzureSdkCredentialScope.KEY_VAULT)
             )
 
             # Set secret to given value
             self.logger.debug(f"Setting secret [green]{secret_name}[/]...")
             secret = secret_client.set_secret(secret_name, secret_value)
+            KeyVaultSecretCache.set(key_vault_name, secret)
             self.logger.info(f"Set secret [green]{secret_name}[/].")
             return secret
         except AzureError as exc:
@@ -1352,14 +1475,22 @@ class AzureSdk:
 
     def upload_blob(
         self,
-        blob_data: bytes | str,
+        blob_data: bytes | str | IO[bytes] | Iterable[bytes],
         blob_name: str,
         resource_group_name: str,
         storage_account_name: str,
         storage_container_name: str,
+        *,
+        length: int | None = None,
+        max_concurrency: int = 1,
     ) -> None:
         """Upload a file to Azure blob storage
 
+        Data can be given in memory, as a file-like object or as an iterator over
+        chunks. File-like objects and iterators are streamed, with up to
+        'max_concurrency' blocks being uploaded at once. Giving the 'length' of
+        streamed data lets it be uploaded in a single request if it is small.
+
         Returns:
             None
 
@@ -1375,7 +1506,12 @@ class AzureSdk:
                 blob_name,
             )
             # Upload the created file
-            blob_client.upload_blob(blob_data, overwrite=True)
+            blob_client.upload_blob(
+                blob_data,
+                length=length,
+                max_concurrency=max_concurrency,
+                overwrite=True,
+            )
             self.logger.debug(
                 f"Uploaded file [green]{blob_name}[/] to blob storage.",
             )
@@ -1,8 +1,11 @@
 """Classes related to Azure credentials"""
 
+import json
 from abc import abstractmethod
 from collections.abc import Sequence
 from datetime import UTC, datetime
+from os import getenv
+from pathlib import Path
 from typing import Any, ClassVar
 
 import jwt
@@ -22,6 +25,8 @@ from data_safe_haven.exceptions import DataSafeHavenAzureError, DataSafeHavenVal
 from data_safe_haven.logging import get_logger
 from data_safe_haven.types import AzureSdkCredentialScope
 
+from .token_cache import EncryptedTokenCache
+
 
 class DeferredCredential(TokenCredential):
     """A token credential that wraps and caches other credential classes."""
@@ -64,6 +69,21 @@ class DeferredCredential(TokenCredential):
     def get_credential(self) -> TokenCredential:
         """Get a credential provider from the child class."""
 
+    def get_persistent_token(
+        self, combined_scopes: str, validity_cutoff: float  # noqa: ARG002
+    ) -> AccessToken | None:
+        """Load a token persisted by a previous process, if the child class supports this."""
+        return None
+
+    def set_persistent_token(
+        self,
+        combined_scopes: str,  # noqa: ARG002
+        token: AccessToken,  # noqa: ARG002
+        validity_cutoff: float,  # noqa: ARG002
+    ) -> None:
+        """Persist a token for use by later processes, if the child class supports this."""
+        return None
+
     def confirm_credentials_interactive(
         self,
         target_name: str,
@@ -105,10 +125,13 @@ class DeferredCredential(TokenCredential):
         if not DeferredCredential.tokens_.get(combined_scopes, None) or (
             DeferredCredential.tokens_[combined_scopes].expires_on < validity_cutoff
         ):
-            # Generate a new token and store it at class-level token
-            DeferredCredential.tokens_[combined_scopes] = (
-                self.get_credential().get_token(*scopes, **kwargs)
-            )
+            # Reuse a persisted token if possible, otherwise generate a new one
+            token = self.get_persistent_token(combined_scopes, validity_cutoff)
+            if not token:
+                token = self.get_credential().get_token(*scopes, **kwargs)
+                self.set_persistent_token(combined_scopes, token, validity_cutoff)
+            # Store the token at class-level
+            DeferredCredential.tokens_[combined_scopes] = token
         return DeferredCredential.tokens_[combined_scopes]
 
 
@@ -116,9 +139,12 @@ class AzureSdkCredential(DeferredCredential):
     """
     Credential loader used by AzureSdk
 
-    Uses AzureCliCredential for authentication
+    Uses AzureCliCredential for authentication. Tokens are persisted in an encrypted
+    cache so that later processes do not need to call the Azure CLI again.
     """
 
+    token_cache_: ClassVar[EncryptedTokenCache | None] = None
+
     def __init__(
         self,
         scope: AzureSdkCredentialScope = AzureSdkCredentialScope.DEFAULT,
@@ -127,19 +153,52 @@ class AzureSdkCredential(DeferredCredential):
     ) -> None:
         super().__init__(scopes=[scope.value], skip_confirmation=skip_confirmation)
 
+    @property
+    def token_cache(self) -> EncryptedTokenCache:
+        if not AzureSdkCredential.token_cache_:
+            AzureSdkCredential.token_cache_ = EncryptedTokenCache("azure-cli")
+        return AzureSdkCredential.token_cache_
+
+    @staticmethod
+    def azure_cli_account() -> tuple[str, str] | None:
+        """
+        Read the tenant ID and user name of the active Azure CLI account.
+
+        This reads the Azure CLI profile directly rather than running the Azure CLI.
+
+        Returns:
+            tuple[str, str] | None: tenant ID and user name, or None if there is no active account
+        """
+        azure_config_dir = Path(getenv("AZURE_CONFIG_DIR", Path.home() / ".azure"))
+        try:
+            with open(
+                azure_config_dir / "azureProfile.json", encoding="utf-8-sig"
+            ) as f_profile:
+                profile = json.load(f_profile)
+            subscription = next(
+                s for s in profile["subscriptions"] if s.get("isDefault", False)
+            )
+            return (str(subscription["tenantId"]), str(subscription["user"]["name"]))
+        except (OSError, ValueError, KeyError, TypeError, StopIteration):
+            return None
+
+    def confirm_token(self, auth_token: str) -> None:
+        """Allow user to confirm that the account that issued this token is correct."""
+        decoded = self.decode_token(auth_token)
+        self.confirm_credentials_interactive(
+            "Azure CLI",
+            user_name=decoded["name"],
+            user_id=decoded["oid"],
+            tenant_name=decoded["upn"].split("@")[1],
+            tenant_id=decoded["tid"],
+        )
+
     def get_credential(self) -> TokenCredential:
         """Get a new AzureCliCredential."""
         credential = AzureCliCredential(additionally_allowed_tenants=["*"])
         # Confirm that these are the desired credentials
         try:
-            decoded = self.decode_token(credential.get_token(*self.scopes).token)
-            self.confirm_credentials_interactive(
-                "Azure CLI",
-                user_name=decoded["name"],
-                user_id=decoded["oid"],
-                tenant_name=decoded["upn"].split("@")[1],
-                tenant_id=decoded["tid"],
-            )
+            self.confirm_token(credential.get_token(*self.scopes).token)
         except (CredentialUnavailableError, DataSafeHavenValueError) as exc:
             self.logger.error(
                 "Please authenticate with Azure: run '[green]az login[/]' using [bold]infrastructure administrator[/] credentials."
@@ -148,6 +207,43 @@ class AzureSdkCredential(DeferredCredential):
             raise DataSafeHavenAzureError(msg) from exc
         return credential
 
+    def get_persistent_token(
+        self, combined_scopes: str, validity_cutoff: float
+    ) -> AccessToken | None:
+        """Load a token for the active Azure CLI account from the encrypted cache."""
+        if not (account := self.azure_cli_account()):
+            return None
+        tenant_id, user_name = account
+        token = self.token_cache.get(
+            f"{tenant_id}|{user_name}|{combined_scopes}", validity_cutoff
+        )
+        if token:
+            try:
+                self.confirm_token(token.token)
+            except DataSafeHavenValueError as exc:
+                self.logger.error(
+                    "Please authenticate with Azure: run '[green]az login[/]' using [bold]infrastructure administrator[/] credentials."
+                )
+                msg = "Error getting account information from cached Azure CLI token."
+                raise DataSafeHavenAzureError(msg) from exc
+            self.logger.debug(
+                f"Loaded cached Azure CLI token for [green]{user_name}[/]."
+            )
+        return token
+
+    def set_persistent_token(
+        self, combined_scopes: str, token: AccessToken, validity_cutoff: float
+    ) -> None:
+        """Store a token for the active Azure CLI account in the encrypted cache."""
+        if token.expires_on < validity_cutoff:
+            return
+        if not (account := self.azure_cli_account()):
+            return
+        tenant_id, user_name = account
+        self.token_cache.set(
+            f"{tenant_id}|{user_name}|{combined_scopes}", token, validity_cutoff
+        )
+
 
 class GraphApiCredential(DeferredCredential):
     """
@@ -458,6 +458,18 @@ class GraphApi:
             msg = f"Could not delete application '{application_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def get_application_by_id(self, object_id: str) -> dict[str, Any] | None:
+        """Get a single application from its object ID, without listing all applications"""
+        try:
+            return dict(
+                self.http_get_single_page(
+                    f"{self.base_endpoint}/applications/{object_id}",
+                    params={"$select": "appId,displayName,id"},
+                ).json()
+            )
+        except DataSafeHavenMicrosoftGraphError:
+            return None
+
     def get_application_by_name(self, application_name: str) -> dict[str, Any] | None:
         try:
             return next(
@@ -861,6 +873,28 @@ class GraphApi:
             msg = "Could not load list of application permissions."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def read_application_role_assignments(
+        self, application_id: str
+    ) -> Sequence[dict[str, Any]]:
+        """Get list of application roles assigned to the service principal of an application
+
+        Returns:
+            JSON: A JSON list of application role assignments
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if role assignments could not be loaded
+        """
+        try:
+            return [
+                dict(obj)
+                for obj in self.http_get(
+                    f"{self.base_endpoint}/servicePrincipals(appId='{application_id}')/appRoleAssignments",
+                ).json()["value"]
+            ]
+        except Exception as exc:
+            msg = "Could not load list of application role assignments."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
     def read_domains(self) -> Sequence[dict[str, Any]]:
         """Get details of Entra domains
 
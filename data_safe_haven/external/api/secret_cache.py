@@ -0,0 +1,84 @@
+"""In-memory cache of Key Vault secrets"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import ClassVar
+
+from azure.core.credentials import TokenCredential
+from azure.keyvault.secrets import KeyVaultSecret, SecretClient
+
+
+@dataclass(frozen=True)
+class CachedSecret:
+    """A single version of a secret and the time at which it stops being valid"""
+
+    expires_on: float
+    value: str
+    version: str | None
+
+
+class KeyVaultSecretCache:
+    """
+    An in-memory cache of Key Vault secrets which is shared within a process.
+
+    One SecretClient is kept for each Key Vault so that connections are reused. Secret
+    values are held for a short time so that several commands or objects reading the
+    same secret only make one request. Values are never written to disk.
+    """
+
+    clients_: ClassVar[dict[str, SecretClient]] = {}
+    lock_: ClassVar[threading.Lock] = threading.Lock()
+    secrets_: ClassVar[dict[tuple[str, str], CachedSecret]] = {}
+    ttl: ClassVar[float] = 300
+
+    @classmethod
+    def clear(cls) -> None:
+        """Remove all cached secrets and clients."""
+        with cls.lock_:
+            cls.clients_.clear()
+            cls.secrets_.clear()
+
+    @classmethod
+    def client(cls, key_vault_name: str, credential: TokenCredential) -> SecretClient:
+        """Get the shared SecretClient for a Key Vault, creating it if necessary."""
+        with cls.lock_:
+            if key_vault_name not in cls.clients_:
+                cls.clients_[key_vault_name] = SecretClient(
+                    credential=credential,
+                    vault_url=f"https://{key_vault_name}.vault.azure.net",
+                )
+            return cls.clients_[key_vault_name]
+
+    @classmethod
+    def get(cls, key_vault_name: str, secret_name: str) -> CachedSecret | None:
+        """Get a cached secret if it is still valid."""
+        with cls.lock_:
+            secret = cls.secrets_.get((key_vault_name, secret_name))
+        if secret and secret.expires_on > time.monotonic():
+            return secret
+        return None
+
+    @classmethod
+    def invalidate(cls, key_vault_name: str, secret_name: str | None = None) -> None:
+        """Remove one cached secret, or all cached secrets for a Key Vault."""
+        with cls.lock_:
+            for key in list(cls.secrets_):
+                if key[0] == key_vault_name and secret_name in (None, key[1]):
+                    del cls.secrets_[key]
+            if secret_name is None:
+                cls.clients_.pop(key_vault_name, None)
+
+    @classmethod
+    def set(cls, key_vault_name: str, secret: KeyVaultSecret) -> CachedSecret | None:
+        """Cache a secret returned by Key Vault, ignoring secrets without a value."""
+        if not (secret.name and secret.value):
+            return None
+        cached = CachedSecret(
+            expires_on=time.monotonic() + cls.ttl,
+            value=str(secret.value),
+            version=secret.properties.version,
+        )
+        with cls.lock_:
+            cls.secrets_[(key_vault_name, secret.name)] = cached
+        return cached
@@ -0,0 +1,80 @@
+"""Encrypted on-disk cache of access tokens"""
+
+import json
+import os
+from contextlib import suppress
+from pathlib import Path
+
+from azure.core.credentials import AccessToken
+from cryptography.fernet import Fernet, InvalidToken
+
+from data_safe_haven.directories import config_dir
+
+
+class EncryptedTokenCache:
+    """
+    An encrypted on-disk cache of access tokens which is shared between processes.
+
+    Tokens are stored in a single Fernet-encrypted file in the config directory. The
+    encryption key is kept in a separate file which only the current user can read.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.cache_path = config_dir() / f".token-cache-{name}"
+        self.key_path = config_dir() / ".token-cache-key"
+        self.fernet_: Fernet | None = None
+
+    @property
+    def fernet(self) -> Fernet:
+        """Load the encryption key, creating it if it does not exist."""
+        if not self.fernet_:
+            if not self.key_path.is_file():
+                self.key_path.parent.mkdir(parents=True, exist_ok=True)
+                # Another process may create the key first, in which case we use that
+                with suppress(FileExistsError):
+                    fd = os.open(
+                        self.key_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600
+                    )
+                    with os.fdopen(fd, "wb") as f_key:
+                        f_key.write(Fernet.generate_key())
+            self.fernet_ = Fernet(self.key_path.read_bytes())
+        return self.fernet_
+
+    def clear(self) -> None:
+        """Remove all cached tokens."""
+        self.cache_path.unlink(missing_ok=True)
+
+    def get(self, key: str, validity_cutoff: float) -> AccessToken | None:
+        """Get a cached token that remains valid beyond the cutoff timestamp."""
+        entry = self.read().get(key)
+        if entry and int(entry["expires_on"]) >= validity_cutoff:
+            return AccessToken(str(entry["token"]), int(entry["expires_on"]))
+        return None
+
+    def read(self) -> dict[str, dict[str, str | int]]:
+        """Read all cached tokens, ignoring any cache that cannot be decrypted."""
+        try:
+            entries = json.loads(self.fernet.decrypt(self.cache_path.read_bytes()))
+            return entries if isinstance(entries, dict) else {}
+        except (InvalidToken, OSError, ValueError):
+            return {}
+
+    def set(self, key: str, token: AccessToken, validity_cutoff: float) -> None:
+        """Store a token, dropping any entries that are no longer valid."""
+        entries = {
+            name: entry
+            for name, entry in self.read().items()
+            if int(entry["expires_on"]) >= validity_cutoff
+        }
+        entries[key] = {"token": token.token, "expires_on": token.expires_on}
+        self.write(entries)
+
+    def write(self, entries: dict[str, dict[str, str | int]]) -> None:
+        """Atomically replace the cache contents."""
+        with suppress(OSError):
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = Path(f"{self.cache_path}.{os.getpid()}")
+            fd = os.open(temporary_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+            with os.fdopen(fd, "wb") as f_cache:
+                f_cache.write(self.fernet.encrypt(json.dumps(entries).encode()))
+            temporary_path.replace(self.cache_path)
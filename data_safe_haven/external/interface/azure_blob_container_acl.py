@@ -0,0 +1,301 @@
+import json
+import pathlib
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from azure.core.exceptions import AzureError, HttpResponseError
+from azure.mgmt.storage.v2021_08_01 import StorageManagementClient
+from azure.storage.filedatalake import (
+    AccessControlChanges,
+    DataLakeServiceClient,
+    FileSystemClient,
+)
+
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.logging import get_logger, get_null_logger
+
+
+@dataclass
+class AclCounters:
+    """Numbers of paths processed by a recursive ACL change"""
+
+    directories: int = 0
+    files: int = 0
+    failures: int = 0
+
+
+class AclCheckpoint:
+    """
+    Progress of a recursive ACL change, saved after every chunk of batches
+
+    For each top-level path this records either a continuation token or that the
+    path is complete. A checkpoint for a different ACL is discarded.
+    """
+
+    def __init__(self, path: pathlib.Path | None, desired_acl: str) -> None:
+        self._lock = threading.Lock()
+        self.desired_acl = desired_acl
+        self.path = path
+        self.paths: dict[str, str | bool] = {}
+        if path and path.exists():
+            try:
+                checkpoint = json.loads(path.read_text(encoding="utf-8"))
+                if checkpoint.get("acl") == desired_acl:
+                    self.paths = dict(checkpoint.get("paths", {}))
+            except (OSError, ValueError):
+                pass
+
+    def complete(self, path: str) -> bool:
+        return self.paths.get(path) is True
+
+    def remove(self) -> None:
+        if self.path:
+            self.path.unlink(missing_ok=True)
+
+    def token(self, path: str) -> str | None:
+        token = self.paths.get(path)
+        return token if isinstance(token, str) else None
+
+    def mark_complete(self, path: str) -> None:
+        self.save(path, value=True)
+
+    def save(self, path: str, *, value: str | bool) -> None:
+        with self._lock:
+            self.paths[path] = value
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                partial_path = self.path.with_suffix(".partial")
+                partial_path.write_text(
+                    json.dumps({"acl": self.desired_acl, "paths": self.paths}),
+                    encoding="utf-8",
+                )
+                partial_path.replace(self.path)
+
+
+class AzureBlobContainerAcl:
+    """
+    Interface for POSIX ACLs on blob containers with a hierarchical namespace
+
+    Applying an ACL to a container holding millions of paths takes a long time, so
+    the work is split up. Each top-level directory is processed by a separate
+    worker, in chunks of 'max_batches' batches of 'batch_size' paths. The
+    continuation token after each chunk is saved to an optional checkpoint file so
+    that an interrupted change can be resumed. The root directory is changed last,
+    so its ACL shows whether the whole container has been changed.
+    """
+
+    def __init__(
+        self,
+        container_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        subscription_name: str,
+        *,
+        batch_size: int = 2000,
+        disable_logging: bool = False,
+        max_batches: int = 50,
+        max_workers: int = 4,
+    ) -> None:
+        self.azure_sdk = AzureSdk(subscription_name, disable_logging=disable_logging)
+        self.batch_size = batch_size
+        self.container_name = container_name
+        self.logger = get_null_logger() if disable_logging else get_logger()
+        self.max_batches = max_batches
+        self.max_workers = max_workers
+        self.resource_group_name = resource_group_name
+        self.storage_account_name = storage_account_name
+        self._counters = AclCounters()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def acl_entries(acl: str) -> set[str]:
+        """Entries of an ACL, ignoring the masks which Azure adds automatically"""
+        return {
+            entry.strip()
+            for entry in acl.split(",")
+            if entry.strip()
+            and not entry.strip().startswith(("mask:", "default:mask:"))
+        }
+
+    @staticmethod
+    def file_acl(acl: str) -> str:
+        """Files cannot have default ACL entries"""
+        return ",".join(
+            entry for entry in acl.split(",") if not entry.startswith("default:")
+        )
+
+    @property
+    def file_system_client(self) -> FileSystemClient:
+        service_client = DataLakeServiceClient(
+            account_url=f"https://{self.storage_account_name}.dfs.core.windows.net",
+            credential=self.azure_sdk.credential(),
+        )
+        return service_client.get_file_system_client(file_system=self.container_name)
+
+    def container_exists(self) -> bool:
+        storage_client = StorageManagementClient(
+            self.azure_sdk.credential(), self.azure_sdk.subscription_id
+        )
+        try:
+            container = storage_client.blob_containers.get(
+                self.resource_group_name,
+                self.storage_account_name,
+                self.container_name,
+            )
+            return bool(container.name == self.container_name)
+        except HttpResponseError:
+            return False
+
+    def get(self) -> str:
+        """
+        Get the ACL of the root directory of the container
+
+        Raises:
+            DataSafeHavenAzureError if the ACL could not be read
+        """
+        try:
+            root_client = self.file_system_client._get_root_directory_client()
+            return str(root_client.get_access_control()["acl"])
+        except (AzureError, KeyError) as exc:
+            msg = f"Failed to get ACL on container '{self.container_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    def matches(self, desired_acl: str) -> bool:
+        """Whether the root directory of the container has the desired ACL"""
+        return self.acl_entries(self.get()) == self.acl_entries(desired_acl)
+
+    def set(
+        self,
+        desired_acl: str,
+        *,
+        checkpoint_path: pathlib.Path | None = None,
+        progress: Callable[[AclCounters], None] | None = None,
+    ) -> AclCounters:
+        """
+        Set an ACL on every path in the container
+
+        Returns:
+            AclCounters: the numbers of directories and files that were changed
+
+        Raises:
+            DataSafeHavenAzureError if the ACL could not be set on every path
+        """
+        if not self.container_exists():
+            self.logger.warning(
+                f"Blob container '[green]{self.container_name}[/]' could not be found"
+                f" in storage account '[green]{self.storage_account_name}[/]'."
+            )
+            return AclCounters()
+        self._counters = AclCounters()
+        checkpoint = AclCheckpoint(checkpoint_path, desired_acl)
+        try:
+            file_system_client = self.file_system_client
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.set_directory if path.is_directory else self.set_file,
+                        file_system_client,
+                        path.name,
+                        desired_acl,
+                        checkpoint,
+                        progress,
+                    )
+                    for path in file_system_client.get_paths(recursive=False)
+                    if not checkpoint.complete(path.name)
+                ]
+                for future in futures:
+                    future.result()
+            # Set the root last, so that it only has the new ACL once all paths do
+            if not self._counters.failures:
+                file_system_client._get_root_directory_client().set_access_control(
+                    acl=desired_acl
+                )
+        except AzureError as exc:
+            msg = f"Failed to set ACL '{desired_acl}' on container '{self.container_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+        if self._counters.failures:
+            msg = f"Failed to set ACL '{desired_acl}' on {self._counters.failures} paths in container '{self.container_name}'."
+            raise DataSafeHavenAzureError(msg)
+        checkpoint.remove()
+        self.logger.info(
+            f"Set ACL on {self._counters.directories} directories and"
+            f" {self._counters.files} files in container '[green]{self.container_name}[/]'."
+        )
+        return self._counters
+
+    def count(
+        self,
+        progress: Callable[[AclCounters], None] | None,
+        *,
+        directories: int = 0,
+        files: int = 0,
+        failures: int = 0,
+    ) -> None:
+        with self._lock:
+            self._counters.directories += directories
+            self._counters.files += files
+            self._counters.failures += failures
+            counters = AclCounters(**vars(self._counters))
+        if progress:
+            progress(counters)
+
+    def set_directory(
+        self,
+        file_system_client: FileSystemClient,
+        path: str,
+        acl: str,
+        checkpoint: AclCheckpoint,
+        progress: Callable[[AclCounters], None] | None,
+    ) -> None:
+        """Set an ACL on a top-level directory and everything below it, chunk by chunk"""
+
+        def progress_hook(changes: AccessControlChanges) -> None:
+            self.count(
+                progress,
+                directories=changes.batch_counters.directories_successful,
+                files=changes.batch_counters.files_successful,
+                failures=changes.batch_counters.failure_count,
+            )
+
+        path_client = file_system_client.get_directory_client(path)
+        token = checkpoint.token(path)
+        while True:
+            kwargs: dict[str, Any] = {
+                "batch_size": self.batch_size,
+                "max_batches": self.max_batches,
+                "progress_hook": progress_hook,
+            }
+            if token:
+                kwargs["continuation_token"] = token
+            try:
+                result = path_client.set_access_control_recursive(acl=acl, **kwargs)
+            except AzureError as exc:
+                # Keep the token for the last successful batch, so a retry can resume
+                if token := getattr(exc, "continuation_token", None):
+                    checkpoint.save(path, value=token)
+                raise
+            token = result.continuation
+            if result.counters.failure_count or not token:
+                break
+            checkpoint.save(path, value=token)
+        if not result.counters.failure_count:
+            checkpoint.mark_complete(path)
+
+    def set_file(
+        self,
+        file_system_client: FileSystemClient,
+        path: str,
+        acl: str,
+        checkpoint: AclCheckpoint,
+        progress: Callable[[AclCounters], None] | None,
+    ) -> None:
+        """Set an ACL on a top-level file"""
+        file_system_client.get_file_client(path).set_access_control(
+            acl=self.file_acl(acl)
+        )
+        checkpoint.mark_complete(path)
+        self.count(progress, files=1)
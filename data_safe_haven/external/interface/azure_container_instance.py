@@ -1,13 +1,19 @@
 import contextlib
+import pathlib
+import threading
 import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import websocket
+from azure.core.exceptions import AzureError
 from azure.core.polling import LROPoller
 from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 from azure.mgmt.containerinstance.models import (
     ContainerExecRequest,
     ContainerExecRequestTerminalSize,
 )
+from rich.markup import escape
 
 from data_safe_haven.exceptions import DataSafeHavenAzureError
 from data_safe_haven.external import AzureSdk
@@ -89,37 +95,186 @@ class AzureContainerInstance:
             msg = f"Could not restart container group {self.container_group_name}."
             raise DataSafeHavenAzureError(msg) from exc
 
-    def run_executable(self, container_name: str, executable_path: str) -> list[str]:
+    def pipe_executable(
+        self,
+        container_name: str,
+        executable_path: str,
+        *,
+        cancel: threading.Event | None = None,
+        output_path: pathlib.Path | None = None,
+        timeout: float | None = None,
+    ) -> int:
+        """
+        Run a script or command on one of the containers, forwarding output as it arrives.
+
+        Each line of output is sent to the logger and, if an output path is provided,
+        appended to that file. No output is held in memory.
+
+        Returns:
+            int: The number of lines of output
+
+        Raises:
+            DataSafeHavenAzureError if the command could not be run or timed out
+        """
+        n_lines = 0
+        with contextlib.ExitStack() as stack:
+            output_file = (
+                stack.enter_context(open(output_path, "a", encoding="utf-8"))
+                if output_path
+                else None
+            )
+            for line in self.stream_executable(
+                container_name, executable_path, cancel=cancel, timeout=timeout
+            ):
+                self.logger.info(f"[bold]{container_name}[/]: {escape(line)}")
+                if output_file:
+                    output_file.write(f"{line}\n")
+                n_lines += 1
+        return n_lines
+
+    def run_executable(
+        self,
+        container_name: str,
+        executable_path: str,
+        *,
+        cancel: threading.Event | None = None,
+        terminal_size: tuple[int, int] = (80, 500),
+        timeout: float | None = None,
+    ) -> list[str]:
         """
         Run a script or command on one of the containers.
 
         It is possible to provide arguments to the command if needed.
         The most likely use-case is running a script already present in the container.
         """
-        # Connect to Azure clients
-        aci_client = ContainerInstanceManagementClient(
-            self.azure_sdk.credential(), self.azure_sdk.subscription_id
+        return list(
+            self.stream_executable(
+                container_name,
+                executable_path,
+                cancel=cancel,
+                terminal_size=terminal_size,
+                timeout=timeout,
+            )
         )
 
-        # Run command
-        cnxn = aci_client.containers.execute_command(
-            self.resource_group_name,
-            self.container_group_name,
-            container_name,
-            ContainerExecRequest(
-                command=executable_path,
-                terminal_size=ContainerExecRequestTerminalSize(cols=80, rows=500),
-            ),
-        )
+    def run_executable_parallel(
+        self,
+        container_names: Sequence[str],
+        executable_path: str,
+        *,
+        max_workers: int = 4,
+        timeout: float | None = None,
+    ) -> dict[str, list[str]]:
+        """
+        Run the same script or command on several containers concurrently.
+
+        If the command fails on any container, the remaining commands are cancelled.
 
-        # Get command output via websocket
-        socket = websocket.create_connection(cnxn.web_socket_uri)
-        if cnxn.password:
-            socket.send(cnxn.password)
-        output = []
-        with contextlib.suppress(websocket.WebSocketConnectionClosedException):
-            while result := socket.recv():
-                for line in [line.strip() for line in result.splitlines()]:
-                    output.append(line)
+        Returns:
+            dict[str, list[str]]: The output lines from each container
+
+        Raises:
+            DataSafeHavenAzureError if the command could not be run or timed out
+        """
+        cancel = threading.Event()
+        outputs: dict[str, list[str]] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.run_executable,
+                    container_name,
+                    executable_path,
+                    cancel=cancel,
+                    timeout=timeout,
+                ): container_name
+                for container_name in container_names
+            }
+            try:
+                for future in as_completed(futures):
+                    outputs[futures[future]] = future.result()
+            except BaseException:
+                # Stop commands which are running and discard any not yet started
+                cancel.set()
+                for future in futures:
+                    future.cancel()
+                raise
+        return {
+            container_name: outputs[container_name]
+            for container_name in container_names
+        }
+
+    def stream_executable(
+        self,
+        container_name: str,
+        executable_path: str,
+        *,
+        cancel: threading.Event | None = None,
+        terminal_size: tuple[int, int] = (80, 500),
+        timeout: float | None = None,
+    ) -> Iterator[str]:
+        """
+        Run a script or command on one of the containers, yielding output as it arrives.
+
+        Output is yielded one line at a time as websocket frames are received. Reading
+        stops early if the `cancel` event is set.
+
+        Raises:
+            DataSafeHavenAzureError if the command could not be run or timed out
+        """
+        try:
+            # Connect to Azure clients
+            aci_client = ContainerInstanceManagementClient(
+                self.azure_sdk.credential(), self.azure_sdk.subscription_id
+            )
+
+            # Run command
+            columns, rows = terminal_size
+            cnxn = aci_client.containers.execute_command(
+                self.resource_group_name,
+                self.container_group_name,
+                container_name,
+                ContainerExecRequest(
+                    command=executable_path,
+                    terminal_size=ContainerExecRequestTerminalSize(
+                        cols=columns, rows=rows
+                    ),
+                ),
+            )
+
+            # Connect to the command output websocket
+            # A short socket timeout lets us check for cancellation between frames
+            socket = websocket.create_connection(
+                cnxn.web_socket_uri, timeout=min(1, timeout) if timeout else 1
+            )
+            if cnxn.password:
+                socket.send(cnxn.password)
+        except (AzureError, websocket.WebSocketException, OSError) as exc:
+            msg = f"Could not run '{executable_path}' on container {container_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+        deadline = time.monotonic() + timeout if timeout else None
+        partial_line = ""
+        try:
+            while not (cancel and cancel.is_set()):
+                if deadline and time.monotonic() > deadline:
+                    msg = f"Running '{executable_path}' on container {container_name} timed out after {timeout} seconds."
+                    raise DataSafeHavenAzureError(msg)
+                try:
+                    frame = socket.recv()
+                except websocket.WebSocketTimeoutException:
+                    continue
+                except websocket.WebSocketConnectionClosedException:
+                    frame = ""
+                if not frame:
+                    if partial_line:
+                        yield partial_line.strip()
+                    break
+                if isinstance(frame, bytes):
+                    frame = frame.decode("utf-8", errors="replace")
+                # Frames are not guaranteed to end on a line boundary
+                lines = (partial_line + frame).splitlines(keepends=True)
+                partial_line = "" if lines[-1].endswith(("\n", "\r")) else lines.pop()
+                for line in lines:
+                    yield line.strip()
+        finally:
             socket.close()
-        return output
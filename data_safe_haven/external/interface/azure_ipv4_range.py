@@ -1,10 +1,66 @@
+import heapq
 import ipaddress
 import math
-from contextlib import suppress
+from collections.abc import Iterator
 
 from data_safe_haven.exceptions import DataSafeHavenIPRangeError
 
 
+class BuddyAllocator:
+    """
+    Allocate aligned power-of-two blocks from a power-of-two address space.
+
+    Free blocks are tracked in one min-heap per block size so that the free block with
+    the lowest offset is always found in O(log n). Freed blocks are merged with their
+    free buddy so that the free lists never fragment.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.max_order = int(math.log2(size))
+        self.free_heaps: list[list[int]] = [[] for _ in range(self.max_order + 1)]
+        self.free_sets: list[set[int]] = [set() for _ in range(self.max_order + 1)]
+        self.add_free(0, self.max_order)
+
+    def add_free(self, offset: int, order: int) -> None:
+        heapq.heappush(self.free_heaps[order], offset)
+        self.free_sets[order].add(offset)
+
+    def lowest_free(self, order: int) -> int | None:
+        """Lowest free offset of a given order, discarding stale heap entries."""
+        heap = self.free_heaps[order]
+        while heap and heap[0] not in self.free_sets[order]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def allocate(self, order: int) -> int | None:
+        """Allocate the lowest-addressed free block of size 2**order."""
+        candidates = [
+            (offset, block_order)
+            for block_order in range(order, self.max_order + 1)
+            if (offset := self.lowest_free(block_order)) is not None
+        ]
+        if not candidates:
+            return None
+        offset, block_order = min(candidates)
+        self.free_sets[block_order].remove(offset)
+        # Split the block, returning the upper halves to the free lists
+        while block_order > order:
+            block_order -= 1
+            self.add_free(offset + (1 << block_order), block_order)
+        return offset
+
+    def release(self, offset: int, order: int) -> None:
+        """Release a previously allocated block, merging it with any free buddy."""
+        while order < self.max_order:
+            buddy = offset ^ (1 << order)
+            if buddy not in self.free_sets[order]:
+                break
+            self.free_sets[order].remove(buddy)
+            offset = min(offset, buddy)
+            order += 1
+        self.add_free(offset, order)
+
+
 class AzureIPv4Range(ipaddress.IPv4Network):
     """Azure-aware IPv4 address range"""
 
@@ -23,7 +79,7 @@ class AzureIPv4Range(ipaddress.IPv4Network):
             msg = f"{ip_address_first}-{ip_address_last} cannot be expressed as a single network range."
             raise DataSafeHavenIPRangeError(msg)
         super().__init__(networks[0])
-        self._subnets: list[AzureIPv4Range] = []
+        self._allocator: BuddyAllocator | None = None
 
     @classmethod
     def from_cidr(cls, ip_cidr: str) -> "AzureIPv4Range":
@@ -34,26 +90,46 @@ class AzureIPv4Range(ipaddress.IPv4Network):
     def prefix(self) -> str:
         return str(self)
 
-    def all_ips(self) -> list[ipaddress.IPv4Address]:
-        """All IP addresses in the range"""
-        return list(self.hosts())
+    def all_ips(self) -> Iterator[ipaddress.IPv4Address]:
+        """All IP addresses in the range, generated lazily"""
+        return self.hosts()
+
+    def available(self, count: int | None = None) -> list[ipaddress.IPv4Address]:
+        """
+        IP addresses that can be assigned to resources, up to an optional count.
 
-    def available(self) -> list[ipaddress.IPv4Address]:
-        """Azure reserves x.x.x.1 for the default gateway and (x.x.x.2, x.x.x.3) to map Azure DNS IPs."""
-        return list(self.all_ips())[3:]
+        Azure reserves x.x.x.0 for the network, x.x.x.1 for the default gateway,
+        (x.x.x.2, x.x.x.3) to map Azure DNS IPs and the final address for broadcast.
+        """
+        ip_first = int(self.network_address) + 4
+        ip_last = int(self.broadcast_address) - 1
+        if count is not None:
+            ip_last = min(ip_last, ip_first + count - 1)
+        return [ipaddress.IPv4Address(ip) for ip in range(ip_first, ip_last + 1)]
 
     def next_subnet(self, number_of_addresses: int) -> "AzureIPv4Range":
-        """Find the next unused subnet of a given size"""
+        """Find the lowest unused subnet of a given size"""
         if not math.log2(number_of_addresses).is_integer():
             msg = f"Number of address '{number_of_addresses}' must be a power of 2"
             raise DataSafeHavenIPRangeError(msg)
-        ip_address_first = self[0]
-        while True:
-            ip_address_last = ip_address_first + int(number_of_addresses - 1)
-            with suppress(DataSafeHavenIPRangeError):
-                candidate = AzureIPv4Range(ip_address_first, ip_address_last)
-                if not any(subnet.overlaps(candidate) for subnet in self._subnets):
-                    self._subnets.append(candidate)
-                    break
-            ip_address_first = ip_address_first + number_of_addresses
-        return candidate
+        if not self._allocator:
+            self._allocator = BuddyAllocator(self.num_addresses)
+        order = int(math.log2(number_of_addresses))
+        offset = self._allocator.allocate(order)
+        if offset is None:
+            msg = f"No unused subnet with {number_of_addresses} addresses remains in {self}."
+            raise DataSafeHavenIPRangeError(msg)
+        ip_address_first = self.network_address + offset
+        return AzureIPv4Range(
+            ip_address_first, ip_address_first + (number_of_addresses - 1)
+        )
+
+    def release_subnet(self, subnet: "AzureIPv4Range") -> None:
+        """Return a subnet allocated with next_subnet so that it can be reused"""
+        if not self._allocator or not subnet.subnet_of(self):
+            msg = f"Subnet {subnet} was not allocated from {self}."
+            raise DataSafeHavenIPRangeError(msg)
+        self._allocator.release(
+            int(subnet.network_address) - int(self.network_address),
+            int(math.log2(subnet.num_addresses)),
+        )
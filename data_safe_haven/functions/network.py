@@ -1,28 +1,70 @@
 import ipaddress
+import threading
+import time
 from collections.abc import Sequence
+from os import getenv
 
 import requests
 
 from data_safe_haven.exceptions import DataSafeHavenValueError
 
+# Endpoints that return the caller's public IPv4 address as plain text
+IP_ADDRESS_RESOLVERS = (
+    "https://api.ipify.org",
+    "https://checkip.amazonaws.com",
+    "https://ipv4.icanhazip.com",
+)
 
-def current_ip_address() -> str:
+_ip_address_cache: dict[tuple[str, ...], tuple[str, float]] = {}
+_ip_address_lock = threading.Lock()
+
+
+def current_ip_address(
+    *,
+    resolvers: Sequence[str] = IP_ADDRESS_RESOLVERS,
+    timeout: float = 5,
+    ttl: float = 300,
+) -> str:
     """
     Get the IP address of the current device.
 
+    If the DSH_EGRESS_IP_ADDRESS environment variable is set (for example when
+    running behind a NAT with a known egress address) then this is used directly.
+    Otherwise each resolver is tried in turn until one returns a valid address.
+    Resolved addresses are shared across the process for `ttl` seconds.
+
     Returns:
         str: the IP address
 
     Raises:
         DataSafeHavenValueError: if the current IP address could not be determined
     """
-    try:
-        response = requests.get("https://api.ipify.org", timeout=300)
-        response.raise_for_status()
-        return response.content.decode("utf8")
-    except requests.RequestException as exc:
-        msg = "Could not determine IP address."
-        raise DataSafeHavenValueError(msg) from exc
+    if egress_ip_address := getenv("DSH_EGRESS_IP_ADDRESS"):
+        try:
+            return str(ipaddress.IPv4Address(egress_ip_address.strip()))
+        except ValueError as exc:
+            msg = f"DSH_EGRESS_IP_ADDRESS '{egress_ip_address}' is not a valid IPv4 address."
+            raise DataSafeHavenValueError(msg) from exc
+
+    cache_key = tuple(resolvers)
+    with _ip_address_lock:
+        if (cached := _ip_address_cache.get(cache_key)) and (
+            time.monotonic() < cached[1]
+        ):
+            return cached[0]
+        for resolver in resolvers:
+            try:
+                response = requests.get(resolver, timeout=timeout)
+                response.raise_for_status()
+                ip_address = str(
+                    ipaddress.IPv4Address(response.content.decode("utf8").strip())
+                )
+            except (requests.RequestException, UnicodeDecodeError, ValueError):
+                continue
+            _ip_address_cache[cache_key] = (ip_address, time.monotonic() + ttl)
+            return ip_address
+    msg = "Could not determine IP address."
+    raise DataSafeHavenValueError(msg)
 
 
 def ip_address_in_list(ip_address_list: Sequence[str]) -> bool:
@@ -1,7 +1,9 @@
 from .programs import ImperativeSHM
 from .project_manager import SREProjectManager
+from .pulumi_progress import PulumiProgress
 
 __all__ = [
     "ImperativeSHM",
+    "PulumiProgress",
     "SREProjectManager",
 ]
@@ -1,5 +1,11 @@
 from .dockerhub_credentials import DockerHubCredentials
-from .ip_ranges import SREDnsIpRanges, SREIpRanges
+from .ip_ranges import (
+    SREDnsIpRanges,
+    SREIpLayout,
+    SREIpRanges,
+    get_sre_ip_layout,
+    plan_sre_ip_layouts,
+)
 from .transformations import (
     get_address_prefixes_from_subnet,
     get_available_ips_from_subnet,
@@ -26,7 +32,10 @@ __all__ = [
     "get_name_from_rg",
     "get_name_from_subnet",
     "get_name_from_vnet",
+    "get_sre_ip_layout",
     "get_subscription_id_from_rg",
+    "plan_sre_ip_layouts",
     "SREDnsIpRanges",
+    "SREIpLayout",
     "SREIpRanges",
 ]
@@ -1,32 +1,122 @@
 """Calculate SRE IP address ranges for a given SRE index"""
 
+from collections.abc import Sequence
 from dataclasses import dataclass
+from functools import cache
+from itertools import pairwise
 
+from data_safe_haven.exceptions import DataSafeHavenIPRangeError
 from data_safe_haven.external import AzureIPv4Range
 
 
 @dataclass(frozen=True)
-class SREIpRanges:
+class SREIpLayout:
+    """IP address ranges for the subnets of a single SRE virtual network"""
+
+    vnet: AzureIPv4Range
+    application_gateway: AzureIPv4Range
+    apt_proxy_server: AzureIPv4Range
+    clamav_mirror: AzureIPv4Range
+    data_configuration: AzureIPv4Range
+    data_private: AzureIPv4Range
+    desired_state: AzureIPv4Range
+    firewall: AzureIPv4Range
+    firewall_management: AzureIPv4Range
+    guacamole_containers: AzureIPv4Range
+    guacamole_containers_support: AzureIPv4Range
+    identity_containers: AzureIPv4Range
+    monitoring: AzureIPv4Range
+    user_services_containers: AzureIPv4Range
+    user_services_containers_support: AzureIPv4Range
+    user_services_databases: AzureIPv4Range
+    user_services_software_repositories: AzureIPv4Range
+    workspaces: AzureIPv4Range
+
+    @classmethod
+    def from_vnet(cls, vnet_prefix: str) -> "SREIpLayout":
+        """
+        Allocate subnets inside a virtual network.
+
+        Subnets are allocated in the order given here, each at the lowest free
+        address, so the same prefix always produces the same layout.
+
+        Raises:
+            DataSafeHavenIPRangeError if the virtual network is too small
+        """
+        vnet = AzureIPv4Range.from_cidr(vnet_prefix)
+        return cls(
+            vnet=vnet,
+            application_gateway=vnet.next_subnet(256),
+            apt_proxy_server=vnet.next_subnet(8),
+            clamav_mirror=vnet.next_subnet(8),
+            data_configuration=vnet.next_subnet(8),
+            data_private=vnet.next_subnet(8),
+            desired_state=vnet.next_subnet(8),
+            firewall=vnet.next_subnet(64),  # 64 address minimum
+            firewall_management=vnet.next_subnet(64),  # 64 address minimum
+            guacamole_containers=vnet.next_subnet(8),
+            guacamole_containers_support=vnet.next_subnet(8),
+            identity_containers=vnet.next_subnet(8),
+            monitoring=vnet.next_subnet(32),
+            user_services_containers=vnet.next_subnet(8),
+            user_services_containers_support=vnet.next_subnet(8),
+            user_services_databases=vnet.next_subnet(8),
+            user_services_software_repositories=vnet.next_subnet(8),
+            workspaces=vnet.next_subnet(256),
+        )
+
+
+@cache
+def get_sre_ip_layout(vnet_prefix: str) -> SREIpLayout:
+    """Get the subnet layout for a virtual network, computing it once per prefix."""
+    return SREIpLayout.from_vnet(vnet_prefix)
+
+
+def plan_sre_ip_layouts(sres: Sequence[int | str]) -> list[SREIpLayout]:
+    """
+    Lay out the address space for several SREs in one pass.
+
+    Each SRE is given either as an index, which uses the virtual network
+    10.<index>.0.0/16, or as a custom virtual network prefix. Layouts are returned
+    in the same order as the input.
+
+    Raises:
+        DataSafeHavenIPRangeError if any virtual networks overlap or are too small
+    """
+    vnet_prefixes = []
+    for sre in sres:
+        if isinstance(sre, int):
+            if not 0 <= sre <= 255:  # noqa: PLR2004
+                msg = f"SRE index '{sre}' must be between 0 and 255."
+                raise DataSafeHavenIPRangeError(msg)
+            vnet_prefixes.append(f"10.{sre}.0.0/16")
+        else:
+            vnet_prefixes.append(str(AzureIPv4Range.from_cidr(sre)))
+    # After sorting, any overlap must be between neighbouring virtual networks
+    vnets = sorted(AzureIPv4Range.from_cidr(prefix) for prefix in vnet_prefixes)
+    for vnet, next_vnet in pairwise(vnets):
+        if vnet.overlaps(next_vnet):
+            msg = f"SRE virtual networks {vnet} and {next_vnet} overlap."
+            raise DataSafeHavenIPRangeError(msg)
+    return [get_sre_ip_layout(prefix) for prefix in vnet_prefixes]
+
+
+class LazyIpRanges(type):
+    """Metaclass which looks up class attributes in a layout computed on first use"""
+
+    vnet_prefix: str
+
+    def __getattr__(cls, name: str) -> AzureIPv4Range:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        ip_range: AzureIPv4Range = getattr(get_sre_ip_layout(cls.vnet_prefix), name)
+        return ip_range
+
+
+class SREIpRanges(metaclass=LazyIpRanges):
     """Calculate SRE IP address ranges for a given SRE index"""
 
-    vnet = AzureIPv4Range("10.0.0.0", "10.0.255.255")
-    application_gateway = vnet.next_subnet(256)
-    apt_proxy_server = vnet.next_subnet(8)
-    clamav_mirror = vnet.next_subnet(8)
-    data_configuration = vnet.next_subnet(8)
-    data_private = vnet.next_subnet(8)
-    desired_state = vnet.next_subnet(8)
-    firewall = vnet.next_subnet(64)  # 64 address minimum
-    firewall_management = vnet.next_subnet(64)  # 64 address minimum
-    guacamole_containers = vnet.next_subnet(8)
-    guacamole_containers_support = vnet.next_subnet(8)
-    identity_containers = vnet.next_subnet(8)
-    monitoring = vnet.next_subnet(32)
-    user_services_containers = vnet.next_subnet(8)
-    user_services_containers_support = vnet.next_subnet(8)
-    user_services_databases = vnet.next_subnet(8)
-    user_services_software_repositories = vnet.next_subnet(8)
-    workspaces = vnet.next_subnet(256)
+    vnet_prefix = "10.0.0.0/16"
 
 
 @dataclass(frozen=True)
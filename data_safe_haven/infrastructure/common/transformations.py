@@ -17,10 +17,14 @@ def get_address_prefixes_from_subnet(subnet: network.GetSubnetResult) -> list[st
     raise DataSafeHavenPulumiError(msg)
 
 
-def get_available_ips_from_subnet(subnet: network.GetSubnetResult) -> list[str]:
-    """Get list of available IP addresses from a subnet"""
+def get_available_ips_from_subnet(
+    subnet: network.GetSubnetResult, count: int | None = None
+) -> list[str]:
+    """Get list of available IP addresses from a subnet, up to an optional count"""
     if address_prefix := subnet.address_prefix:
-        return [str(ip) for ip in AzureIPv4Range.from_cidr(address_prefix).available()]
+        return [
+            str(ip) for ip in AzureIPv4Range.from_cidr(address_prefix).available(count)
+        ]
     return []
 
 
@@ -1,12 +1,16 @@
 """Pulumi dynamic component for setting ACLs on an Azure blob container."""
 
-from typing import Any
+import time
+from typing import Any, ClassVar
 
+import pulumi
 from pulumi import Input, Output, ResourceOptions
-from pulumi.dynamic import CreateResult, DiffResult, Resource
+from pulumi.dynamic import CreateResult, DiffResult, Resource, UpdateResult
 
-from data_safe_haven.exceptions import DataSafeHavenPulumiError
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.directories import config_dir
+from data_safe_haven.exceptions import DataSafeHavenError, DataSafeHavenPulumiError
+from data_safe_haven.external import AzureBlobContainerAcl
+from data_safe_haven.external.interface.azure_blob_container_acl import AclCounters
 
 from .dsh_resource_provider import DshResourceProvider
 
@@ -51,17 +55,53 @@ class BlobContainerAclProps:
 
 
 class BlobContainerAclProvider(DshResourceProvider):
+    default_acl: ClassVar[str] = "user::rwx,group::r-x,other::---"
+    progress_interval: ClassVar[int] = 60
+    # Changes to any other property can be applied without replacing the resource
+    replacement_props: ClassVar[tuple[str, ...]] = (
+        "container_name",
+        "resource_group_name",
+        "storage_account_name",
+    )
+
+    @staticmethod
+    def container_acl(props: dict[str, Any]) -> AzureBlobContainerAcl:
+        return AzureBlobContainerAcl(
+            container_name=props["container_name"],
+            disable_logging=True,
+            resource_group_name=props["resource_group_name"],
+            storage_account_name=props["storage_account_name"],
+            subscription_name=props["subscription_name"],
+        )
+
+    @classmethod
+    def set_acl(cls, props: dict[str, Any], desired_acl: str) -> None:
+        """Set an ACL recursively, resuming from any earlier interrupted attempt"""
+        checkpoint_path = (
+            config_dir()
+            / "acl_checkpoints"
+            / f"{props['storage_account_name']}-{props['container_name']}.json"
+        )
+        last_report = time.monotonic()
+
+        def progress(counters: AclCounters) -> None:
+            nonlocal last_report
+            if time.monotonic() - last_report > cls.progress_interval:
+                last_report = time.monotonic()
+                pulumi.log.info(
+                    f"Set ACL on {counters.directories} directories and"
+                    f" {counters.files} files in container '{props['container_name']}'."
+                )
+
+        cls.container_acl(props).set(
+            desired_acl, checkpoint_path=checkpoint_path, progress=progress
+        )
+
     def create(self, props: dict[str, Any]) -> CreateResult:
         """Set ACLs for a given blob container."""
         outs = dict(**props)
         try:
-            azure_sdk = AzureSdk(props["subscription_name"], disable_logging=True)
-            azure_sdk.set_blob_container_acl(
-                container_name=props["container_name"],
-                desired_acl=props["desired_acl"],
-                resource_group_name=props["resource_group_name"],
-                storage_account_name=props["storage_account_name"],
-            )
+            self.set_acl(props, props["desired_acl"])
         except Exception as exc:
             msg = f"Failed to set ACLs on storage account '{props['storage_account_name']}'."
             raise DataSafeHavenPulumiError(msg) from exc
@@ -75,13 +115,7 @@ class BlobContainerAclProvider(DshResourceProvider):
         # Use `id` as a no-op to avoid ARG002 while maintaining function signature
         id(id_)
         try:
-            azure_sdk = AzureSdk(props["subscription_name"], disable_logging=True)
-            azure_sdk.set_blob_container_acl(
-                container_name=props["container_name"],
-                desired_acl="user::rwx,group::r-x,other::---",
-                resource_group_name=props["resource_group_name"],
-                storage_account_name=props["storage_account_name"],
-            )
+            self.set_acl(props, self.default_acl)
         except Exception as exc:
             msg = f"Failed to delete custom ACLs on storage account '{props['storage_account_name']}'."
             raise DataSafeHavenPulumiError(msg) from exc
@@ -95,11 +129,41 @@ class BlobContainerAclProvider(DshResourceProvider):
         """Calculate diff between old and new state"""
         # Use `id` as a no-op to avoid ARG002 while maintaining function signature
         id(id_)
-        return self.partial_diff(old_props, new_props)
+        diff = self.partial_diff(old_props, new_props)
+        return DiffResult(
+            changes=diff.changes,
+            replaces=[
+                property_
+                for property_ in diff.replaces or []
+                if property_ in self.replacement_props
+            ],
+            stables=diff.stables,
+            delete_before_replace=True,
+        )
 
     def refresh(self, props: dict[str, Any]) -> dict[str, Any]:
-        """TODO: check whether ACLs have changed"""
-        return dict(**props)
+        """Check the ACL on the root of the container, which is set last"""
+        outs = dict(**props)
+        try:
+            container_acl = self.container_acl(props)
+            if not container_acl.matches(props["desired_acl"]):
+                outs["desired_acl"] = container_acl.get()
+        except DataSafeHavenError:
+            # Keep the previous state if the container cannot be reached
+            pass
+        return outs
+
+    def update(
+        self,
+        id_: str,
+        old_props: dict[str, Any],
+        new_props: dict[str, Any],
+    ) -> UpdateResult:
+        """Set the new ACL over the old one, without first restoring the default"""
+        # Use `id` as a no-op to avoid ARG002 while maintaining function signature
+        id(id_)
+        id(old_props)
+        return UpdateResult(outs=self.create(new_props).outs)
 
 
 class BlobContainerAcl(Resource):
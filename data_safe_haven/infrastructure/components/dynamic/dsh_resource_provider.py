@@ -1,8 +1,10 @@
 """Pulumi base dynamic component."""
 
+import functools
+import threading
 from abc import ABCMeta, abstractmethod
-from collections.abc import Sequence
-from typing import Any
+from collections.abc import Callable, Sequence
+from typing import Any, ClassVar
 
 from pulumi.dynamic import (
     CheckResult,
@@ -14,7 +16,46 @@ from pulumi.dynamic import (
 )
 
 
+def serialised(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a provider method so that it holds the shared provider lock"""
+    if getattr(method, "serialised_", False):
+        return method
+
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with DshResourceProvider.lock_:
+            return method(*args, **kwargs)
+
+    wrapper.serialised_ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
 class DshResourceProvider(ResourceProvider, metaclass=ABCMeta):
+    """
+    Base class for Data Safe Haven dynamic resource providers.
+
+    Dynamic providers can deadlock when Pulumi calls several of them at once. Every
+    provider operation therefore holds a lock which is shared by all dynamic resources
+    in the provider process. This serialises dynamic resources without adding
+    dependencies between them, so the rest of the stack still runs in parallel.
+    """
+
+    lock_: ClassVar[threading.RLock] = threading.RLock()
+    locked_methods: ClassVar[tuple[str, ...]] = (
+        "check",
+        "create",
+        "delete",
+        "diff",
+        "read",
+        "update",
+    )
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        for name in cls.locked_methods:
+            if name in cls.__dict__:
+                setattr(cls, name, serialised(cls.__dict__[name]))
+
     @staticmethod
     def partial_diff(
         old_props: dict[str, Any],
@@ -58,6 +99,7 @@ class DshResourceProvider(ResourceProvider, metaclass=ABCMeta):
             delete_before_replace=True,  # delete the existing resource before replacing
         )
 
+    @serialised
     def check(
         self, old_props: dict[str, Any], new_props: dict[str, Any]
     ) -> CheckResult:
@@ -119,6 +161,7 @@ class DshResourceProvider(ResourceProvider, metaclass=ABCMeta):
                 - delete_before_replace: whether to delete the old object before creating the new one
         """
 
+    @serialised
     def read(self, id_: str, props: dict[str, Any]) -> ReadResult:
         """
         Invoked when Pulumi needs to get data about a non-managed resource
@@ -142,6 +185,7 @@ class DshResourceProvider(ResourceProvider, metaclass=ABCMeta):
         """
         return dict(**props)
 
+    @serialised
     def update(
         self,
         id_: str,
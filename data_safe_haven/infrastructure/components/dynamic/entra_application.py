@@ -1,7 +1,7 @@
 """Pulumi dynamic component for Entra applications."""
 
 from contextlib import suppress
-from typing import Any
+from typing import Any, ClassVar
 
 from pulumi import Input, Output, ResourceOptions
 from pulumi.dynamic import CreateResult, DiffResult, Resource, UpdateResult
@@ -33,6 +33,11 @@ class EntraApplicationProps:
 
 
 class EntraApplicationProvider(DshResourceProvider):
+    role_assignment_props: ClassVar[tuple[str, ...]] = (
+        "application_role_assignments",
+        "delegated_role_assignments",
+    )
+
     def __init__(self, auth_token: str):
         self.auth_token = auth_token
         super().__init__()
@@ -118,29 +123,51 @@ class EntraApplicationProvider(DshResourceProvider):
         # ignoring '__provider' could cause issues if the structure of this class
         # changes in any other way, but this could be fixed by manually deleting the
         # application in the Entra directory.
-        return self.partial_diff(old_props, new_props, excluded_props=["__provider"])
+        diff = self.partial_diff(old_props, new_props, excluded_props=["__provider"])
+        # Missing role permissions can be granted without replacing the application
+        grantable = [
+            property_
+            for property_ in self.role_assignment_props
+            if set(old_props.get(property_) or []).issubset(
+                new_props.get(property_) or []
+            )
+        ]
+        return DiffResult(
+            changes=diff.changes,
+            replaces=[
+                property_
+                for property_ in diff.replaces or []
+                if property_ not in grantable
+            ],
+            stables=diff.stables,
+            delete_before_replace=True,
+        )
 
     def refresh(self, props: dict[str, Any]) -> dict[str, Any]:
+        """
+        Read the current state of the application without changing anything.
+
+        Any requested application roles which are no longer assigned are removed from
+        the output, so that the next update grants them again.
+        """
         try:
             outs = dict(**props)
             with suppress(DataSafeHavenMicrosoftGraphError, KeyError):
                 graph_api = GraphApi.from_token(self.auth_token, disable_logging=True)
-                if json_response := graph_api.get_application_by_name(
-                    outs["application_name"]
-                ):
-                    outs["object_id"] = json_response["id"]
+                if json_response := graph_api.get_application_by_id(outs["object_id"]):
                     outs["application_id"] = json_response["appId"]
-
-                # Ensure that requested role permissions have been granted
-                graph_api.grant_role_permissions(
-                    outs["application_name"],
-                    application_role_assignments=props.get(
-                        "application_role_assignments", []
-                    ),
-                    delegated_role_assignments=props.get(
-                        "delegated_role_assignments", []
-                    ),
-                )
+                    assigned_role_ids = {
+                        assignment["appRoleId"]
+                        for assignment in graph_api.read_application_role_assignments(
+                            outs["application_id"]
+                        )
+                    }
+                    outs["application_role_assignments"] = [
+                        role_name
+                        for role_name in props.get("application_role_assignments") or []
+                        if graph_api.uuid_application.get(role_name)
+                        in assigned_role_ids
+                    ]
             return outs
         except Exception as exc:
             msg = f"Failed to refresh application '{props['application_name']}' in Entra ID."
@@ -152,14 +179,21 @@ class EntraApplicationProvider(DshResourceProvider):
         old_props: dict[str, Any],
         new_props: dict[str, Any],
     ) -> UpdateResult:
-        """Updating is deleting followed by creating."""
+        """Updating grants any missing role permissions to the existing application."""
+        # Use `id` as a no-op to avoid ARG002 while maintaining function signature
+        id(id_)
         try:
-            # Delete the old application, using the auth token from new_props
-            old_props_ = {**old_props}
-            self.delete(id_, old_props_)
-            # Create a new application
-            updated = self.create(new_props)
-            return UpdateResult(outs=updated.outs)
+            graph_api = GraphApi.from_token(self.auth_token, disable_logging=True)
+            graph_api.grant_role_permissions(
+                new_props["application_name"],
+                application_role_assignments=new_props.get(
+                    "application_role_assignments", []
+                ),
+                delegated_role_assignments=new_props.get(
+                    "delegated_role_assignments", []
+                ),
+            )
+            return UpdateResult(outs={**old_props, **new_props})
         except Exception as exc:
             msg = f"Failed to update application '{new_props['application_name']}' in Entra ID."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
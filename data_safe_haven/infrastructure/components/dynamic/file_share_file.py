@@ -1,12 +1,17 @@
 """Pulumi dynamic component for files uploaded to an Azure FileShare."""
 
+import hashlib
 from contextlib import suppress
 from typing import Any
 
 from azure.core.exceptions import ResourceNotFoundError, ServiceRequestError
-from azure.storage.fileshare import ShareDirectoryClient, ShareFileClient
+from azure.storage.fileshare import (
+    ContentSettings,
+    ShareDirectoryClient,
+    ShareFileClient,
+)
 from pulumi import Input, Output, ResourceOptions
-from pulumi.dynamic import CreateResult, DiffResult, Resource
+from pulumi.dynamic import CheckResult, CreateResult, DiffResult, Resource, UpdateResult
 
 from data_safe_haven.exceptions import DataSafeHavenAzureError
 
@@ -32,6 +37,13 @@ class FileShareFileProps:
 
 
 class FileShareFileProvider(DshResourceProvider):
+    @staticmethod
+    def content_md5(file_contents: str) -> bytes:
+        """MD5 digest of the file contents, as stored by Azure Files"""
+        return hashlib.md5(
+            file_contents.encode("utf-8"), usedforsecurity=False
+        ).digest()
+
     @staticmethod
     def file_exists(file_client: ShareFileClient) -> bool:
         with suppress(ResourceNotFoundError, ServiceRequestError):
@@ -77,7 +89,12 @@ class FileShareFileProvider(DshResourceProvider):
                 props["share_name"],
                 props["destination_path"],
             )
-            file_client.upload_file(props["file_contents"].encode("utf-8"))
+            content_md5 = self.content_md5(props["file_contents"])
+            file_client.upload_file(
+                props["file_contents"].encode("utf-8"),
+                content_settings=ContentSettings(content_md5=bytearray(content_md5)),
+            )
+            outs["file_hash"] = content_md5.hex()
             outs["file_name"] = file_client.file_name
         except Exception as exc:
             file_name = file_client.file_name if file_client else ""
@@ -108,6 +125,16 @@ class FileShareFileProvider(DshResourceProvider):
             msg = f"Failed to delete file '{file_name}' in [green]{props['share_name']}[/]."
             raise DataSafeHavenAzureError(msg) from exc
 
+    def check(
+        self, old_props: dict[str, Any], new_props: dict[str, Any]
+    ) -> CheckResult:
+        """Add a hash of the file contents without querying the remote file."""
+        # Use `id` as a no-op to avoid ARG002 while maintaining function signature
+        id(old_props)
+        props = dict(**new_props)
+        props["file_hash"] = self.content_md5(props["file_contents"]).hex()
+        return CheckResult(props, [])
+
     def diff(
         self,
         id_: str,
@@ -118,22 +145,54 @@ class FileShareFileProvider(DshResourceProvider):
         # Use `id` as a no-op to avoid ARG002 while maintaining function signature
         id(id_)
         # Exclude "storage_account_key" which should not trigger a diff
-        return self.partial_diff(old_props, new_props, ["storage_account_key"])
+        # Exclude "file_contents" which is compared through "file_hash"
+        diff = self.partial_diff(
+            old_props, new_props, ["file_contents", "storage_account_key"]
+        )
+        # Changed contents can be overwritten in place
+        return DiffResult(
+            changes=diff.changes,
+            replaces=[prop for prop in diff.replaces or [] if prop != "file_hash"],
+            stables=diff.stables,
+            delete_before_replace=True,
+        )
 
     def refresh(self, props: dict[str, Any]) -> dict[str, Any]:
+        """Compare the remote file against the stored hash with a single request."""
         with suppress(Exception):
-            file_client = FileShareFileProvider.get_file_client(
-                props["storage_account_name"],
-                props["storage_account_key"],
-                props["share_name"],
-                props["destination_path"],
+            file_client = ShareFileClient(
+                account_url=f"https://{props['storage_account_name']}.file.core.windows.net",
+                share_name=props["share_name"],
+                file_path=props["destination_path"],
+                credential=props["storage_account_key"],
             )
-            if not FileShareFileProvider.file_exists(file_client):
+            try:
+                properties = file_client.get_file_properties()
+            except ResourceNotFoundError:
+                props["file_hash"] = ""
                 props["file_name"] = ""
+            else:
+                if content_md5 := properties.content_settings.content_md5:
+                    props["file_hash"] = bytes(content_md5).hex()
+                elif properties.size != len(props["file_contents"].encode("utf-8")):
+                    props["file_hash"] = ""
         return dict(**props)
 
+    def update(
+        self,
+        id_: str,
+        old_props: dict[str, Any],
+        new_props: dict[str, Any],
+    ) -> UpdateResult:
+        """Overwrite the file in place, leaving any open handles intact."""
+        # Use `id` as a no-op to avoid ARG002 while maintaining function signature
+        id((id_, old_props))
+        updated = self.create(new_props)
+        return UpdateResult(outs=updated.outs)
+
 
 class FileShareFile(Resource):
+    file_hash: Output[str]
     file_name: Output[str]
     _resource_type_name = "dsh:common:FileShareFile"  # set resource type
 
@@ -144,5 +203,8 @@ class FileShareFile(Resource):
         opts: ResourceOptions | None = None,
     ):
         super().__init__(
-            FileShareFileProvider(), name, {"file_name": None, **vars(props)}, opts
+            FileShareFileProvider(),
+            name,
+            {"file_hash": None, "file_name": None, **vars(props)},
+            opts,
         )
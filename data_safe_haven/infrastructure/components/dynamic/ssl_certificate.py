@@ -2,18 +2,20 @@
 
 import time
 from contextlib import suppress
-from typing import Any
+from datetime import UTC, datetime, timedelta
+from typing import Any, ClassVar
 
 from acme.errors import ValidationError
+from azure.keyvault.certificates import KeyVaultCertificate
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from cryptography.hazmat.primitives.serialization import (
     NoEncryption,
     load_pem_private_key,
     pkcs12,
 )
-from cryptography.x509 import load_pem_x509_certificate
+from cryptography.x509 import load_der_x509_certificate, load_pem_x509_certificate
 from pulumi import Input, Output, ResourceOptions
-from pulumi.dynamic import CreateResult, DiffResult, Resource
+from pulumi.dynamic import CreateResult, DiffResult, Resource, UpdateResult
 from simple_acme_dns import ACMEClient
 
 from data_safe_haven.exceptions import DataSafeHavenAzureError, DataSafeHavenSSLError
@@ -33,50 +35,132 @@ class SSLCertificateProps:
         key_vault_name: Input[str],
         networking_resource_group_name: Input[str],
         subscription_name: Input[str],
+        renewal_days: Input[int] = 30,
     ) -> None:
         self.certificate_secret_name = certificate_secret_name
         self.domain_name = domain_name
         self.admin_email_address = admin_email_address
         self.key_vault_name = key_vault_name
         self.networking_resource_group_name = networking_resource_group_name
+        self.renewal_days = renewal_days
         self.subscription_name = subscription_name
 
 
 class SSLCertificateProvider(DshResourceProvider):
+    acme_account_secret_name: ClassVar[str] = "acme-account"
+    acme_directory: ClassVar[str] = "https://acme-v02.api.letsencrypt.org/directory"
+    dns_propagation_timeout: ClassVar[int] = 300
+    # Changes to any other property can be applied without replacing the resource
+    replacement_props: ClassVar[tuple[str, ...]] = (
+        "certificate_secret_name",
+        "domain_name",
+        "key_vault_name",
+    )
+
+    @classmethod
+    def acme_client(cls, azure_sdk: AzureSdk, props: dict[str, Any]) -> ACMEClient:
+        """
+        Load the ACME account stored in the Key Vault, or register a new one
+
+        Reusing an account avoids a registration request for every certificate.
+        """
+        with suppress(Exception):
+            client = ACMEClient.load_account(
+                azure_sdk.get_keyvault_secret(
+                    props["key_vault_name"], cls.acme_account_secret_name
+                )
+            )
+            if client.email == props["admin_email_address"]:
+                client.domains = [props["domain_name"]]
+                client.nameservers = ["8.8.8.8", "1.1.1.1"]
+                return client
+        client = ACMEClient(
+            domains=[props["domain_name"]],
+            email=props["admin_email_address"],
+            directory=cls.acme_directory,
+            nameservers=["8.8.8.8", "1.1.1.1"],
+            new_account=True,
+        )
+        azure_sdk.set_keyvault_secret(
+            secret_name=cls.acme_account_secret_name,
+            secret_value=client.export_account(save_certificate=False),
+            key_vault_name=props["key_vault_name"],
+        )
+        return client
+
+    @staticmethod
+    def certificate_expiry(certificate: KeyVaultCertificate) -> str:
+        """
+        Get the expiry date of a Key Vault certificate in ISO format
+
+        The expiry is read from the certificate itself if Key Vault does not report
+        one. An empty string is returned if neither is available.
+        """
+        if certificate.properties and certificate.properties.expires_on:
+            return certificate.properties.expires_on.isoformat()
+        if certificate.cer:
+            with suppress(ValueError):
+                x509 = load_der_x509_certificate(bytes(certificate.cer))
+                return x509.not_valid_after_utc.isoformat()
+        return ""
+
+    @staticmethod
+    def needs_renewal(expiry: str | None, renewal_days: float) -> bool:
+        """
+        Whether a certificate with this expiry date is inside the renewal window
+
+        An unknown expiry is not treated as due, as that would reissue the certificate
+        on every deployment. Refreshing reads the expiry of existing certificates.
+        """
+        if not expiry:
+            return False
+        try:
+            expires_on = datetime.fromisoformat(expiry)
+        except ValueError:
+            return True
+        return expires_on - datetime.now(UTC) < timedelta(days=renewal_days)
+
+    @classmethod
+    def wait_for_dns_propagation(cls, client: ACMEClient) -> None:
+        """
+        Poll the authoritative nameservers until they serve the verification tokens
+
+        Raises:
+            DataSafeHavenSSLError if the tokens were not found before the timeout
+        """
+        deadline = time.monotonic() + cls.dns_propagation_timeout
+        delay = 2
+        while not client.check_dns_propagation(
+            timeout=1, interval=1, authoritative=True, round_robin=True
+        ):
+            if time.monotonic() > deadline:
+                msg = "DNS propagation failed"
+                raise DataSafeHavenSSLError(msg)
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
     def create(self, props: dict[str, Any]) -> CreateResult:
         """Create new SSL certificate."""
         outs = dict(**props)
         try:
-            client = ACMEClient(
-                domains=[props["domain_name"]],
-                email=props["admin_email_address"],
-                directory="https://acme-v02.api.letsencrypt.org/directory",
-                nameservers=["8.8.8.8", "1.1.1.1"],
-                new_account=True,
-            )
+            azure_sdk = AzureSdk(props["subscription_name"], disable_logging=True)
+            client = self.acme_client(azure_sdk, props)
             # Generate private key and CSR
             # Note that we must set the key to RSA-2048 before generating the CSR
             # The default is ecdsa-with-SHA25, which Azure Key Vault cannot read
             private_key_bytes = client.generate_private_key(key_type="rsa2048")
             client.generate_csr()
             # Request DNS verification tokens and add them to the DNS record
-            azure_sdk = AzureSdk(props["subscription_name"], disable_logging=True)
             verification_tokens = client.request_verification_tokens().items()
             for record_name, record_values in verification_tokens:
-                record_set = azure_sdk.ensure_dns_txt_record(
+                azure_sdk.ensure_dns_txt_record(
                     record_name=record_name.replace(f".{props['domain_name']}", ""),
                     record_value=record_values[0],
                     resource_group_name=props["networking_resource_group_name"],
                     zone_name=props["domain_name"],
                 )
-            # Wait for DNS propagation to complete
-            if not client.check_dns_propagation(
-                authoritative=False, round_robin=True, verbose=False
-            ):
-                msg = "DNS propagation failed"
-                raise DataSafeHavenSSLError(msg)
-            # Wait for the TTL for this record to expire to remove risk of caching
-            time.sleep(record_set.ttl or 30)
+            # Wait for the authoritative nameservers, which the ACME server queries
+            self.wait_for_dns_propagation(client)
             # Request a signed certificate
             try:
                 certificate_bytes = client.request_certificate()
@@ -119,6 +203,10 @@ class SSLCertificateProvider(DshResourceProvider):
                 key_vault_name=props["key_vault_name"],
             )
             outs["secret_id"] = kvcert.secret_id
+            outs["expiry"] = (
+                self.certificate_expiry(kvcert)
+                or certificate.not_valid_after_utc.isoformat()
+            )
         except Exception as exc:
             cert_name = f"[green]{props['certificate_secret_name']}[/]"
             domain_name = f"[green]{props['domain_name']}[/]"
@@ -161,7 +249,22 @@ class SSLCertificateProvider(DshResourceProvider):
         """Calculate diff between old and new state"""
         # Use `id` as a no-op to avoid ARG002 while maintaining function signature
         id(id_)
-        return self.partial_diff(old_props, new_props, [])
+        # Exclude outputs. The expiry is compared against the renewal window instead.
+        diff = self.partial_diff(old_props, new_props, ["expiry", "secret_id"])
+        renew = self.needs_renewal(
+            new_props.get("expiry") or old_props.get("expiry"),
+            new_props.get("renewal_days", 30),
+        )
+        return DiffResult(
+            changes=diff.changes or renew,
+            replaces=[
+                property_
+                for property_ in diff.replaces or []
+                if property_ in self.replacement_props
+            ],
+            stables=diff.stables,
+            delete_before_replace=True,
+        )
 
     def refresh(self, props: dict[str, Any]) -> dict[str, Any]:
         try:
@@ -173,6 +276,8 @@ class SSLCertificateProvider(DshResourceProvider):
                 )
                 if certificate.secret_id:
                     outs["secret_id"] = certificate.secret_id
+                if expiry := self.certificate_expiry(certificate):
+                    outs["expiry"] = expiry
             return outs
         except Exception as exc:
             cert_name = f"[green]{props['certificate_secret_name']}[/]"
@@ -180,9 +285,29 @@ class SSLCertificateProvider(DshResourceProvider):
             msg = f"Failed to refresh SSL certificate {cert_name} for {domain_name}."
             raise DataSafeHavenSSLError(msg) from exc
 
+    def update(
+        self,
+        id_: str,
+        old_props: dict[str, Any],
+        new_props: dict[str, Any],
+    ) -> UpdateResult:
+        """Issue a new certificate only if the existing one is due for renewal."""
+        # Use `id` as a no-op to avoid ARG002 while maintaining function signature
+        id(id_)
+        if old_props.get("secret_id") and not self.needs_renewal(
+            new_props.get("expiry") or old_props.get("expiry"),
+            new_props.get("renewal_days", 30),
+        ):
+            # Keep the existing outputs, which are unknown in the new inputs
+            outputs = {key: old_props.get(key) for key in ("expiry", "secret_id")}
+            return UpdateResult(outs={**old_props, **new_props, **outputs})
+        # Importing a certificate with the same name adds a new version in Key Vault
+        return UpdateResult(outs=self.create(new_props).outs)
+
 
 class SSLCertificate(Resource):
     _resource_type_name = "dsh:common:SSLCertificate"  # set resource type
+    expiry: Output[str]
     secret_id: Output[str]
 
     def __init__(
@@ -194,6 +319,6 @@ class SSLCertificate(Resource):
         super().__init__(
             SSLCertificateProvider(),
             name,
-            {"secret_id": None, **vars(props)},
+            {"expiry": None, "secret_id": None, **vars(props)},
             opts,
         )
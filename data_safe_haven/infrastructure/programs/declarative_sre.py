@@ -1,9 +1,14 @@
 """Pulumi declarative program"""
 
+import hashlib
+import json
+from typing import Any, ClassVar
+
 import pulumi
 from pulumi import ResourceOptions
 from pulumi_azure_native import resources
 
+from data_safe_haven import __version__
 from data_safe_haven.config import Context, SREConfig
 from data_safe_haven.functions import replace_separators
 from data_safe_haven.infrastructure.common import DockerHubCredentials
@@ -31,6 +36,47 @@ from .sre.workspaces import SREWorkspacesComponent, SREWorkspacesProps
 class DeclarativeSRE:
     """Deploy with Pulumi"""
 
+    # Pulumi types of the components which can be deployed individually
+    components: ClassVar[dict[str, str]] = {
+        "application_gateway": "dsh:sre:ApplicationGatewayComponent",
+        "apt_proxy_server": "dsh:sre:AptProxyServerComponent",
+        "backup": "dsh:sre:BackupComponent",
+        "clamav_mirror": "dsh:sre:ClamAVMirrorComponent",
+        "data": "dsh:sre:DataComponent",
+        "desired_state": "dsh:sre:DesiredStateComponent",
+        "dns_server": "dsh:sre:DnsServerComponent",
+        "entra": "dsh:sre:EntraComponent",
+        "firewall": "dsh:sre:FirewallComponent",
+        "identity": "dsh:sre:IdentityComponent",
+        "monitoring": "dsh:sre:MonitoringComponent",
+        "networking": "dsh:sre:NetworkingComponent",
+        "remote_desktop": "dsh:sre:RemoteDesktopComponent",
+        "user_services": "dsh:sre:UserServicesComponent",
+        "workspaces": "dsh:sre:WorkspacesComponent",
+    }
+    # Components which use each SRE config setting
+    # Changing any setting which is not listed here affects the whole SRE
+    config_components: ClassVar[dict[str, tuple[str, ...]]] = {
+        "description": (),
+        "dockerhub": (
+            "clamav_mirror",
+            "dns_server",
+            "identity",
+            "remote_desktop",
+            "user_services",
+        ),
+        "sre.admin_email_address": ("data",),
+        "sre.admin_ip_addresses": ("data", "desired_state"),
+        "sre.databases": ("user_services",),
+        "sre.data_provider_ip_addresses": ("data",),
+        "sre.remote_desktop": ("remote_desktop",),
+        "sre.research_user_ip_addresses": ("networking",),
+        "sre.software_packages": ("user_services",),
+        "sre.storage_quota_gb": ("data",),
+        "sre.timezone": ("monitoring",),
+        "sre.workspace_skus": ("workspaces",),
+    }
+
     def __init__(
         self,
         context: Context,
@@ -48,6 +94,36 @@ class DeclarativeSRE:
             "sre_name": f"SRE {config.name}",
         } | context.tags
 
+    def config_fingerprint(self) -> dict[str, str]:
+        """Hash each SRE config setting so that changes can be detected."""
+        settings = self.config.model_dump(mode="json")
+        # Any change to the program itself affects the whole SRE
+        fingerprint: dict[str, Any] = {"version": __version__}
+        for section, value in settings.items():
+            if section in self.config_components or not isinstance(value, dict):
+                fingerprint[section] = value
+            else:
+                for name, subvalue in value.items():
+                    fingerprint[f"{section}.{name}"] = subvalue
+        return {
+            key: hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+            for key, value in fingerprint.items()
+        }
+
+    def changed_components(self, fingerprint: dict[str, str]) -> set[str] | None:
+        """
+        Find the components affected by changing config since a previous fingerprint.
+
+        Returns None if the whole SRE is affected.
+        """
+        components: set[str] = set()
+        for key, digest in self.config_fingerprint().items():
+            if fingerprint.get(key) != digest:
+                if key not in self.config_components:
+                    return None
+                components.update(self.config_components[key])
+        return components
+
     def __call__(self) -> None:
         # Load pulumi configuration options
         self.pulumi_opts = pulumi.Config()
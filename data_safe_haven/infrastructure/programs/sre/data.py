@@ -724,4 +724,6 @@ class SREDataComponent(ComponentResource):
         self.exports = {
             "key_vault_name": key_vault.name,
             "password_user_database_admin_secret": kvs_password_user_database_admin.name,
+            "resource_group_name": props.resource_group_name,
+            "storage_account_data_private_sensitive_name": storage_account_data_private_sensitive.name,
         }
@@ -1,6 +1,11 @@
 """Pulumi component for SRE desired state"""
 
+import gzip
+import hashlib
+import io
+import tarfile
 from collections.abc import Mapping, Sequence
+from pathlib import Path
 
 import yaml
 from pulumi import (
@@ -17,6 +22,7 @@ from pulumi_azure_native import (
     storage,
 )
 
+from data_safe_haven.directories import config_dir
 from data_safe_haven.functions import (
     alphanumeric,
     replace_separators,
@@ -130,27 +136,55 @@ class SREDesiredStateComponent(ComponentResource):
                 subscription_name=props.subscription_name,
             ),
         )
-        # Create file assets to upload
-        desired_state_directory = (resources_path / "workspace" / "ansible").absolute()
-        files_desired_state = [
-            (
-                FileAsset(str(file_path)),
-                file_path.name,
-                str(file_path.relative_to(desired_state_directory)),
-            )
-            for file_path in sorted(desired_state_directory.rglob("*"))
-            if file_path.is_file() and not file_path.name.startswith(".")
-        ]
-        # Upload file assets to desired state container
-        for file_asset, file_name, file_path in files_desired_state:
-            storage.Blob(
-                f"{container_desired_state._name}_blob_{file_name}",
-                account_name=storage_account.name,
-                blob_name=file_path,
-                container_name=container_desired_state.name,
-                resource_group_name=props.resource_group_name,
-                source=file_asset,
-            )
+        # Package the desired state tree into a single content-addressed bundle so
+        # that Pulumi only tracks one blob and unchanged files are never re-uploaded
+        bundle_path = self.write_bundle(
+            (resources_path / "workspace" / "ansible").absolute()
+        )
+        bundle_hash = bundle_path.name.removesuffix(".tar.gz")
+        blob_bundle = storage.Blob(
+            f"{container_desired_state._name}_blob_bundle",
+            account_name=storage_account.name,
+            blob_name=f"bundles/{bundle_hash}.tar.gz",
+            container_name=container_desired_state.name,
+            resource_group_name=props.resource_group_name,
+            source=FileAsset(str(bundle_path)),
+        )
+        # Point workspaces at the current bundle once it has been uploaded. Changing
+        # the bundle name replaces its blob, so Pulumi deletes the previous bundle
+        # once the manifest has moved on.
+        blob_bundle_manifest = storage.Blob(
+            f"{container_desired_state._name}_blob_bundle_manifest",
+            account_name=storage_account.name,
+            blob_name="bundle.sha256",
+            container_name=container_desired_state.name,
+            resource_group_name=props.resource_group_name,
+            source=StringAsset(f"{bundle_hash}\n"),
+            opts=ResourceOptions(depends_on=[blob_bundle]),
+        )
+        # Upload the script which unpacks and applies the current bundle
+        desired_state_path = resources_path / "workspace" / "desired_state"
+        blob_script = storage.Blob(
+            f"{container_desired_state._name}_blob_desired_state.sh",
+            account_name=storage_account.name,
+            blob_name="desired_state.sh",
+            container_name=container_desired_state.name,
+            resource_group_name=props.resource_group_name,
+            source=FileAsset(str(desired_state_path / "desired_state.sh")),
+        )
+        # Workspaces deployed before bundles were introduced run desired_state.yaml
+        # from the container. This playbook installs the current script on them.
+        # It keeps the resource name of the old per-file blob so that Pulumi updates
+        # that blob in place rather than deleting it after the new one is written.
+        storage.Blob(
+            f"{container_desired_state._name}_blob_desired_state.yaml",
+            account_name=storage_account.name,
+            blob_name="desired_state.yaml",
+            container_name=container_desired_state.name,
+            resource_group_name=props.resource_group_name,
+            source=FileAsset(str(desired_state_path / "desired_state.yaml")),
+            opts=ResourceOptions(depends_on=[blob_bundle_manifest, blob_script]),
+        )
         # Upload ansible vars file
         storage.Blob(
             f"{container_desired_state._name}_blob_pulumi_vars",
@@ -222,3 +256,44 @@ class SREDesiredStateComponent(ComponentResource):
     @staticmethod
     def ansible_vars_file(**kwargs: str) -> str:
         return yaml.safe_dump(kwargs, explicit_start=True, indent=2)
+
+    @staticmethod
+    def bundle(directory: Path) -> bytes:
+        """
+        Package a directory as a gzipped tarball
+
+        The output only depends on the paths, contents and executable bits of the
+        files, so that unchanged files always produce an identical bundle.
+        """
+        buffer = io.BytesIO()
+        with (
+            gzip.GzipFile(fileobj=buffer, mode="wb", filename="", mtime=0) as f_gzip,
+            tarfile.open(fileobj=f_gzip, mode="w", format=tarfile.PAX_FORMAT) as f_tar,
+        ):
+            for file_path in sorted(directory.rglob("*")):
+                if not file_path.is_file() or file_path.name.startswith("."):
+                    continue
+                content = file_path.read_bytes()
+                info = tarfile.TarInfo(file_path.relative_to(directory).as_posix())
+                info.mode = 0o755 if file_path.stat().st_mode & 0o100 else 0o644
+                info.size = len(content)
+                f_tar.addfile(info, io.BytesIO(content))
+        return buffer.getvalue()
+
+    @classmethod
+    def write_bundle(cls, directory: Path) -> Path:
+        """
+        Write a bundle of a directory to a file named after its SHA256 hash
+
+        Bundles from earlier versions of the directory are removed.
+        """
+        bundle = cls.bundle(directory)
+        bundle_directory = config_dir() / "bundles"
+        bundle_directory.mkdir(parents=True, exist_ok=True)
+        bundle_path = bundle_directory / f"{hashlib.sha256(bundle).hexdigest()}.tar.gz"
+        if not bundle_path.exists():
+            bundle_path.write_bytes(bundle)
+        for old_bundle_path in bundle_directory.glob("*.tar.gz"):
+            if old_bundle_path != bundle_path:
+                old_bundle_path.unlink(missing_ok=True)
+        return bundle_path
@@ -73,7 +73,7 @@ class SREWorkspacesProps:
             DataSafeHavenPulumiError(
                 f"'vm_details' has invalid type {type(vm_details)}"
             )
-        return get_available_ips_from_subnet(subnet)[: len(vm_details)]
+        return get_available_ips_from_subnet(subnet, len(vm_details))
 
 
 class SREWorkspacesComponent(ComponentResource):
@@ -1,12 +1,17 @@
 """Manage Pulumi projects"""
 
+import json
 import logging
 import time
+from collections.abc import Callable, Collection
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import suppress
 from importlib import metadata
-from typing import Any
+from pathlib import Path
+from typing import Any, ClassVar
 
 from pulumi import automation
+from rich.console import Console
 
 from data_safe_haven.config import (
     Context,
@@ -14,6 +19,7 @@ from data_safe_haven.config import (
     DSHPulumiProject,
     SREConfig,
 )
+from data_safe_haven.directories import config_dir
 from data_safe_haven.exceptions import (
     DataSafeHavenAzureError,
     DataSafeHavenConfigError,
@@ -22,9 +28,15 @@ from data_safe_haven.exceptions import (
 )
 from data_safe_haven.external import AzureSdk, PulumiAccount
 from data_safe_haven.functions import get_key_vault_name, replace_separators
-from data_safe_haven.logging import get_console_handler, get_logger
+from data_safe_haven.logging import (
+    get_console_handler,
+    get_file_handler,
+    get_logger,
+)
+from data_safe_haven.types import PulumiRefreshPolicy
 
 from .programs import DeclarativeSRE
+from .pulumi_progress import PulumiProgress
 
 
 class ProjectManager:
@@ -37,6 +49,21 @@ class ProjectManager:
     including `pulumi up` and `pulumi destroy`.
     """
 
+    default_parallelism: ClassVar[int] = 8
+    destroy_max_attempts: ClassVar[int] = 5
+    destroy_retry_interval: ClassVar[int] = 10
+    dynamic_resource_type: ClassVar[str] = "pulumi-python:dynamic:Resource"
+    drift_prone_resource_types: ClassVar[tuple[str, ...]] = (
+        "azure-native:compute:VirtualMachine",
+        "azure-native:containerinstance:ContainerGroup",
+        dynamic_resource_type,
+    )
+    transient_destroy_errors: ClassVar[tuple[str, ...]] = (
+        "Linked Service is used by a solution",
+        "NetworkProfileAlreadyInUseWithContainerNics",
+        "InUseSubnetCannotBeDeleted",
+    )
+
     def __init__(
         self,
         context: Context,
@@ -50,6 +77,7 @@ class ProjectManager:
         self._pulumi_project: DSHPulumiProject | None = None
         self._stack: automation.Stack | None = None
         self._stack_outputs: automation.OutputMap | None = None
+        self._snapshot_outputs: dict[str, Any] | None = None
         self.account = PulumiAccount(
             resource_group_name=context.resource_group_name,
             storage_account_name=context.storage_account_name,
@@ -58,17 +86,40 @@ class ProjectManager:
         self.context = context
         self.create_project = create_project
         self.logger = get_logger()
+        self.phase_timings: dict[str, float] = {}
         self.program = program
+        console_handler = get_console_handler()
+        file_handler = get_file_handler()
+        self.progress = PulumiProgress(
+            console=console_handler.console if console_handler else Console(),
+            log_file=Path(file_handler.baseFilename) if file_handler else None,
+        )
         self.project_name = replace_separators(context.tags["project"].lower(), "-")
         self.pulumi_config = pulumi_config
         self.pulumi_project_name = pulumi_project_name
         self.stack_name = self.program.stack_name
 
+    @property
+    def checkpoint_blob_name(self) -> str:
+        """Blob in which the Pulumi backend stores the stack checkpoint"""
+        return f".pulumi/stacks/{self.project_name}/{self.stack_name}.json"
+
+    @property
+    def deployed_config_name(self) -> str:
+        """Blob in which a fingerprint of the last deployed configuration is stored"""
+        return f"{self.stack_name}.deployed.json"
+
+    @property
+    def outputs_snapshot_name(self) -> str:
+        """Blob in which a snapshot of the non-secret stack outputs is stored"""
+        return f"{self.stack_name}.outputs.json"
+
     @property
     def pulumi_extra_args(self) -> dict[str, Any]:
         extra_args: dict[str, Any] = {}
         # Produce verbose Pulumi output if running in verbose mode
-        if get_console_handler().level <= logging.DEBUG:
+        console_handler = get_console_handler()
+        if console_handler and console_handler.level <= logging.DEBUG:
             extra_args["debug"] = True
             extra_args["log_to_std_err"] = True
             extra_args["log_verbosity"] = 9
@@ -77,9 +128,11 @@ class ProjectManager:
             extra_args["log_to_std_err"] = None
             extra_args["log_verbosity"] = None
 
-        extra_args["color"] = "always"
+        # Raw output goes straight to the log file so it is written without colour
+        extra_args["color"] = "never"
         extra_args["log_flow"] = True
-        extra_args["on_output"] = self.logger.info
+        extra_args["on_event"] = self.progress.on_event
+        extra_args["on_output"] = self.progress.on_output
         return extra_args
 
     @property
@@ -151,15 +204,46 @@ class ProjectManager:
         self._options[name] = (value, True, replace)
 
     def apply_config_options(self) -> None:
-        """Set Pulumi config options"""
+        """
+        Set Pulumi config options
+
+        The existing configuration is read once and all changes are written in a
+        single operation, rather than running Pulumi commands for each option.
+        """
         try:
             self.logger.debug("Updating Pulumi configuration")
+            all_config = self.stack.get_all_config()
+            changes: automation.ConfigMap = {}
             for name, (value, is_secret, replace) in self._options.items():
-                if replace:
-                    self.set_config(name, value, secret=is_secret)
-                else:
-                    self.ensure_config(name, value, secret=is_secret)
+                key = self.config_key(name)
+                existing = all_config.get(key)
+                if existing and not replace:
+                    if existing.value != value:
+                        msg = (
+                            f"Unchangeable configuration option '{name}' not consistent, "
+                            f"your configuration: '{value}', Pulumi workspace: '{existing.value}'."
+                        )
+                        raise DataSafeHavenPulumiError(msg)
+                elif (
+                    not existing
+                    or existing.value != value
+                    or existing.secret != is_secret
+                ):
+                    changes[key] = automation.ConfigValue(value=value, secret=is_secret)
+            if changes:
+                self.logger.debug(
+                    f"Setting {len(changes)} Pulumi configuration options"
+                )
+                self.stack.set_all_config(changes)
+                all_config.update(changes)
+                self.pulumi_project.stack_config = {
+                    key: item.value for key, item in all_config.items()
+                }
             self._options = {}
+        except automation.CommandError as exc:
+            self.log_exception(exc)
+            msg = "Applying Pulumi configuration options failed."
+            raise DataSafeHavenPulumiError(msg) from exc
         except DataSafeHavenError as exc:
             msg = "Applying Pulumi configuration options failed."
             raise DataSafeHavenPulumiError(msg) from exc
@@ -184,103 +268,168 @@ class ProjectManager:
             )
 
     def cleanup(self) -> None:
-        """Cleanup deployed infrastructure."""
-        try:
-            azure_sdk = AzureSdk(self.context.subscription_name)
-            # Remove stack JSON
-            try:
-                self.logger.debug(f"Removing Pulumi stack [green]{self.stack_name}[/].")
-                if self._stack:
-                    self._stack.workspace.remove_stack(self.stack_name)
-                    self.logger.info(
-                        f"Removed Pulumi stack [green]{self.stack_name}[/]."
-                    )
-            except automation.CommandError as exc:
-                self.log_exception(exc)
-                if "no stack named" not in str(exc):
-                    msg = "Pulumi stack could not be removed."
-                    raise DataSafeHavenPulumiError(msg) from exc
-            # Remove stack JSON backup
-            try:
-                stack_backup_name = f"{self.stack_name}.json.bak"
-                self.logger.debug(
-                    f"Removing Pulumi stack backup [green]{stack_backup_name}[/]."
+        """
+        Cleanup deployed infrastructure.
+
+        Independent cleanup steps are run concurrently. The stack backup is removed
+        after the stack, as removing a stack moves its JSON to the backup.
+        """
+        azure_sdk = AzureSdk(self.context.subscription_name)
+
+        def remove_stack_and_backup() -> None:
+            self.remove_stack()
+            self.remove_stack_backup(azure_sdk)
+
+        steps: dict[str, Callable[[], None]] = {
+            "remove stack": remove_stack_and_backup,
+            "remove stack blobs": lambda: self.remove_stack_blobs(azure_sdk),
+            "purge key vault": lambda: self.purge_key_vault(azure_sdk),
+        }
+        errors: list[DataSafeHavenError] = []
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            futures = {
+                executor.submit(self.timed, name, step): name
+                for name, step in steps.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except DataSafeHavenError as exc:
+                    self.logger.error(f"Cleanup step '{futures[future]}' failed: {exc}")
+                    errors.append(exc)
+        if errors:
+            msg = "Pulumi destroy failed."
+            raise DataSafeHavenPulumiError(msg) from errors[0]
+
+    def changed_components(self) -> set[str] | None:
+        """
+        Find the components affected by config changes since the last deployment.
+
+        Returns None if every component must be deployed.
+        """
+        fingerprint = self.load_deployed_config()
+        if not fingerprint:
+            return None
+        return self.program.changed_components(fingerprint)
+
+    def component_targets(self, components: Collection[str]) -> list[str]:
+        """
+        Get Pulumi targets matching the resources in the named components.
+
+        Each target is a URN pattern which matches the component and everything
+        inside it, including resources which do not exist yet.
+        """
+        targets = []
+        for component in sorted(components):
+            if component not in self.program.components:
+                msg = (
+                    f"Unknown component '{component}'. Valid components are: "
+                    f"{', '.join(self.program.components)}."
                 )
-                if azure_sdk.blob_exists(
-                    blob_name=f".pulumi/stacks/{self.project_name}/{stack_backup_name}",
-                    resource_group_name=self.context.resource_group_name,
-                    storage_account_name=self.context.storage_account_name,
-                    storage_container_name=self.context.pulumi_storage_container_name,
-                ):
-                    azure_sdk.remove_blob(
-                        blob_name=f".pulumi/stacks/{self.project_name}/{stack_backup_name}",
-                        resource_group_name=self.context.resource_group_name,
-                        storage_account_name=self.context.storage_account_name,
-                        storage_container_name=self.context.pulumi_storage_container_name,
-                    )
-                    self.logger.info(
-                        f"Removed Pulumi stack backup [green]{stack_backup_name}[/]."
-                    )
-            except DataSafeHavenAzureError as exc:
-                if "blob does not exist" in str(exc):
-                    self.logger.warning(
-                        f"Pulumi stack backup [green]{stack_backup_name}[/] could not be removed."
-                    )
-                else:
-                    msg = "Pulumi stack backup could not be removed."
-                    raise DataSafeHavenPulumiError(msg) from exc
-            # Purge the key vault, which otherwise blocks re-use of this SRE name
-            key_vault_name = get_key_vault_name(self.stack_name)
-            self.logger.debug(
-                f"Attempting to purge Azure Key Vault [green]{key_vault_name}[/]."
+                raise DataSafeHavenPulumiError(msg)
+            targets.append(
+                f"urn:pulumi:{self.stack_name}::*::**{self.program.components[component]}**"
             )
-            if azure_sdk.purge_keyvault(
-                key_vault_name, self.program.config.azure.location
-            ):
-                self.logger.info(f"Purged Azure Key Vault [green]{key_vault_name}[/].")
-        except DataSafeHavenError as exc:
-            msg = "Pulumi destroy failed."
-            raise DataSafeHavenPulumiError(msg) from exc
+        return targets
+
+    def config_key(self, name: str) -> str:
+        """Qualify a config option name with the project name if needed."""
+        return name if ":" in name else f"{self.project_settings.name}:{name}"
 
-    def deploy(self, *, force: bool = False) -> None:
-        """Deploy the infrastructure with Pulumi."""
+    def deploy(
+        self,
+        *,
+        components: Collection[str] | None = None,
+        force: bool = False,
+        parallel: int | None = None,
+        preview: bool = True,
+        refresh: PulumiRefreshPolicy = PulumiRefreshPolicy.ALL,
+    ) -> None:
+        """
+        Deploy the infrastructure with Pulumi.
+
+        If components are given, only those components and the resources which
+        depend on them are deployed.
+        """
         try:
+            targets = self.component_targets(components) if components else None
+            if targets:
+                self.logger.info(
+                    f"Only deploying components: [green]{', '.join(sorted(components or []))}[/]."
+                )
             self.apply_config_options()
             if force:
                 self.cancel()
-            self.refresh()
-            self.preview()
-            self.update()
+            if refresh != PulumiRefreshPolicy.NONE:
+                self.refresh(
+                    components=components,
+                    drift_prone_only=(refresh == PulumiRefreshPolicy.DRIFT_PRONE),
+                    parallel=parallel,
+                )
+            if preview:
+                self.preview(parallel=parallel, targets=targets)
+            self.update(targets=targets)
+            self.write_deployed_config(components)
         except Exception as exc:
             msg = "Pulumi deployment failed."
             raise DataSafeHavenPulumiError(msg) from exc
 
     def destroy(self) -> None:
-        """Destroy deployed infrastructure."""
+        """
+        Destroy deployed infrastructure.
+
+        Pulumi continues past resources which fail to be deleted, so that everything
+        else is removed in a single pass. Resources which failed with a known transient
+        error are retried, up to `destroy_max_attempts` attempts in total. A final pass
+        then removes anything that was waiting for them. Any other failure is raised
+        immediately.
+        """
         try:
-            # Note that the first iteration can fail due to failure to delete container NICs
-            # See https://github.com/MicrosoftDocs/azure-docs/issues/20737 for details
-            while True:
+            targets: list[str] | None = None
+            for attempt in range(1, self.destroy_max_attempts + 1):
                 try:
-                    result = self.stack.destroy(
-                        **self.pulumi_extra_args,
-                    )
+                    with self.progress:
+                        result = self.stack.destroy(
+                            continue_on_error=True,
+                            target=targets,
+                            **self.pulumi_extra_args,
+                        )
                     self.evaluate(result.summary.result)
-                    break
+                    if targets is None:
+                        return
+                    targets = None
                 except automation.CommandError as exc:
-                    if any(
-                        error in str(exc)
-                        for error in (
-                            "Linked Service is used by a solution",
-                            "NetworkProfileAlreadyInUseWithContainerNics",
-                            "InUseSubnetCannotBeDeleted",
+                    # Note that the first attempt can fail due to failure to delete container NICs
+                    # See https://github.com/MicrosoftDocs/azure-docs/issues/20737 for details
+                    failed = self.progress.failed_urns
+                    transient = self.progress.failed_urns_matching(
+                        self.transient_destroy_errors
+                    )
+                    # Without per-resource errors, fall back to the overall message
+                    retryable = (
+                        len(transient) == len(failed)
+                        if failed
+                        else any(
+                            error in str(exc) for error in self.transient_destroy_errors
                         )
-                    ):
-                        time.sleep(10)
-                    else:
+                    )
+                    if not retryable:
                         self.log_exception(exc)
                         msg = "Pulumi resource destruction failed."
                         raise DataSafeHavenPulumiError(msg) from exc
+                    if attempt == self.destroy_max_attempts:
+                        self.log_exception(exc)
+                        msg = f"Pulumi resource destruction failed after {attempt} attempts."
+                        raise DataSafeHavenPulumiError(msg) from exc
+                    targets = transient or None
+                    self.logger.warning(
+                        f"Retrying destruction of {len(targets) if targets else 'all'}"
+                        f" resources in {self.destroy_retry_interval}s."
+                    )
+                    time.sleep(self.destroy_retry_interval)
+            # The final untargeted pass was not reached
+            msg = f"Pulumi resource destruction did not finish after {self.destroy_max_attempts} attempts."
+            raise DataSafeHavenPulumiError(msg)
         except DataSafeHavenError as exc:
             msg = "Pulumi destroy failed."
             raise DataSafeHavenPulumiError(msg) from exc
@@ -318,56 +467,269 @@ class ProjectManager:
             raise DataSafeHavenPulumiError(msg)
 
     def install_plugins(self, workspace: automation.Workspace) -> None:
-        """For inline programs, we must manage plugins ourselves."""
+        """
+        For inline programs, we must manage plugins ourselves.
+
+        Plugins are only installed if the required version is missing. A marker file
+        records the versions which were last found to be installed, which lets
+        repeated invocations skip querying Pulumi altogether.
+        """
         try:
-            self.logger.debug("Installing required Pulumi plugins")
-            workspace.install_plugin(
-                "azure-native", metadata.version("pulumi-azure-native")
-            )
-            workspace.install_plugin("random", metadata.version("pulumi-random"))
+            required_plugins = {
+                "azure-native": metadata.version("pulumi-azure-native"),
+                "random": metadata.version("pulumi-random"),
+            }
+            marker_path = config_dir() / ".pulumi-plugins"
+            with suppress(OSError, ValueError):
+                if json.loads(marker_path.read_text()) == required_plugins:
+                    self.logger.debug("Required Pulumi plugins are already installed")
+                    return
+            installed_plugins = {
+                (plugin.name, str(plugin.version).removeprefix("v"))
+                for plugin in workspace.list_plugins()
+                if plugin.kind == "resource"
+            }
+            for name, version in required_plugins.items():
+                if (name, version) not in installed_plugins:
+                    self.logger.debug(
+                        f"Installing Pulumi plugin [green]{name}[/] version {version}"
+                    )
+                    workspace.install_plugin(name, version)
+            with suppress(OSError):
+                marker_path.parent.mkdir(parents=True, exist_ok=True)
+                marker_path.write_text(json.dumps(required_plugins))
         except Exception as exc:
             msg = "Installing Pulumi plugins failed.."
             raise DataSafeHavenPulumiError(msg) from exc
 
+    def load_deployed_config(self) -> dict[str, str]:
+        """Load the fingerprint of the configuration from the last deployment."""
+        try:
+            azure_sdk = AzureSdk(self.context.subscription_name)
+            fingerprint = json.loads(
+                azure_sdk.download_blob_bytes(
+                    self.deployed_config_name,
+                    self.context.resource_group_name,
+                    self.context.storage_account_name,
+                    self.context.storage_container_name,
+                )
+            )
+            return dict(fingerprint) if isinstance(fingerprint, dict) else {}
+        except (DataSafeHavenError, ValueError):
+            return {}
+
+    def load_outputs_snapshot(self) -> dict[str, Any]:
+        """
+        Load non-secret stack outputs from the snapshot written after the last update.
+
+        The snapshot is only used if the stack checkpoint has not changed since it
+        was written. Otherwise, or if it cannot be read, no outputs are returned.
+        """
+        try:
+            azure_sdk = AzureSdk(self.context.subscription_name)
+            snapshot = json.loads(
+                azure_sdk.download_blob_bytes(
+                    self.outputs_snapshot_name,
+                    self.context.resource_group_name,
+                    self.context.storage_account_name,
+                    self.context.storage_container_name,
+                )
+            )
+            checkpoint_etag = azure_sdk.get_blob_etag(
+                self.checkpoint_blob_name,
+                self.context.resource_group_name,
+                self.context.storage_account_name,
+                self.context.pulumi_storage_container_name,
+            )
+        except (DataSafeHavenError, ValueError):
+            self.logger.debug(
+                f"No stack outputs snapshot found for stack [green]{self.stack_name}[/]."
+            )
+            return {}
+        if snapshot.get("checkpoint_etag") != checkpoint_etag:
+            self.logger.debug(
+                f"Stack outputs snapshot for stack [green]{self.stack_name}[/] is out of date."
+            )
+            return {}
+        self.logger.debug(
+            f"Loaded outputs for stack [green]{self.stack_name}[/] from snapshot of update {snapshot.get('version')}."
+        )
+        return dict(snapshot.get("outputs", {}))
+
     def log_exception(self, exc: automation.CommandError) -> None:
         for error_line in str(exc).split("\n"):
             if any(word in error_line for word in ["error:", "stderr:"]):
                 self.logger.critical(f"Pulumi error: {error_line}")
 
     def output(self, name: str) -> Any:
-        """Get a named output value from a stack"""
+        """
+        Get a named output value from a stack
+
+        Non-secret outputs are read from an up-to-date snapshot if there is one, so
+        that read-only commands do not need to load the Pulumi stack.
+        """
         if not self._stack_outputs:
+            if self._snapshot_outputs is None:
+                self._snapshot_outputs = self.load_outputs_snapshot()
+            if name in self._snapshot_outputs:
+                return self._snapshot_outputs[name]
             self._stack_outputs = self.stack.outputs()
         return self._stack_outputs[name].value
 
-    def preview(self) -> None:
+    def preview(
+        self, *, parallel: int | None = None, targets: list[str] | None = None
+    ) -> None:
         """Preview the Pulumi stack."""
         try:
             self.logger.info(
                 f"Previewing changes for stack [green]{self.stack.name}[/]."
             )
-            with suppress(automation.CommandError):
-                # Note that we disable parallelisation which can cause deadlock
-                self.stack.preview(
+            result = None
+            with suppress(automation.CommandError), self.progress:
+                # Dynamic providers hold a shared lock, so they cannot deadlock
+                # when other resources are previewed in parallel
+                result = self.stack.preview(
                     diff=True,
-                    parallel=1,
+                    parallel=parallel or self.default_parallelism,
+                    target=targets,
+                    target_dependents=bool(targets) or None,
                     **self.pulumi_extra_args,
                 )
+            # Show the diff once the live display has stopped, so that it can be
+            # checked before any changes are applied
+            if result and result.stdout:
+                self.progress.console.out(result.stdout, highlight=False)
         except Exception as exc:
             msg = "Pulumi preview failed.."
             raise DataSafeHavenPulumiError(msg) from exc
 
-    def refresh(self) -> None:
-        """Refresh the Pulumi stack."""
+    def purge_key_vault(self, azure_sdk: AzureSdk) -> None:
+        """Purge the key vault, which otherwise blocks re-use of this SRE name."""
+        key_vault_name = get_key_vault_name(self.stack_name)
+        self.logger.debug(
+            f"Attempting to purge Azure Key Vault [green]{key_vault_name}[/]."
+        )
+        if azure_sdk.purge_keyvault(key_vault_name, self.program.config.azure.location):
+            self.logger.info(f"Purged Azure Key Vault [green]{key_vault_name}[/].")
+
+    def refresh(
+        self,
+        *,
+        components: Collection[str] | None = None,
+        drift_prone_only: bool = False,
+        parallel: int | None = None,
+    ) -> None:
+        """
+        Refresh the Pulumi stack.
+
+        Resources managed by dynamic providers hold a shared lock while they are
+        refreshed, so the whole stack can be refreshed in parallel.
+        """
         try:
             self.logger.info(f"Refreshing stack [green]{self.stack.name}[/].")
-            # Note that we disable parallelisation which can cause deadlock
-            self.stack.refresh(parallel=1, **self.pulumi_extra_args)
+            targets = self.component_targets(components) if components else None
+            if drift_prone_only:
+                self.logger.debug("Only refreshing resources that are prone to drift.")
+                targets = self.resource_type_targets(
+                    self.drift_prone_resource_types, components=components
+                )
+            with self.progress:
+                self.stack.refresh(
+                    parallel=parallel or self.default_parallelism,
+                    target=targets,
+                    **self.pulumi_extra_args,
+                )
         except automation.CommandError as exc:
             self.log_exception(exc)
             msg = "Pulumi refresh failed."
             raise DataSafeHavenPulumiError(msg) from exc
 
+    def remove_stack(self) -> None:
+        """Remove the stack JSON from the Pulumi backend."""
+        try:
+            self.logger.debug(f"Removing Pulumi stack [green]{self.stack_name}[/].")
+            if self._stack:
+                self._stack.workspace.remove_stack(self.stack_name)
+                self.logger.info(f"Removed Pulumi stack [green]{self.stack_name}[/].")
+        except automation.CommandError as exc:
+            self.log_exception(exc)
+            if "no stack named" not in str(exc):
+                msg = "Pulumi stack could not be removed."
+                raise DataSafeHavenPulumiError(msg) from exc
+
+    def remove_stack_backup(self, azure_sdk: AzureSdk) -> None:
+        """Remove the backup of the stack JSON from the Pulumi backend."""
+        stack_backup_name = f"{self.stack_name}.json.bak"
+        try:
+            self.logger.debug(
+                f"Removing Pulumi stack backup [green]{stack_backup_name}[/]."
+            )
+            if azure_sdk.blob_exists(
+                blob_name=f".pulumi/stacks/{self.project_name}/{stack_backup_name}",
+                resource_group_name=self.context.resource_group_name,
+                storage_account_name=self.context.storage_account_name,
+                storage_container_name=self.context.pulumi_storage_container_name,
+            ):
+                azure_sdk.remove_blob(
+                    blob_name=f".pulumi/stacks/{self.project_name}/{stack_backup_name}",
+                    resource_group_name=self.context.resource_group_name,
+                    storage_account_name=self.context.storage_account_name,
+                    storage_container_name=self.context.pulumi_storage_container_name,
+                )
+                self.logger.info(
+                    f"Removed Pulumi stack backup [green]{stack_backup_name}[/]."
+                )
+        except DataSafeHavenAzureError as exc:
+            if "blob does not exist" in str(exc):
+                self.logger.warning(
+                    f"Pulumi stack backup [green]{stack_backup_name}[/] could not be removed."
+                )
+            else:
+                msg = "Pulumi stack backup could not be removed."
+                raise DataSafeHavenPulumiError(msg) from exc
+
+    def remove_stack_blobs(self, azure_sdk: AzureSdk) -> None:
+        """Remove the stack outputs snapshot and deployed config fingerprint."""
+        for blob_name in (self.outputs_snapshot_name, self.deployed_config_name):
+            self.logger.debug(f"Removing [green]{blob_name}[/].")
+            if azure_sdk.blob_exists(
+                blob_name=blob_name,
+                resource_group_name=self.context.resource_group_name,
+                storage_account_name=self.context.storage_account_name,
+                storage_container_name=self.context.storage_container_name,
+            ):
+                azure_sdk.remove_blob(
+                    blob_name=blob_name,
+                    resource_group_name=self.context.resource_group_name,
+                    storage_account_name=self.context.storage_account_name,
+                    storage_container_name=self.context.storage_container_name,
+                )
+
+    def resource_type_targets(
+        self,
+        resource_types: Collection[str],
+        *,
+        components: Collection[str] | None = None,
+    ) -> list[str]:
+        """
+        Get Pulumi targets matching every resource of the given types.
+
+        If components are given, only resources inside those components are matched.
+        """
+        component_patterns = (
+            [
+                f"**{self.program.components[component]}"
+                for component in sorted(components)
+            ]
+            if components
+            else [""]
+        )
+        return [
+            f"urn:pulumi:{self.stack_name}::*::{component_pattern}**{resource_type}::**"
+            for component_pattern in component_patterns
+            for resource_type in resource_types
+        ]
+
     def run_pulumi_command(self, command: str) -> str:
         """Run a Pulumi non-interactive CLI command using this project and stack."""
         try:
@@ -394,25 +756,47 @@ class ProjectManager:
 
     def teardown(self, *, force: bool = False) -> None:
         """Teardown the infrastructure deployed with Pulumi."""
+        self.phase_timings = {}
         try:
             if force:
-                self.cancel()
-            self.refresh()
-            self.destroy()
-            self.cleanup()
+                self.timed("cancel", self.cancel)
+            self.timed("refresh", self.refresh)
+            self.timed("destroy", self.destroy)
+            self.timed("cleanup", self.cleanup)
         except Exception as exc:
             msg = "Tearing down Pulumi infrastructure failed.."
             raise DataSafeHavenPulumiError(msg) from exc
+        finally:
+            if self.phase_timings:
+                timings = ", ".join(
+                    f"{name} {elapsed:.0f}s"
+                    for name, elapsed in self.phase_timings.items()
+                )
+                self.logger.info(f"Teardown timings: {timings}.")
 
-    def update(self) -> None:
+    def timed(self, name: str, step: Callable[[], None]) -> None:
+        """Run a step, recording how long it took."""
+        started = time.monotonic()
+        try:
+            step()
+        finally:
+            elapsed = time.monotonic() - started
+            self.phase_timings[name] = elapsed
+            self.logger.debug(f"Finished [green]{name}[/] in {elapsed:.1f}s.")
+
+    def update(self, *, targets: list[str] | None = None) -> None:
         """Update deployed infrastructure."""
         try:
             self.logger.info(f"Applying changes to stack [green]{self.stack.name}[/].")
-            result = self.stack.up(
-                **self.pulumi_extra_args,
-            )
+            with self.progress:
+                result = self.stack.up(
+                    target=targets,
+                    target_dependents=bool(targets) or None,
+                    **self.pulumi_extra_args,
+                )
             self.evaluate(result.summary.result)
             self.update_dsh_pulumi_project()
+            self.write_outputs_snapshot(result.summary.version)
         except automation.CommandError as exc:
             self.log_exception(exc)
             msg = "Pulumi update failed."
@@ -435,6 +819,79 @@ class ProjectManager:
             msg = "Stack encrypted key does not match project encrypted key"
             raise DataSafeHavenPulumiError(msg)
 
+    def write_deployed_config(self, components: Collection[str] | None) -> None:
+        """
+        Record a fingerprint of the configuration which has been deployed.
+
+        After a targeted deployment, settings are only recorded if every component
+        which uses them was deployed.
+        """
+        fingerprint = self.program.config_fingerprint()
+        if components:
+            # Keep the previous fingerprint of settings used by other components
+            previous = self.load_deployed_config()
+            for key in list(fingerprint):
+                used_by = self.program.config_components.get(key)
+                if used_by is None or not set(used_by) <= set(components):
+                    if key in previous:
+                        fingerprint[key] = previous[key]
+                    else:
+                        del fingerprint[key]
+        try:
+            azure_sdk = AzureSdk(self.context.subscription_name)
+            azure_sdk.upload_blob(
+                json.dumps(fingerprint),
+                self.deployed_config_name,
+                self.context.resource_group_name,
+                self.context.storage_account_name,
+                self.context.storage_container_name,
+            )
+        except DataSafeHavenError as exc:
+            self.logger.warning(
+                f"Could not save deployed configuration for stack [green]{self.stack_name}[/]: {exc}"
+            )
+
+    def write_outputs_snapshot(self, version: int) -> None:
+        """
+        Snapshot the non-secret stack outputs after an update.
+
+        The snapshot records the update version and the ETag of the stack checkpoint,
+        which lets readers tell whether the stack has changed since. Failing to write
+        a snapshot is not an error, as readers fall back to the live stack.
+        """
+        try:
+            self._stack_outputs = self.stack.outputs()
+            self._snapshot_outputs = None
+            azure_sdk = AzureSdk(self.context.subscription_name)
+            snapshot = {
+                "version": version,
+                "checkpoint_etag": azure_sdk.get_blob_etag(
+                    self.checkpoint_blob_name,
+                    self.context.resource_group_name,
+                    self.context.storage_account_name,
+                    self.context.pulumi_storage_container_name,
+                ),
+                "outputs": {
+                    name: output.value
+                    for name, output in self._stack_outputs.items()
+                    if not output.secret
+                },
+            }
+            azure_sdk.upload_blob(
+                json.dumps(snapshot),
+                self.outputs_snapshot_name,
+                self.context.resource_group_name,
+                self.context.storage_account_name,
+                self.context.storage_container_name,
+            )
+            self.logger.debug(
+                f"Saved outputs snapshot for stack [green]{self.stack_name}[/]."
+            )
+        except (automation.CommandError, DataSafeHavenError) as exc:
+            self.logger.warning(
+                f"Could not save outputs snapshot for stack [green]{self.stack_name}[/]: {exc}"
+            )
+
 
 class SREProjectManager(ProjectManager):
     """Interact with an SRE using Pulumi"""
@@ -0,0 +1,227 @@
+"""Render Pulumi engine events as a live progress display"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import ClassVar, Self
+
+from pulumi.automation import EngineEvent, OpType, StepEventMetadata
+from rich.console import Console, Group, RenderableType
+from rich.live import Live
+from rich.markup import escape
+from rich.table import Table
+from rich.text import Text
+
+from data_safe_haven.logging import get_logger
+
+
+@dataclass
+class ResourceProgress:
+    """Progress of a single resource operation"""
+
+    name: str
+    op: OpType
+    planning: bool
+    resource_type: str
+    started: float
+    failed: bool = False
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def status(self) -> Text:
+        if self.planning:
+            return Text(f"{self.op.value} planned", style="cyan")
+        if self.failed:
+            return Text(f"{self.op.value} failed", style="red")
+        if self.finished:
+            return Text(f"{self.op.value} done", style="green")
+        return Text(f"{self.op.value}...", style="yellow")
+
+
+class PulumiProgress:
+    """
+    Render Pulumi engine events as a compact progress table
+
+    Engine events only update in-memory state. The table is drawn from this state
+    by a Rich Live display, so it is redrawn at a bounded frame rate however many
+    events Pulumi emits. Raw Pulumi output is buffered and appended straight to the
+    log file, bypassing the console and any markup processing.
+    """
+
+    flush_lines: ClassVar[int] = 500
+    max_rows: ClassVar[int] = 12
+    refresh_per_second: ClassVar[float] = 4
+    # Disable when several processes share a terminal, as their displays would clash
+    show_live: ClassVar[bool] = True
+
+    def __init__(self, console: Console, log_file: Path | None = None) -> None:
+        self._buffer: list[str] = []
+        self._live: Live | None = None
+        self._lock = threading.Lock()
+        self.console = console
+        self.errors: dict[str, list[str]] = {}
+        self.log_file = log_file
+        self.logger = get_logger()
+        self.resources: dict[str, ResourceProgress] = {}
+        self.resource_changes: dict[str, int] = {}
+
+    def __enter__(self) -> Self:
+        self._buffer = []
+        self.errors = {}
+        self.resources = {}
+        self.resource_changes = {}
+        if self.show_live:
+            self._live = Live(
+                self,
+                console=self.console,
+                refresh_per_second=self.refresh_per_second,
+                transient=True,
+            )
+            self._live.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._live:
+            self._live.stop()
+            self._live = None
+        self.flush()
+        for resource in self.resources.values():
+            if resource.planning:
+                self.logger.info(
+                    f"Pulumi will {resource.op.value} [green]{escape(resource.name)}[/]"
+                    f" ({resource.resource_type})."
+                )
+        if self.resource_changes:
+            changes = ", ".join(
+                f"{count} {op}" for op, count in sorted(self.resource_changes.items())
+            )
+            self.logger.info(f"Pulumi resource changes: {changes}.")
+
+    def __rich__(self) -> RenderableType:
+        with self._lock:
+            resources = list(self.resources.values())
+        counts = Counter(
+            "failed" if r.failed else "done" if r.finished else "in progress"
+            for r in resources
+        )
+        # Show failures first, then the longest running active operations
+        shown = sorted(
+            (r for r in resources if r.failed or not r.finished),
+            key=lambda r: (not r.failed, r.started),
+        )[: self.max_rows]
+        table = Table(box=None, expand=False)
+        table.add_column("Resource", overflow="ellipsis", max_width=48)
+        table.add_column("Type", overflow="ellipsis", max_width=48)
+        table.add_column("Status")
+        table.add_column("Elapsed", justify="right")
+        for resource in shown:
+            table.add_row(
+                resource.name,
+                resource.resource_type,
+                resource.status,
+                f"{resource.elapsed:.0f}s",
+            )
+        summary = Text(
+            f"{counts['done']} done, {counts['in progress']} in progress,"
+            f" {counts['failed']} failed"
+        )
+        return Group(table, summary) if shown else summary
+
+    @property
+    def failed_urns(self) -> list[str]:
+        """URNs of the resources whose operations failed"""
+        with self._lock:
+            return [urn for urn, resource in self.resources.items() if resource.failed]
+
+    def failed_urns_matching(self, patterns: tuple[str, ...]) -> list[str]:
+        """URNs of the failed resources whose own errors contain one of the patterns"""
+        with self._lock:
+            return [
+                urn
+                for urn, resource in self.resources.items()
+                if resource.failed
+                and any(
+                    pattern in message
+                    for message in self.errors.get(urn, [])
+                    for pattern in patterns
+                )
+            ]
+
+    def flush(self) -> None:
+        """Append any buffered raw output to the log file, if there is one"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines and self.log_file:
+            try:
+                with open(self.log_file, "a", encoding="utf8") as f_log:
+                    f_log.writelines(lines)
+            except OSError as exc:
+                self.logger.debug(f"Could not write Pulumi output to log file. {exc}")
+
+    def on_event(self, event: EngineEvent) -> None:
+        """Update progress from a Pulumi engine event"""
+        if event.resource_pre_event:
+            self.start_resource(
+                event.resource_pre_event.metadata,
+                planning=bool(event.resource_pre_event.planning),
+            )
+        elif event.res_outputs_event:
+            self.finish_resource(event.res_outputs_event.metadata, failed=False)
+        elif event.res_op_failed_event:
+            self.finish_resource(event.res_op_failed_event.metadata, failed=True)
+        elif event.diagnostic_event:
+            diagnostic = event.diagnostic_event
+            if not diagnostic.ephemeral and diagnostic.severity == "error":
+                if diagnostic.urn:
+                    with self._lock:
+                        self.errors.setdefault(diagnostic.urn, []).append(
+                            diagnostic.message
+                        )
+                self.logger.error(f"Pulumi: {escape(diagnostic.message.strip())}")
+            elif not diagnostic.ephemeral and diagnostic.severity == "warning":
+                self.logger.warning(f"Pulumi: {escape(diagnostic.message.strip())}")
+        elif event.summary_event:
+            self.resource_changes = {
+                str(op): count
+                for op, count in event.summary_event.resource_changes.items()
+                if op != OpType.SAME
+            }
+
+    def on_output(self, line: str) -> None:
+        """Buffer a line of raw Pulumi output for the log file"""
+        with self._lock:
+            self._buffer.append(f"{line}\n")
+            full = len(self._buffer) >= self.flush_lines
+        if full:
+            self.flush()
+
+    def finish_resource(self, metadata: StepEventMetadata, *, failed: bool) -> None:
+        with self._lock:
+            if resource := self.resources.get(metadata.urn):
+                resource.failed = failed
+                resource.finished = time.monotonic()
+
+    def start_resource(self, metadata: StepEventMetadata, *, planning: bool) -> None:
+        # Unchanged resources are not worth displaying
+        if metadata.op == OpType.SAME:
+            return
+        with self._lock:
+            self.resources[metadata.urn] = ResourceProgress(
+                name=metadata.urn.split("::")[-1],
+                op=metadata.op,
+                planning=planning,
+                resource_type=metadata.type,
+                started=time.monotonic(),
+            )
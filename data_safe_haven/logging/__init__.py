@@ -1,5 +1,6 @@
 from .logger import (
     get_console_handler,
+    get_file_handler,
     get_logger,
     get_null_logger,
     init_logging,
@@ -9,6 +10,7 @@ from .logger import (
 
 __all__ = [
     "get_console_handler",
+    "get_file_handler",
     "get_logger",
     "get_null_logger",
     "init_logging",
@@ -12,8 +12,14 @@ from .non_logging_singleton import NonLoggingSingleton
 from .plain_file_handler import PlainFileHandler
 
 
-def get_console_handler() -> RichHandler:
-    return next(h for h in get_logger().handlers if isinstance(h, RichHandler))
+def get_console_handler() -> RichHandler | None:
+    return next((h for h in get_logger().handlers if isinstance(h, RichHandler)), None)
+
+
+def get_file_handler() -> PlainFileHandler | None:
+    return next(
+        (h for h in get_logger().handlers if isinstance(h, PlainFileHandler)), None
+    )
 
 
 def get_logger() -> logging.Logger:
@@ -77,8 +83,10 @@ def logfile_name() -> str:
 
 
 def set_console_level(level: int | str) -> None:
-    get_console_handler().setLevel(level)
+    if console_handler := get_console_handler():
+        console_handler.setLevel(level)
 
 
 def show_console_level() -> None:
-    get_console_handler()._log_render.show_level = True
+    if console_handler := get_console_handler():
+        console_handler._log_render.show_level = True
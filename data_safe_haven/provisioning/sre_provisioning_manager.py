@@ -27,6 +27,7 @@ class SREProvisioningManager:
         timezone: str,
     ):
         self._available_vm_skus: dict[str, dict[str, Any]] | None = None
+        self.azure_sdk = AzureSdk(subscription_name)
         self.location = location
         self.graph_api = GraphApi.from_token(graph_api_token)
         self.logger = get_logger()
@@ -36,8 +37,7 @@ class SREProvisioningManager:
         # Read secrets from key vault
         keyvault_name = sre_stack.output("data")["key_vault_name"]
         secret_name = sre_stack.output("data")["password_user_database_admin_secret"]
-        azure_sdk = AzureSdk(self.subscription_name)
-        connection_db_server_password = azure_sdk.get_keyvault_secret(
+        connection_db_server_password = self.azure_sdk.get_keyvault_secret(
             keyvault_name, secret_name
         )
 
@@ -67,8 +67,9 @@ class SREProvisioningManager:
     def available_vm_skus(self) -> dict[str, dict[str, Any]]:
         """Load available VM SKUs for this region"""
         if not self._available_vm_skus:
-            azure_sdk = AzureSdk(self.subscription_name)
-            self._available_vm_skus = azure_sdk.list_available_vm_skus(self.location)
+            self._available_vm_skus = self.azure_sdk.list_available_vm_skus(
+                self.location
+            )
         return self._available_vm_skus
 
     def restart_remote_desktop_containers(self) -> None:
@@ -0,0 +1,292 @@
+#! /usr/bin/env python
+"""Benchmark the throughput and latency of workspace storage mounts
+
+Each directory is benchmarked in a temporary subdirectory which is removed
+afterwards. Results are printed as JSON so that different VM SKUs and mount options
+can be compared. Any directory can be benchmarked, so this can be run against local
+directories when testing offline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+MIB = 1024 * 1024
+
+
+def drop_cache(fd: int) -> None:
+    """Ask the kernel to drop cached pages so that reads reach the storage"""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def mount_info(directory: Path) -> dict[str, str] | None:
+    """Find the mount containing a directory, with its filesystem type and options"""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f_mounts:
+            mounts = [line.split() for line in f_mounts if line.strip()]
+    except OSError:
+        return None
+    resolved = directory.resolve()
+    best: list[str] | None = None
+    for mount in mounts:
+        mount_point = Path(mount[1].replace("\\040", " "))
+        if resolved.is_relative_to(mount_point) and (
+            best is None or len(mount_point.parts) > len(Path(best[1]).parts)
+        ):
+            best = mount
+    if not best:
+        return None
+    return {
+        "device": best[0],
+        "mount_point": best[1],
+        "fstype": best[2],
+        "options": best[3],
+    }
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Summarise latency samples in milliseconds"""
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.5) * 1000, 3),
+        "p95_ms": round(percentile(0.95) * 1000, 3),
+        "p99_ms": round(percentile(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def timed(operation: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    operation()
+    return max(time.perf_counter() - started, 1e-6)
+
+
+def sequential_write(path: Path, size: int, block_size: int) -> dict[str, float]:
+    """Write a file in large blocks, including the time taken to flush it"""
+    block = os.urandom(block_size)
+
+    def write() -> None:
+        with open(path, "wb", buffering=0) as f_out:
+            for _ in range(size // block_size):
+                f_out.write(block)
+            os.fsync(f_out.fileno())
+            drop_cache(f_out.fileno())
+
+    elapsed = timed(write)
+    return {
+        "mib_per_second": round(size / MIB / elapsed, 2),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def sequential_read(path: Path, block_size: int) -> dict[str, float]:
+    """Read a whole file in large blocks"""
+    size = 0
+
+    def read() -> None:
+        nonlocal size
+        with open(path, "rb", buffering=0) as f_in:
+            while data := f_in.read(block_size):
+                size += len(data)
+            drop_cache(f_in.fileno())
+
+    elapsed = timed(read)
+    return {
+        "mib_per_second": round(size / MIB / elapsed, 2),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def random_io(
+    path: Path, block_size: int, operations: int, *, write: bool
+) -> dict[str, float]:
+    """Read or write small blocks at random aligned offsets in an existing file"""
+    blocks = path.stat().st_size // block_size
+    offsets = [
+        random.randrange(blocks) * block_size for _ in range(operations)  # noqa: S311
+    ]
+    block = os.urandom(block_size)
+
+    def run() -> None:
+        fd = os.open(path, os.O_RDWR if write else os.O_RDONLY)
+        try:
+            for offset in offsets:
+                if write:
+                    os.pwrite(fd, block, offset)
+                else:
+                    os.pread(fd, block_size, offset)
+            if write:
+                os.fsync(fd)
+            drop_cache(fd)
+        finally:
+            os.close(fd)
+
+    elapsed = timed(run)
+    return {
+        "iops": round(operations / elapsed, 1),
+        "mib_per_second": round(operations * block_size / MIB / elapsed, 2),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def small_files(directory: Path, count: int, file_size: int) -> dict[str, float]:
+    """Measure the rates at which small files can be created, inspected and removed"""
+    paths = [directory / f"small-{idx:06d}" for idx in range(count)]
+    data = os.urandom(file_size)
+
+    def create() -> None:
+        for path in paths:
+            with open(path, "wb") as f_out:
+                f_out.write(data)
+
+    def stat() -> None:
+        for path in paths:
+            path.stat()
+
+    def delete() -> None:
+        for path in paths:
+            path.unlink()
+
+    return {
+        "create_per_second": round(count / timed(create), 1),
+        "stat_per_second": round(count / timed(stat), 1),
+        "delete_per_second": round(count / timed(delete), 1),
+    }
+
+
+def fsync_latency(path: Path, operations: int, block_size: int) -> dict[str, float]:
+    """Measure the latency of small writes which are each flushed to storage"""
+    block = os.urandom(block_size)
+    samples = []
+    with open(path, "wb", buffering=0) as f_out:
+        for _ in range(operations):
+            started = time.perf_counter()
+            f_out.write(block)
+            os.fsync(f_out.fileno())
+            samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def benchmark_directory(directory: Path, args: argparse.Namespace) -> dict[str, Any]:
+    """Run every benchmark in a temporary subdirectory of a directory"""
+    result: dict[str, Any] = {
+        "directory": str(directory),
+        "mount": mount_info(directory),
+    }
+    if not directory.is_dir():
+        result["error"] = "Directory does not exist."
+        return result
+    try:
+        work_dir = Path(tempfile.mkdtemp(prefix=".dsh-benchmark-", dir=directory))
+    except OSError as exc:
+        # Read-only mounts such as /mnt/input cannot be benchmarked
+        result["error"] = f"Directory is not writable: {exc.strerror}."
+        return result
+    try:
+        data_file = work_dir / "sequential.dat"
+        result["sequential_write"] = sequential_write(
+            data_file, args.size_mib * MIB, args.block_size_kib * 1024
+        )
+        result["sequential_read"] = sequential_read(
+            data_file, args.block_size_kib * 1024
+        )
+        result["random_write"] = random_io(
+            data_file, args.random_block_size_kib * 1024, args.random_ops, write=True
+        )
+        result["random_read"] = random_io(
+            data_file, args.random_block_size_kib * 1024, args.random_ops, write=False
+        )
+        data_file.unlink()
+        result["small_files"] = small_files(
+            work_dir, args.small_files, args.small_file_size_kib * 1024
+        )
+        result["fsync_latency"] = fsync_latency(
+            work_dir / "fsync.dat", args.fsync_ops, args.random_block_size_kib * 1024
+        )
+    except OSError as exc:
+        result["error"] = f"Benchmark failed: {exc}."
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def main() -> int:
+    """Benchmark each directory and print the results as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "directories", nargs="+", type=Path, help="Directories to benchmark"
+    )
+    parser.add_argument(
+        "--size-mib", type=int, default=256, help="Size of the sequential test file"
+    )
+    parser.add_argument(
+        "--block-size-kib", type=int, default=1024, help="Block size for sequential IO"
+    )
+    parser.add_argument(
+        "--random-block-size-kib", type=int, default=4, help="Block size for random IO"
+    )
+    parser.add_argument(
+        "--random-ops", type=int, default=2000, help="Number of random IO operations"
+    )
+    parser.add_argument(
+        "--small-files", type=int, default=500, help="Number of small files"
+    )
+    parser.add_argument(
+        "--small-file-size-kib", type=int, default=4, help="Size of each small file"
+    )
+    parser.add_argument(
+        "--fsync-ops", type=int, default=200, help="Number of flushed writes"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Write JSON to this file instead of stdout"
+    )
+    args = parser.parse_args()
+    if args.size_mib * 1024 < args.block_size_kib:
+        parser.error("--size-mib must be at least one block")
+
+    results = [benchmark_directory(directory, args) for directory in args.directories]
+    report = {
+        "hostname": platform.node(),
+        # Workspaces run Python 3.10, which has no datetime.UTC
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),  # noqa: UP017
+        "parameters": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("directories", "output")
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(f"{output}\n", encoding="utf-8")
+    else:
+        print(output)  # noqa: T201
+    # Unwritable directories are reported but only missing directories or failed
+    # benchmarks are errors
+    failed = [
+        result
+        for result in results
+        if result.get("error", "").startswith(("Directory does not", "Benchmark"))
+    ]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
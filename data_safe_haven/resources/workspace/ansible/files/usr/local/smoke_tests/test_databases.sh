@@ -1,8 +1,10 @@
 #! /bin/bash
 db_type=""
 language=""
-while getopts d:l: flag; do
+benchmark_args=()
+while getopts bd:l: flag; do
     case "${flag}" in
+    b) benchmark_args=(--benchmark) ;;
     d) db_type=${OPTARG} ;;
     l) language=${OPTARG} ;;
     *)
@@ -44,7 +46,7 @@ if [ "$port" == "" ]; then
 else
     script_path=$(dirname "$(readlink -f "$0")")
     if [ "$language" == "python" ]; then
-        python "${script_path}"/test_databases_python.py --db-type "$db_type" --db-name "$db_name" --port "$port" --server-name "$server_name" --hostname "$hostname" --username "$username" --password "$password" || exit 1
+        python "${script_path}"/test_databases_python.py --db-type "$db_type" --db-name "$db_name" --port "$port" --server-name "$server_name" --hostname "$hostname" --username "$username" --password "$password" "${benchmark_args[@]}" || exit 1
     elif [ "$language" == "R" ]; then
         Rscript "${script_path}"/test_databases_R.R "$db_type" "$db_name" "$port" "$server_name" "$hostname" "$username" "$password" || exit 1
     fi
@@ -1,14 +1,47 @@
 #! /usr/bin/env python
 import argparse
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
 
 import pandas as pd
 import psycopg
 import pymssql
 
 
+def connect(
+    server_name: str,
+    hostname: str | None,
+    port: int,
+    db_type: str,
+    db_name: str,
+    username: str,
+    password: str,
+) -> Any:
+    if db_type == "mssql":
+        username_full = f"{username}@{hostname}" if hostname else username
+        return pymssql.connect(
+            server=server_name,
+            port=str(port),
+            user=username_full,
+            password=password,
+            database=db_name,
+        )
+    if db_type == "postgresql":
+        connection_string = f"host={server_name} port={port} dbname={db_name} user={username} password={password}"
+        return psycopg.connect(connection_string)
+    msg = f"Database type '{db_type}' was not recognised"
+    raise ValueError(msg)
+
+
 def test_database(
     server_name: str,
-    hostname: str,
+    hostname: str | None,
     port: int,
     db_type: str,
     db_name: str,
@@ -17,18 +50,7 @@ def test_database(
 ) -> None:
     msg = f"Attempting to connect to '{db_name}' on '{server_name}' via port {port}"
     print(msg)  # noqa: T201
-    username_full = f"{username}@{hostname}"
-    cnxn = None
-    if db_type == "mssql":
-        cnxn = pymssql.connect(
-            server=server_name, user=username_full, password=password, database=db_name
-        )
-    elif db_type == "postgresql":
-        connection_string = f"host={server_name} port={port} dbname={db_name} user={username} password={password}"
-        cnxn = psycopg.connect(connection_string)
-    else:
-        msg = f"Database type '{db_type}' was not recognised"
-        raise ValueError(msg)
+    cnxn = connect(server_name, hostname, port, db_type, db_name, username, password)
     df = pd.read_sql("SELECT * FROM information_schema.tables;", cnxn)
     if df.size:
         print(df.head(5))  # noqa: T201
@@ -38,6 +60,243 @@ def test_database(
         raise ValueError(msg)
 
 
+def latencies(samples: list[float]) -> dict[str, float]:
+    """Summarise latency samples in milliseconds"""
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.5) * 1000, 3),
+        "p95_ms": round(percentile(0.95) * 1000, 3),
+        "p99_ms": round(percentile(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class DatabaseBenchmark:
+    """
+    Measure the performance of a database as seen from a workspace
+
+    Each benchmark runs on several workers at once, each with its own connection,
+    and reports the combined throughput over the whole run. Temporary tables are used
+    for inserts so nothing is left behind in the database.
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        db_type: str,
+        *,
+        concurrency: int,
+        connections: int,
+        fetch_rows: int,
+        insert_rows: int,
+        queries: int,
+    ) -> None:
+        self.concurrency = concurrency
+        self.connection_factory = connection_factory
+        self.connections = connections
+        self.db_type = db_type
+        self.fetch_rows = fetch_rows
+        self.insert_rows = insert_rows
+        self.queries = queries
+
+    @property
+    def table_name(self) -> str:
+        # MS SQL temporary tables are identified by their name
+        return "#dsh_benchmark" if self.db_type == "mssql" else "dsh_benchmark"
+
+    def concurrently(self, worker: Callable[[], Any]) -> tuple[list[Any], float]:
+        """Run a worker on every connection at once, returning results and time"""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(worker) for _ in range(self.concurrency)]
+            results = [future.result() for future in futures]
+        return results, max(time.perf_counter() - started, 1e-6)
+
+    def run(self) -> dict[str, Any]:
+        return {
+            "connection": self.connection_latency(),
+            "round_trip": self.round_trip(),
+            "bulk_insert": self.bulk_insert(),
+            "large_fetch": self.large_fetch(),
+        }
+
+    def connection_latency(self) -> dict[str, Any]:
+        """Time how long it takes to open new connections"""
+
+        def worker() -> list[float]:
+            samples = []
+            for _ in range(self.connections):
+                started = time.perf_counter()
+                cnxn = self.connection_factory()
+                samples.append(time.perf_counter() - started)
+                cnxn.close()
+            return samples
+
+        results, elapsed = self.concurrently(worker)
+        samples = [sample for result in results for sample in result]
+        return {
+            "connections_per_second": round(len(samples) / elapsed, 1),
+            **latencies(samples),
+        }
+
+    def round_trip(self) -> dict[str, Any]:
+        """Time trivial queries over an open connection"""
+
+        def worker() -> list[float]:
+            samples = []
+            with self.connection_factory() as cnxn:
+                cursor = cnxn.cursor()
+                for _ in range(self.queries):
+                    started = time.perf_counter()
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                    samples.append(time.perf_counter() - started)
+            return samples
+
+        results, elapsed = self.concurrently(worker)
+        samples = [sample for result in results for sample in result]
+        return {
+            "queries_per_second": round(len(samples) / elapsed, 1),
+            **latencies(samples),
+        }
+
+    def bulk_insert(self) -> dict[str, Any]:
+        """Compare inserting rows one at a time with batched and bulk inserts"""
+        rows = [(idx, f"row-{idx:012d}") for idx in range(self.insert_rows)]
+        insert = (
+            f"INSERT INTO {self.table_name} (id, label) VALUES (%s, %s)"  # noqa: S608
+        )
+
+        def row_by_row(cursor: Any) -> None:
+            for row in rows:
+                cursor.execute(insert, row)
+
+        def executemany(cursor: Any) -> None:
+            cursor.executemany(insert, rows)
+
+        def copy(cursor: Any) -> None:
+            with cursor.copy(f"COPY {self.table_name} (id, label) FROM STDIN") as cp:
+                for row in rows:
+                    cp.write_row(row)
+
+        methods: dict[str, Callable[[Any], None]] = {
+            "row_by_row": row_by_row,
+            "executemany": executemany,
+        }
+        # COPY is specific to PostgreSQL
+        if self.db_type == "postgresql":
+            methods["copy"] = copy
+        return {
+            name: self.insert_with(method, len(rows))
+            for name, method in methods.items()
+        }
+
+    def insert_with(self, method: Callable[[Any], None], n_rows: int) -> dict[str, Any]:
+        """Insert rows into a temporary table on each connection and commit them"""
+
+        def worker() -> float:
+            with self.connection_factory() as cnxn:
+                cursor = cnxn.cursor()
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {self.table_name} (id INTEGER, label VARCHAR(32))"
+                    if self.db_type == "postgresql"
+                    else f"CREATE TABLE {self.table_name} (id INTEGER, label VARCHAR(32))"
+                )
+                cnxn.commit()
+                started = time.perf_counter()
+                method(cursor)
+                cnxn.commit()
+                return time.perf_counter() - started
+
+        results, elapsed = self.concurrently(worker)
+        return {
+            "rows_per_second": round(n_rows * len(results) / elapsed, 1),
+            "seconds": round(elapsed, 3),
+            "slowest_worker_seconds": round(max(results), 3),
+        }
+
+    def large_fetch(self) -> dict[str, Any]:
+        """Stream a large generated result set in batches"""
+        if self.db_type == "postgresql":
+            query = "SELECT g, md5(g::text) FROM generate_series(1, %s) AS g"
+        else:
+            query = (
+                "SELECT TOP (%s) a.object_id, a.name"
+                " FROM sys.all_objects AS a CROSS JOIN sys.all_objects AS b"
+            )
+
+        def worker() -> int:
+            with self.connection_factory() as cnxn:
+                # Named cursors are held on the server so rows are sent in batches
+                # rather than all at once. pymssql always streams results.
+                cursor = (
+                    cnxn.cursor(name="dsh_benchmark")
+                    if self.db_type == "postgresql"
+                    else cnxn.cursor()
+                )
+                cursor.execute(query, (self.fetch_rows,))
+                n_rows = 0
+                while batch := cursor.fetchmany(10000):
+                    n_rows += len(batch)
+                cursor.close()
+                return n_rows
+
+        results, elapsed = self.concurrently(worker)
+        return {
+            "rows_per_second": round(sum(results) / elapsed, 1),
+            "rows": sum(results),
+            "seconds": round(elapsed, 3),
+        }
+
+
+def benchmark_database(
+    server_name: str,
+    hostname: str | None,
+    port: int,
+    db_type: str,
+    db_name: str,
+    username: str,
+    password: str,
+    args: argparse.Namespace,
+) -> None:
+    benchmark = DatabaseBenchmark(
+        lambda: connect(
+            server_name, hostname, port, db_type, db_name, username, password
+        ),
+        db_type,
+        concurrency=args.concurrency,
+        connections=args.connections,
+        fetch_rows=args.fetch_rows,
+        insert_rows=args.insert_rows,
+        queries=args.queries,
+    )
+    report = {
+        "hostname": platform.node(),
+        # Workspaces run Python 3.10, which has no datetime.UTC
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),  # noqa: UP017
+        "database": {"type": db_type, "server": server_name, "port": port},
+        "parameters": {
+            "concurrency": args.concurrency,
+            "connections": args.connections,
+            "fetch_rows": args.fetch_rows,
+            "insert_rows": args.insert_rows,
+            "queries": args.queries,
+        },
+        "results": benchmark.run(),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f_out:
+            f_out.write(f"{output}\n")
+    else:
+        print(output)  # noqa: T201
+
+
 # Parse command line arguments
 parser = argparse.ArgumentParser()
 parser.add_argument(
@@ -50,17 +309,54 @@ parser.add_argument("--db-name", type=str, help="Which database to connect to")
 parser.add_argument("--port", type=str, help="Which port to connect to")
 parser.add_argument("--server-name", type=str, help="Which server to connect to")
 parser.add_argument("--username", type=str, help="Database username")
-parser.add_argument("--hostname", type=str, help="Azure hostname of the server")
+parser.add_argument(
+    "--hostname",
+    type=str,
+    help="Azure hostname of the server (omit for a local MS SQL server)",
+)
 parser.add_argument("--password", type=str, help="Database user password")
+parser.add_argument(
+    "--benchmark",
+    action="store_true",
+    help="Measure database performance and print a JSON report",
+)
+parser.add_argument(
+    "--concurrency", type=int, default=1, help="Number of concurrent connections"
+)
+parser.add_argument(
+    "--connections", type=int, default=20, help="Connections to open per worker"
+)
+parser.add_argument(
+    "--fetch-rows", type=int, default=1000000, help="Rows in the large result set"
+)
+parser.add_argument(
+    "--insert-rows", type=int, default=10000, help="Rows to insert with each method"
+)
+parser.add_argument(
+    "--queries", type=int, default=500, help="Trivial queries per connection"
+)
+parser.add_argument("--output", type=str, help="Write the JSON report to this file")
 args = parser.parse_args()
 
 # Run database test
-test_database(
-    args.server_name,
-    args.hostname,
-    args.port,
-    args.db_type,
-    args.db_name,
-    args.username,
-    args.password,
-)
+if args.benchmark:
+    benchmark_database(
+        args.server_name,
+        args.hostname,
+        args.port,
+        args.db_type,
+        args.db_name,
+        args.username,
+        args.password,
+        args,
+    )
+else:
+    test_database(
+        args.server_name,
+        args.hostname,
+        args.port,
+        args.db_type,
+        args.db_name,
+        args.username,
+        args.password,
+    )
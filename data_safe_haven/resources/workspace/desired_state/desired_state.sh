@@ -0,0 +1,26 @@
+#!/usr/bin/env bash
+# Apply the desired state playbook from the current desired state bundle
+set -eu
+source=/var/local/ansible
+target=/var/local/desired_state
+
+# Wait for the first bundle to be uploaded
+for _ in $(seq 60); do
+    [ -f "${source}/bundle.sha256" ] && break
+    sleep 5
+done
+
+# Unpack the bundle whenever a new one has been uploaded
+bundle="$(cat "${source}/bundle.sha256")"
+if [ "$(cat "${target}/.bundle" 2> /dev/null)" != "${bundle}" ]; then
+    rm -rf "${target}.new"
+    mkdir -p "${target}.new"
+    tar -xzf "${source}/bundles/${bundle}.tar.gz" -C "${target}.new"
+    ln -s "${source}/vars" "${target}.new/vars"
+    echo "${bundle}" > "${target}.new/.bundle"
+    rm -rf "${target}"
+    mv "${target}.new" "${target}"
+fi
+
+cd "${target}"
+ansible-playbook desired_state.yaml
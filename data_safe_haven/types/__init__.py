@@ -22,6 +22,7 @@ from .enums import (
     NetworkingPriorities,
     PermittedDomains,
     Ports,
+    PulumiRefreshPolicy,
     SoftwarePackageCategory,
 )
 from .types import PathType
@@ -46,6 +47,7 @@ __all__ = [
     "PathType",
     "PermittedDomains",
     "Ports",
+    "PulumiRefreshPolicy",
     "SafeString",
     "SoftwarePackageCategory",
     "TimeZone",
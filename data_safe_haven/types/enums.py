@@ -187,6 +187,13 @@ class Ports(str, Enum):
     SQUID = "3128"
 
 
+@verify(UNIQUE)
+class PulumiRefreshPolicy(str, Enum):
+    ALL = "all"
+    DRIFT_PRONE = "drift-prone"
+    NONE = "none"
+
+
 @verify(UNIQUE)
 class SoftwarePackageCategory(str, Enum):
     ANY = "any"
@@ -0,0 +1,194 @@
+import hashlib
+from typing import IO
+
+from azure.core.exceptions import ResourceModifiedError, ServiceRequestError
+from azure.storage.blob import BlobProperties, ContentSettings
+from pytest import fixture, raises
+
+from data_safe_haven.administration.data import DataDownloader, DownloadCheckpoint
+from data_safe_haven.exceptions import DataSafeHavenAzureStorageError
+
+
+class FakeDownloader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def readinto(self, stream: IO[bytes]) -> int:
+        return stream.write(self.data)
+
+
+class FakeBlobClient:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.ranges: list[tuple[int, int]] = []
+
+    @property
+    def etag(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    def download_blob(
+        self, offset: int, length: int, etag: str, **kwargs  # noqa: ARG002
+    ) -> FakeDownloader:
+        if etag != self.etag:
+            raise ResourceModifiedError
+        self.ranges.append((offset, length))
+        return FakeDownloader(self.data[offset : offset + length])
+
+
+class FakeContainerClient:
+    def __init__(self, blobs: dict[str, bytes], md5s: dict[str, bytes]) -> None:
+        self.blob_clients = {name: FakeBlobClient(data) for name, data in blobs.items()}
+        self.container_name = "egress"
+        self.md5s = md5s
+
+    def get_blob_client(self, blob_name: str) -> FakeBlobClient:
+        return self.blob_clients[blob_name]
+
+    def list_blobs(
+        self, name_starts_with: str | None, **kwargs  # noqa: ARG002
+    ) -> list[BlobProperties]:
+        blobs = []
+        for name, blob_client in self.blob_clients.items():
+            if name_starts_with and not name.startswith(name_starts_with):
+                continue
+            blob = BlobProperties(name=name, metadata={})
+            blob.etag = blob_client.etag
+            blob.size = len(blob_client.data)
+            blob.content_settings = ContentSettings(content_md5=self.md5s.get(name))
+            blobs.append(blob)
+        blobs.append(
+            BlobProperties(name="outputs/figures", metadata={"hdi_isfolder": "true"})
+        )
+        return blobs
+
+
+def md5(data: bytes) -> bytes:
+    return hashlib.md5(data, usedforsecurity=False).digest()
+
+
+LARGE = bytes(range(256)) * 10
+RESULTS = b"a,b\n1,2\n"
+
+
+@fixture
+def container_client() -> FakeContainerClient:
+    return FakeContainerClient(
+        {
+            "outputs/figures/plot.png": LARGE,
+            "outputs/results.csv": RESULTS,
+            "scratch.txt": b"ignored",
+        },
+        {"outputs/figures/plot.png": md5(LARGE)},
+    )
+
+
+@fixture
+def downloader(container_client, tmp_path) -> DataDownloader:
+    return DataDownloader(
+        container_client,
+        DownloadCheckpoint(tmp_path / "checkpoint.jsonl"),
+        chunk_size=1000,
+        max_workers=2,
+    )
+
+
+@fixture
+def destination(tmp_path):
+    return tmp_path / "destination"
+
+
+class TestDataDownloader:
+    def test_download(self, container_client, destination, downloader):
+        summary = downloader.download(destination, "outputs/")
+        assert summary.failed == []
+        assert summary.downloaded == 2
+        assert (destination / "figures" / "plot.png").read_bytes() == LARGE
+        assert (destination / "results.csv").read_bytes() == RESULTS
+        assert not (destination / "scratch.txt").exists()
+        assert sorted(
+            container_client.blob_clients["outputs/figures/plot.png"].ranges
+        ) == [
+            (0, 1000),
+            (1000, 1000),
+            (2000, 560),
+        ]
+        assert (destination / "manifest.sha256").read_text() == (
+            f"{hashlib.sha256(LARGE).hexdigest()}  figures/plot.png\n"
+            f"{hashlib.sha256(RESULTS).hexdigest()}  results.csv\n"
+        )
+
+    def test_download_skips_checkpointed(
+        self, container_client, destination, downloader, tmp_path
+    ):
+        downloader.download(destination, "outputs/")
+        # A new downloader loads the checkpoint from disk
+        resumed = DataDownloader(
+            container_client,
+            DownloadCheckpoint(tmp_path / "checkpoint.jsonl"),
+            chunk_size=1000,
+        )
+        summary = resumed.download(destination, "outputs/")
+        # Blobs without a Content-MD5 are checked against their ETag
+        assert summary.skipped == 2
+        assert summary.downloaded == 0
+        assert (destination / "manifest.sha256").read_text().count("\n") == 2
+
+    def test_download_changed(self, container_client, destination, downloader):
+        downloader.download(destination, "outputs/")
+        container_client.blob_clients["outputs/results.csv"].data = b"a,b\n3,4\n"
+        (destination / "figures" / "plot.png").write_bytes(b"edited")
+        summary = downloader.download(destination, "outputs/")
+        assert summary.skipped == 0
+        assert summary.downloaded == 2
+        assert (destination / "results.csv").read_bytes() == b"a,b\n3,4\n"
+        assert (destination / "figures" / "plot.png").read_bytes() == LARGE
+
+    def test_download_skips_matching_md5(
+        self, container_client, destination, downloader, tmp_path
+    ):
+        downloader.download(destination, "outputs/")
+        container_client.blob_clients["outputs/figures/plot.png"].ranges = []
+        # Without a checkpoint only blobs with a Content-MD5 can be checked
+        resumed = DataDownloader(
+            container_client, DownloadCheckpoint(tmp_path / "other.jsonl")
+        )
+        summary = resumed.download(destination, "outputs/")
+        assert summary.skipped == 1
+        assert summary.downloaded == 1
+        assert container_client.blob_clients["outputs/figures/plot.png"].ranges == []
+
+    def test_download_range_fails(
+        self, container_client, destination, downloader, mocker
+    ):
+        mocker.patch.object(
+            container_client.blob_clients["outputs/figures/plot.png"],
+            "download_blob",
+            side_effect=ServiceRequestError(""),
+        )
+        summary = downloader.download(destination, "outputs/")
+        assert summary.failed == ["outputs/figures/plot.png"]
+        assert "outputs/figures/plot.png" not in downloader.checkpoint.entries
+        # Every range slot is released after a failure
+        for _ in range(2 * downloader.max_workers):
+            assert downloader._range_slots.acquire(blocking=False)
+
+    def test_download_list_fails(
+        self, container_client, destination, downloader, mocker
+    ):
+        mocker.patch.object(
+            container_client, "list_blobs", side_effect=ServiceRequestError("")
+        )
+        with raises(DataSafeHavenAzureStorageError, match="Could not list blobs"):
+            downloader.download(destination, "outputs/")
+
+    def test_download_mismatch(self, container_client, destination, downloader):
+        container_client.md5s["outputs/results.csv"] = md5(b"different")
+        summary = downloader.download(destination, "outputs/")
+        assert summary.failed == ["outputs/results.csv"]
+        assert not (destination / "results.csv").exists()
+        assert not (destination / "results.csv.partial").exists()
+        assert "results.csv" not in (destination / "manifest.sha256").read_text()
+
+    def test_destination_path_outside(self, downloader, tmp_path):
+        with raises(DataSafeHavenAzureStorageError, match="cannot be saved inside"):
+            downloader.destination_path(tmp_path, "outputs/../../secret", "outputs/")
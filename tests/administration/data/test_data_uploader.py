@@ -0,0 +1,189 @@
+import base64
+import hashlib
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobBlock, BlobProperties, ContentSettings
+from pytest import fixture, raises
+
+from data_safe_haven.administration.data import DataUploader, UploadCheckpoint
+from data_safe_haven.exceptions import DataSafeHavenAzureStorageError
+
+
+class FakeBlobClient:
+    def __init__(self, store: dict[str, bytes], blob_name: str) -> None:
+        self.blob_name = blob_name
+        self.content_md5: bytes | None = None
+        self.staged: dict[str, bytes] = {}
+        self.store = store
+
+    def commit_block_list(
+        self, block_list: list[BlobBlock], *, content_settings: ContentSettings
+    ) -> None:
+        self.store[self.blob_name] = b"".join(
+            self.staged[block.id] for block in block_list
+        )
+        self.content_md5 = content_settings.content_md5
+
+    def get_blob_properties(self) -> BlobProperties:
+        properties = BlobProperties()
+        properties.size = len(self.store[self.blob_name])
+        properties.content_settings = ContentSettings(content_md5=self.content_md5)
+        return properties
+
+    def get_block_list(self, _: str) -> tuple[list[BlobBlock], list[BlobBlock]]:
+        if not self.staged:
+            raise ResourceNotFoundError
+        blocks = []
+        for block_id, data in self.staged.items():
+            block = BlobBlock(block_id)
+            block.size = len(data)
+            blocks.append(block)
+        return [], blocks
+
+    def stage_block(
+        self, block_id: str, data: bytes, *, validate_content: bool  # noqa: ARG002
+    ) -> None:
+        self.staged[block_id] = data
+
+    def upload_blob(
+        self,
+        data: bytes,
+        *,
+        content_settings: ContentSettings,
+        overwrite: bool,  # noqa: ARG002
+        validate_content: bool,  # noqa: ARG002
+    ) -> None:
+        self.store[self.blob_name] = data
+        self.content_md5 = content_settings.content_md5
+
+
+class FakeContainerClient:
+    container_name = "ingress"
+
+    def __init__(self) -> None:
+        self.blob_clients: dict[str, FakeBlobClient] = {}
+        self.store: dict[str, bytes] = {}
+
+    def get_blob_client(self, blob_name: str) -> FakeBlobClient:
+        if blob_name not in self.blob_clients:
+            self.blob_clients[blob_name] = FakeBlobClient(self.store, blob_name)
+        return self.blob_clients[blob_name]
+
+
+@fixture
+def container_client() -> FakeContainerClient:
+    return FakeContainerClient()
+
+
+@fixture
+def source(tmp_path):
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    (source / "small.txt").write_bytes(b"hello")
+    (source / "nested" / "large.bin").write_bytes(bytes(range(256)) * 10)
+    return source
+
+
+@fixture
+def uploader(container_client, tmp_path) -> DataUploader:
+    return DataUploader(
+        container_client,
+        UploadCheckpoint(tmp_path / "checkpoint.jsonl"),
+        block_size=1000,
+        max_workers=2,
+    )
+
+
+class TestDataUploader:
+    def test_upload(self, container_client, source, uploader):
+        summary = uploader.upload(source, "data/")
+        assert summary.failed == []
+        assert summary.uploaded == 2
+        assert summary.uploaded_bytes == 2565
+        assert container_client.store == {
+            "data/nested/large.bin": bytes(range(256)) * 10,
+            "data/small.txt": b"hello",
+        }
+        large = container_client.blob_clients["data/nested/large.bin"]
+        assert len(large.staged) == 3
+        assert (
+            large.content_md5
+            == hashlib.md5(bytes(range(256)) * 10, usedforsecurity=False).digest()
+        )
+
+    def test_upload_skips_checkpointed(self, source, tmp_path, uploader):
+        uploader.upload(source)
+        # A new uploader loads the checkpoint from disk
+        resumed = DataUploader(
+            FakeContainerClient(),
+            UploadCheckpoint(tmp_path / "checkpoint.jsonl"),
+            block_size=1000,
+        )
+        (source / "small.txt").write_bytes(b"changed")
+        summary = resumed.upload(source)
+        assert summary.skipped == 1
+        assert summary.uploaded == 1
+
+    def test_upload_resumes_staged_blocks(
+        self, container_client, mocker, source, uploader
+    ):
+        path = source / "nested" / "large.bin"
+        blob_client = container_client.get_blob_client("nested/large.bin")
+        fingerprint = uploader.fingerprint(path)
+        data = path.read_bytes()
+        blob_client.staged[uploader.block_id(fingerprint, 0, data[:1000])] = data[:1000]
+        # A block staged with different data is sent again
+        blob_client.staged[uploader.block_id(fingerprint, 1, b"x" * 1000)] = b"x" * 1000
+        mock_stage_block = mocker.spy(blob_client, "stage_block")
+        uploader.upload(source)
+        assert mock_stage_block.call_count == 2
+        assert container_client.store["nested/large.bin"] == data
+
+    def test_upload_verification_fails(
+        self, container_client, mocker, source, uploader
+    ):
+        mocker.patch.object(FakeBlobClient, "commit_block_list")
+        container_client.store["nested/large.bin"] = b"stale"
+        summary = uploader.upload(source)
+        assert summary.failed == ["nested/large.bin"]
+        assert summary.uploaded == 1
+        assert "nested/large.bin" not in uploader.checkpoint.entries
+
+    def test_block_id(self, uploader):
+        block_ids = [
+            uploader.block_id([1, 2, 3], index, data)
+            for index, data in ((0, b"a"), (1, b"bb"), (100, b""))
+        ]
+        assert len({len(block_id) for block_id in block_ids}) == 1
+        assert base64.b64decode(block_ids[2]).endswith(
+            b"-00000100-d41d8cd98f00b204e9800998ecf8427e"
+        )
+
+    def test_block_size_for(self, mocker, uploader):
+        mocker.patch.object(DataUploader, "max_block_count", 10)
+        assert uploader.block_size_for(5000) == 1000
+        assert uploader.block_size_for(10001) == 1001
+        mocker.patch.object(DataUploader, "max_block_size", 1000)
+        with raises(DataSafeHavenAzureStorageError, match="too large"):
+            uploader.block_size_for(10001)
+
+    def test_upload_scales_block_size(self, container_client, mocker, source, uploader):
+        mocker.patch.object(DataUploader, "max_block_count", 2)
+        summary = uploader.upload(source)
+        assert summary.failed == []
+        large = container_client.blob_clients["nested/large.bin"]
+        assert len(large.staged) == 2
+        assert container_client.store["nested/large.bin"] == bytes(range(256)) * 10
+
+
+class TestUploadCheckpoint:
+    def test_ignores_partial_line(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        checkpoint = UploadCheckpoint(path)
+        checkpoint.record("a.txt", [1, 2, 3], "md5")
+        with open(path, "a", encoding="utf-8") as f_checkpoint:
+            f_checkpoint.write('{"blob_name": "b.tx')
+        loaded = UploadCheckpoint(path)
+        assert loaded.is_complete("a.txt", [1, 2, 3])
+        assert not loaded.is_complete("a.txt", [1, 2, 4])
+        assert list(loaded.entries) == ["a.txt"]
@@ -0,0 +1,89 @@
+from pytest import fixture
+
+from data_safe_haven.administration.workspaces import (
+    SmokeTestRunner,
+    WorkspaceTestResult,
+)
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+
+TAP_OUTPUT = """Enable succeeded:
+[stdout]
+1..3
+ok 1 Mounted drives (/mnt/input)
+not ok 2 Python package repository
+ok 3 R package repository # skip no R installed
+
+[stderr]
+"""
+
+
+@fixture
+def azure_sdk(mocker):
+    return mocker.MagicMock()
+
+
+@fixture
+def runner(azure_sdk):
+    return SmokeTestRunner(azure_sdk, "resource_group", max_workers=2, timeout=60)
+
+
+class TestSmokeTestRunner:
+    def test_parse_tap(self):
+        result = WorkspaceTestResult(vm_name="vm1")
+        SmokeTestRunner.parse_tap(TAP_OUTPUT, result)
+        assert result.planned == 3
+        assert [(r.number, r.description, r.ok) for r in result.results] == [
+            (1, "Mounted drives (/mnt/input)", True),
+            (2, "Python package repository", False),
+            (3, "R package repository", True),
+        ]
+        assert [r.number for r in result.skipped] == [3]
+        assert not result.passed
+
+    def test_run(self, azure_sdk, runner):
+        outputs = {
+            "vm1": "1..2\nok 1 first\nok 2 second\n",
+            "vm2": TAP_OUTPUT,
+            "vm3": "1..2\nok 1 first\n",
+        }
+
+        def run_remote_script_waiting(*args, **kwargs):  # noqa: ARG001
+            vm_name = args[3]
+            if vm_name == "vm4":
+                msg = "Command on 'vm4' did not finish within 360 seconds."
+                raise DataSafeHavenAzureError(msg)
+            return outputs[vm_name]
+
+        azure_sdk.run_remote_script_waiting.side_effect = run_remote_script_waiting
+        results = runner.run(["vm1", "vm2", "vm3", "vm4"])
+        assert [result.vm_name for result in results] == ["vm1", "vm2", "vm3", "vm4"]
+        assert [result.passed for result in results] == [
+            True,
+            False,
+            False,
+            False,
+        ]
+        assert results[2].error == "Only 1 of 2 tests finished."
+        assert "did not finish" in results[3].error
+        _, kwargs = azure_sdk.run_remote_script_waiting.call_args
+        assert kwargs["timeout"] == 360
+
+    def test_run_no_output(self, azure_sdk, runner):
+        azure_sdk.run_remote_script_waiting.return_value = "bats: command not found"
+        (result,) = runner.run(["vm1"])
+        assert result.error == "No TAP output was produced."
+        assert not result.passed
+
+    def test_run_as_test_account(self, azure_sdk, runner):
+        azure_sdk.run_remote_script_waiting.return_value = "1..1\nok 1 first\n"
+        runner.run(["vm1"])
+        script = azure_sdk.run_remote_script_waiting.call_args.args[1]
+        assert "runuser --login dsh-smoke-tests --command" in script
+        assert "timeout --kill-after=30 60 runuser" in script
+
+    def test_run_missing_test_account(self, azure_sdk, runner):
+        azure_sdk.run_remote_script_waiting.return_value = (
+            "Smoke test account dsh-smoke-tests does not exist."
+        )
+        (result,) = runner.run(["vm1"])
+        assert result.error == "Smoke test account 'dsh-smoke-tests' does not exist."
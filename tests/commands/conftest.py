@@ -117,6 +117,7 @@ def mock_pulumi_config_no_key_from_remote(mocker, pulumi_config_no_key):
 @fixture
 def mock_pulumi_config_upload(mocker):
     mocker.patch.object(DSHPulumiConfig, "upload", return_value=None)
+    mocker.patch.object(DSHPulumiConfig, "upload_project", return_value=None)
 
 
 @fixture
@@ -1,11 +1,67 @@
-from pytest import CaptureFixture, LogCaptureFixture
+from pytest import CaptureFixture, LogCaptureFixture, raises
 from pytest_mock import MockerFixture
 from typer.testing import CliRunner
 
-from data_safe_haven.commands.sre import sre_command_group
-from data_safe_haven.config import Context, ContextManager
-from data_safe_haven.exceptions import DataSafeHavenAzureError
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.administration.workspaces import (
+    SmokeTestRunner,
+    TapResult,
+    WorkspaceTestResult,
+)
+from data_safe_haven.commands import sre
+from data_safe_haven.commands.sre import select_sre_names, sre_command_group
+from data_safe_haven.config import Context, ContextManager, DSHPulumiConfig
+from data_safe_haven.exceptions import (
+    DataSafeHavenAzureError,
+    DataSafeHavenConfigError,
+)
+from data_safe_haven.external import AzureSdk, GraphApi
+from data_safe_haven.infrastructure import SREProjectManager
+from data_safe_haven.types import PulumiRefreshPolicy
+
+
+class TestSelectSRENames:
+    def test_name(self) -> None:
+        assert select_sre_names(
+            "sandbox", all_sres=False, available=list, names=None
+        ) == ["sandbox"]
+
+    def test_names(self) -> None:
+        assert select_sre_names(
+            None, all_sres=False, available=list, names="a, b,,a"
+        ) == ["a", "b"]
+
+    def test_all(self) -> None:
+        assert select_sre_names(
+            None, all_sres=True, available=lambda: ["a", "b"], names=None
+        ) == ["a", "b"]
+
+    def test_ambiguous(self) -> None:
+        with raises(DataSafeHavenConfigError, match="Provide exactly one"):
+            select_sre_names("a", all_sres=True, available=list, names=None)
+
+    def test_empty(self) -> None:
+        with raises(DataSafeHavenConfigError, match="No SREs were selected."):
+            select_sre_names(None, all_sres=True, available=list, names=None)
+
+
+def fail_for_b(name: str, **kwargs) -> None:  # noqa: ARG001
+    if name == "b":
+        msg = "mock failure"
+        raise DataSafeHavenConfigError(msg)
+
+
+class TestRunForEachSRE:
+    def test_run_for_each_sre(self, mocker: MockerFixture, pulumi_config) -> None:
+        mocker.patch.object(GraphApi, "from_token", return_value=None)
+        graph_api = mocker.MagicMock(token="dummy-token")
+        failed = sre.run_for_each_sre(
+            fail_for_b,
+            ["a", "b", "c"],
+            graph_api=graph_api,
+            max_workers=2,
+            pulumi_config=pulumi_config,
+        )
+        assert failed == ["b"]
 
 
 class TestDeploySRE:
@@ -28,6 +84,61 @@ class TestDeploySRE:
         assert "mock deploy" in result.stdout
         assert "mock deploy error" in result.stdout
 
+    def test_deploy_options(
+        self,
+        runner: CliRunner,
+        mock_azuresdk_get_subscription_name,  # noqa: ARG002
+        mock_graph_api_token,  # noqa: ARG002
+        mock_contextmanager_assert_context,  # noqa: ARG002
+        mock_ip_1_2_3_4,  # noqa: ARG002
+        mock_pulumi_config_from_remote_or_create,  # noqa: ARG002
+        mock_pulumi_config_upload,  # noqa: ARG002
+        mock_shm_config_from_remote,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+        mock_graph_api_get_application_by_name,  # noqa: ARG002
+        mock_sre_project_manager_deploy_then_exit,  # noqa: ARG002
+    ) -> None:
+        result = runner.invoke(
+            sre_command_group,
+            [
+                "deploy",
+                "sandbox",
+                "--only",
+                "workspaces",
+                "--parallel",
+                "4",
+                "--skip-refresh",
+                "--skip-preview",
+            ],
+        )
+        assert result.exit_code == 1
+        SREProjectManager.deploy.assert_called_once_with(
+            components={"workspaces"},
+            force=False,
+            parallel=4,
+            preview=False,
+            refresh=PulumiRefreshPolicy.NONE,
+        )
+
+    def test_deploy_names(
+        self,
+        caplog: LogCaptureFixture,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        mock_graph_api_token,  # noqa: ARG002
+        mock_contextmanager_assert_context,  # noqa: ARG002
+        mock_pulumi_config_from_remote_or_create,  # noqa: ARG002
+        mock_shm_config_from_remote,  # noqa: ARG002
+    ) -> None:
+        mock_run = mocker.patch.object(sre, "run_for_each_sre", return_value=["b"])
+        result = runner.invoke(
+            sre_command_group, ["deploy", "--names", "a,b", "--max-workers", "2"]
+        )
+        assert result.exit_code == 1
+        assert mock_run.call_args.args == (sre.deploy_sre, ["a", "b"])
+        assert mock_run.call_args.kwargs["max_workers"] == 2
+        assert "Could not deploy Secure Research Environments 'b'." in caplog.text
+
     def test_no_application(
         self,
         caplog: LogCaptureFixture,
@@ -142,3 +253,80 @@ class TestTeardownSRE:
         assert result.exit_code == 1
         assert "mock get_credential\n" in result.stdout
         assert "mock get_credential error" in result.stdout
+
+
+class TestTestSRE:
+    def test_test(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        tmp_path,
+        mock_azuresdk_get_subscription_name,  # noqa: ARG002
+        mock_contextmanager_assert_context,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+        pulumi_config,
+        pulumi_project,
+    ) -> None:
+        pulumi_config.projects["sandbox"] = pulumi_project
+        mocker.patch.object(DSHPulumiConfig, "from_remote", return_value=pulumi_config)
+        mocker.patch.object(
+            SREProjectManager,
+            "output",
+            side_effect=lambda name: {
+                "data": {"resource_group_name": "sre-rg"},
+                "workspaces": {"vm_outputs": [{"name": "vm1"}, {"name": "vm2"}]},
+            }[name],
+        )
+        passed = WorkspaceTestResult(
+            vm_name="vm1",
+            output="1..1\nok 1 test\n",
+            planned=1,
+            results=[TapResult(1, "test", ok=True)],
+        )
+        failed = WorkspaceTestResult(
+            vm_name="vm2",
+            output="1..1\nnot ok 1 broken\n",
+            planned=1,
+            results=[TapResult(1, "broken", ok=False)],
+        )
+        mock_run = mocker.patch.object(
+            SmokeTestRunner, "run", return_value=[passed, failed]
+        )
+        result = runner.invoke(
+            sre_command_group,
+            ["test", "sandbox", "--output-directory", str(tmp_path)],
+        )
+        assert result.exit_code == 1
+        mock_run.assert_called_once_with(["vm1", "vm2"])
+        assert "vm2: test 1 'broken' failed." in result.stdout
+        assert "Smoke tests failed on 1 of 2 workspaces." in result.stdout
+        assert (tmp_path / "vm1.tap").read_text() == "1..1\nok 1 test\n"
+
+    def test_not_deployed(
+        self,
+        runner: CliRunner,
+        mock_contextmanager_assert_context,  # noqa: ARG002
+        mock_pulumi_config_from_remote,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+    ) -> None:
+        result = runner.invoke(sre_command_group, ["test", "sandbox"])
+        assert result.exit_code == 1
+        assert "Could not test Secure Research Environment" in result.stdout
+
+    def test_missing_outputs(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        mock_contextmanager_assert_context,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+        pulumi_config,
+        pulumi_project,
+    ) -> None:
+        pulumi_config.projects["sandbox"] = pulumi_project
+        mocker.patch.object(DSHPulumiConfig, "from_remote", return_value=pulumi_config)
+        mocker.patch.object(SREProjectManager, "output", return_value={})
+        mock_run = mocker.patch.object(SmokeTestRunner, "run")
+        result = runner.invoke(sre_command_group, ["test", "sandbox"])
+        assert result.exit_code == 1
+        assert "Please redeploy the SRE." in result.stdout
+        mock_run.assert_not_called()
@@ -0,0 +1,89 @@
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from data_safe_haven.administration.data import (
+    DataDownloader,
+    DataUploader,
+    DownloadSummary,
+    UploadSummary,
+)
+from data_safe_haven.commands import sre_data
+from data_safe_haven.commands.sre import sre_command_group
+
+
+class TestUpload:
+    def test_upload(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        tmp_path,
+    ) -> None:
+        mock_container = mocker.patch.object(sre_data, "sensitive_data_container")
+        mock_upload = mocker.patch.object(
+            DataUploader,
+            "upload",
+            return_value=UploadSummary(skipped=1, uploaded=2, uploaded_bytes=10),
+        )
+        result = runner.invoke(
+            sre_command_group,
+            ["data", "upload", "sandbox", str(tmp_path), "--prefix", "/raw/"],
+        )
+        assert result.exit_code == 0
+        assert "Uploaded 2 files (10 bytes) and skipped 1 unchanged" in result.stdout
+        mock_container.assert_called_once_with(mocker.ANY, "sandbox", "ingress")
+        mock_upload.assert_called_once_with(tmp_path, "raw/")
+
+    def test_upload_failed_files(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        tmp_path,
+    ) -> None:
+        mocker.patch.object(sre_data, "sensitive_data_container")
+        mocker.patch.object(
+            DataUploader, "upload", return_value=UploadSummary(failed=["a.txt"])
+        )
+        result = runner.invoke(
+            sre_command_group, ["data", "upload", "sandbox", str(tmp_path)]
+        )
+        assert result.exit_code == 1
+        assert "Could not upload 1 files" in result.stdout
+
+
+class TestDownload:
+    def test_download(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        tmp_path,
+    ) -> None:
+        mock_container = mocker.patch.object(sre_data, "sensitive_data_container")
+        mock_download = mocker.patch.object(
+            DataDownloader,
+            "download",
+            return_value=DownloadSummary(downloaded=3, downloaded_bytes=30),
+        )
+        result = runner.invoke(
+            sre_command_group,
+            ["data", "download", "sandbox", str(tmp_path), "--prefix", "results"],
+        )
+        assert result.exit_code == 0
+        assert "Downloaded 3 files (30 bytes)" in result.stdout
+        mock_container.assert_called_once_with(mocker.ANY, "sandbox", "egress")
+        mock_download.assert_called_once_with(tmp_path, "results/")
+
+    def test_download_failed_files(
+        self,
+        mocker: MockerFixture,
+        runner: CliRunner,
+        tmp_path,
+    ) -> None:
+        mocker.patch.object(sre_data, "sensitive_data_container")
+        mocker.patch.object(
+            DataDownloader, "download", return_value=DownloadSummary(failed=["a"])
+        )
+        result = runner.invoke(
+            sre_command_group, ["data", "download", "sandbox", str(tmp_path)]
+        )
+        assert result.exit_code == 1
+        assert "Could not download 1 files" in result.stdout
@@ -31,6 +31,10 @@ class TestContext:
         ):
             Context(**context_dict)
 
+    def test_azure_sdk(self, context: Context) -> None:
+        assert context.azure_sdk is context.azure_sdk
+        assert context.azure_sdk.subscription_name == "Data Safe Haven Acme"
+
     def test_entra_application_name(self, context: Context) -> None:
         assert (
             context.entra_application_name
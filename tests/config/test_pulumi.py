@@ -129,6 +129,35 @@ class TestDSHPulumiConfig:
             context.storage_container_name,
         )
 
+    def test_upload_project(
+        self, mocker, pulumi_config, pulumi_project, pulumi_project_other, context
+    ):
+        mock_lease = mocker.patch.object(AzureSdk, "blob_lease")
+        remote = DSHPulumiConfig(
+            encrypted_key=None,
+            projects={"other_project": pulumi_project, "third": pulumi_project},
+        )
+        mocker.patch.object(
+            DSHPulumiConfig, "from_remote_or_create", return_value=remote
+        )
+        mock_upload = mocker.patch.object(DSHPulumiConfig, "upload")
+        del pulumi_config["acmedeployment"]
+        pulumi_config.upload_project(context, "other_project")
+        pulumi_config.upload_project(context, "acmedeployment")
+
+        mock_lease.assert_called_with(
+            DSHPulumiConfig.lock_filename,
+            context.resource_group_name,
+            context.storage_account_name,
+            context.storage_container_name,
+        )
+        assert mock_upload.call_count == 2
+        assert remote.encrypted_key == pulumi_config.encrypted_key
+        assert remote.projects == {
+            "other_project": pulumi_project_other,
+            "third": pulumi_project,
+        }
+
     def test_from_remote(self, mocker, pulumi_config_yaml, context):
         mock_method = mocker.patch.object(
             AzureSdk, "download_blob", return_value=pulumi_config_yaml
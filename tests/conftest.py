@@ -9,6 +9,7 @@ from pulumi.automation import ProjectSettings
 from pytest import fixture
 
 import data_safe_haven.config.context_manager as context_mod
+import data_safe_haven.functions.network
 import data_safe_haven.logging.logger
 from data_safe_haven import console
 from data_safe_haven.config import (
@@ -30,6 +31,7 @@ from data_safe_haven.config.config_sections import (
 from data_safe_haven.exceptions import DataSafeHavenAzureError
 from data_safe_haven.external import AzureSdk, PulumiAccount
 from data_safe_haven.external.api.credentials import AzureSdkCredential
+from data_safe_haven.external.api.secret_cache import KeyVaultSecretCache
 from data_safe_haven.infrastructure import SREProjectManager
 from data_safe_haven.infrastructure.project_manager import ProjectManager
 from data_safe_haven.logging import init_logging
@@ -45,6 +47,17 @@ def pytest_configure(config):
     config.guid_user = "80b4ccfd-73ef-41b7-bb22-8ec268ec040b"
 
 
+@fixture(autouse=True)
+def clear_ip_address_cache(monkeypatch):
+    monkeypatch.setattr(data_safe_haven.functions.network, "_ip_address_cache", {})
+
+
+@fixture(autouse=True)
+def clear_key_vault_secret_cache(monkeypatch):
+    monkeypatch.setattr(KeyVaultSecretCache, "clients_", {})
+    monkeypatch.setattr(KeyVaultSecretCache, "secrets_", {})
+
+
 @fixture
 def config_section_azure(request):
     return ConfigSectionAzure(
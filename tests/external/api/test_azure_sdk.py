@@ -1,5 +1,13 @@
+import time
+from typing import ClassVar
+
 import pytest
-from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError
+from azure.core.exceptions import (
+    ClientAuthenticationError,
+    HttpResponseError,
+    ResourceNotFoundError,
+)
+from azure.keyvault.secrets import KeyVaultSecret, SecretProperties
 from azure.mgmt.keyvault.v2023_07_01.models import DeletedVault
 from azure.mgmt.resource.subscriptions import SubscriptionClient
 from azure.mgmt.resource.subscriptions.models import Subscription
@@ -9,6 +17,7 @@ from azure.mgmt.storage.v2021_08_01.models import (
 from pytest import fixture
 
 import data_safe_haven.external.api.azure_sdk
+import data_safe_haven.external.api.secret_cache
 from data_safe_haven.exceptions import (
     DataSafeHavenAzureAPIAuthenticationError,
     DataSafeHavenAzureError,
@@ -16,6 +25,7 @@ from data_safe_haven.exceptions import (
     DataSafeHavenValueError,
 )
 from data_safe_haven.external import AzureSdk, GraphApi
+from data_safe_haven.external.api.secret_cache import KeyVaultSecretCache
 
 
 @fixture
@@ -73,6 +83,37 @@ def mock_key_client(monkeypatch):
     )
 
 
+@fixture
+def mock_secret_client(monkeypatch):
+    class MockSecretClient:
+        calls: ClassVar[list[str]] = []
+
+        def __init__(self, vault_url, credential):
+            self.vault_url = vault_url
+            self.credential = credential
+
+        def get_secret(self, secret_name):
+            MockSecretClient.calls.append(secret_name)
+            if secret_name == "missing":  # noqa: S105
+                raise ResourceNotFoundError
+            return KeyVaultSecret(
+                SecretProperties(None, f"{self.vault_url}/secrets/{secret_name}/1"),
+                f"value: {secret_name}",
+            )
+
+        def set_secret(self, secret_name, secret_value):
+            return KeyVaultSecret(
+                SecretProperties(None, f"{self.vault_url}/secrets/{secret_name}/2"),
+                secret_value,
+            )
+
+    MockSecretClient.calls = []
+    monkeypatch.setattr(
+        data_safe_haven.external.api.secret_cache, "SecretClient", MockSecretClient
+    )
+    return MockSecretClient
+
+
 @fixture
 def mock_key_vault_management_client(monkeypatch):
     class Poller:
@@ -236,11 +277,153 @@ class TestAzureSdk:
             "storage_account",
         )
 
+    def test_blob_lease(self, mocker):
+        conflict = HttpResponseError("lease already present")
+        conflict.status_code = 409
+        mock_client = mocker.MagicMock()
+        mock_client.acquire_lease.side_effect = [conflict, mocker.MagicMock()]
+        mocker.patch.object(AzureSdk, "blob_client", return_value=mock_client)
+        mock_sleep = mocker.patch("time.sleep")
+        sdk = AzureSdk("subscription name")
+        with sdk.blob_lease(
+            "lock", "resource_group", "storage_account", "storage_container"
+        ):
+            pass
+        assert mock_client.acquire_lease.call_count == 2
+        mock_sleep.assert_called_once()
+        mock_client.acquire_lease.return_value.release.assert_not_called()
+
+    def test_blob_lease_renewed(self, mocker):
+        mock_client = mocker.MagicMock()
+        mocker.patch.object(AzureSdk, "blob_client", return_value=mock_client)
+        sdk = AzureSdk("subscription name")
+        lease = mock_client.acquire_lease.return_value
+        with sdk.blob_lease(
+            "lock",
+            "resource_group",
+            "storage_account",
+            "storage_container",
+            lease_duration=0.03,
+        ):
+            time.sleep(0.1)
+        assert lease.renew.call_count >= 1
+        renewals = lease.renew.call_count
+        time.sleep(0.05)
+        assert lease.renew.call_count == renewals
+        lease.release.assert_called_once()
+
+    def test_blob_lease_timeout(self, mocker):
+        conflict = HttpResponseError("lease already present")
+        conflict.status_code = 409
+        mock_client = mocker.MagicMock()
+        mock_client.acquire_lease.side_effect = conflict
+        mocker.patch.object(AzureSdk, "blob_client", return_value=mock_client)
+        sdk = AzureSdk("subscription name")
+        with pytest.raises(
+            DataSafeHavenAzureError,
+            match="Could not acquire a lease on blob 'lock' in 'storage_account'.",
+        ):
+            with sdk.blob_lease(
+                "lock",
+                "resource_group",
+                "storage_account",
+                "storage_container",
+                timeout=-1,
+            ):
+                pass
+
+    def test_download_blob(self, mocker):
+        mocker.patch.object(AzureSdk, "download_blob_bytes", return_value=b"\xc3\xa9")
+        sdk = AzureSdk("subscription name")
+        assert (
+            sdk.download_blob(
+                "blob", "resource_group", "storage_account", "storage_container"
+            )
+            == "\u00e9"
+        )
+
+    def test_download_blob_invalid_utf8(self, mocker):
+        mocker.patch.object(AzureSdk, "download_blob_bytes", return_value=b"\xff")
+        sdk = AzureSdk("subscription name")
+        with pytest.raises(DataSafeHavenAzureError, match="is not valid UTF-8"):
+            sdk.download_blob(
+                "blob", "resource_group", "storage_account", "storage_container"
+            )
+
+    def test_download_blob_bytes(self, mocker):
+        mock_client = mocker.MagicMock()
+        mock_client.download_blob.return_value.readall.return_value = b"\x00\xff"
+        mocker.patch.object(AzureSdk, "blob_client", return_value=mock_client)
+        sdk = AzureSdk("subscription name")
+        content = sdk.download_blob_bytes(
+            "blob", "resource_group", "storage_account", "storage_container"
+        )
+        assert content == b"\x00\xff"
+        mock_client.download_blob.assert_called_once_with(max_concurrency=1)
+
+    def test_upload_blob_stream(self, mocker):
+        mock_client = mocker.MagicMock()
+        mocker.patch.object(AzureSdk, "blob_client", return_value=mock_client)
+        sdk = AzureSdk("subscription name")
+        chunks = iter([b"a", b"b"])
+        sdk.upload_blob(
+            chunks,
+            "blob",
+            "resource_group",
+            "storage_account",
+            "storage_container",
+            max_concurrency=4,
+        )
+        mock_client.upload_blob.assert_called_once_with(
+            chunks, length=None, max_concurrency=4, overwrite=True
+        )
+
     def test_get_keyvault_key(self, mock_key_client):  # noqa: ARG002
         sdk = AzureSdk("subscription name")
         key = sdk.get_keyvault_key("exists", "key vault name")
         assert key == "key: exists"
 
+    def test_get_keyvault_secret_cached(
+        self,
+        mock_secret_client,
+    ):
+        assert AzureSdk("subscription one").get_keyvault_secret("kv", "name") == (
+            "value: name"
+        )
+        assert AzureSdk("subscription two").get_keyvault_secret("kv", "name") == (
+            "value: name"
+        )
+        assert mock_secret_client.calls == ["name"]
+        assert KeyVaultSecretCache.get("kv", "name").version == "1"
+
+    def test_get_keyvault_secret_expired(
+        self,
+        mocker,
+        mock_secret_client,
+    ):
+        mocker.patch.object(KeyVaultSecretCache, "ttl", 0)
+        sdk = AzureSdk("subscription name")
+        sdk.get_keyvault_secret("kv", "name")
+        sdk.get_keyvault_secret("kv", "name")
+        assert mock_secret_client.calls == ["name", "name"]
+
+    def test_get_keyvault_secret_missing(self, mock_secret_client):  # noqa: ARG002
+        with pytest.raises(
+            DataSafeHavenAzureError, match="Failed to retrieve secret missing"
+        ):
+            AzureSdk("subscription name").get_keyvault_secret("kv", "missing")
+
+    def test_set_keyvault_secret_updates_cache(
+        self,
+        mock_secret_client,
+    ):
+        sdk = AzureSdk("subscription name")
+        sdk.get_keyvault_secret("kv", "name")
+        sdk.set_keyvault_secret("name", "new value", "kv")
+        assert sdk.get_keyvault_secret("kv", "name") == "new value"
+        assert KeyVaultSecretCache.get("kv", "name").version == "2"
+        assert mock_secret_client.calls == ["name"]
+
     def test_get_keyvault_key_missing(self, mock_key_client):  # noqa: ARG002
         sdk = AzureSdk("subscription name")
         with pytest.raises(
@@ -312,6 +495,57 @@ class TestAzureSdk:
         assert "Purging deleted key vault key_vault_name in location" in stdout
         assert "Purged Key Vault key_vault_name" in stdout
 
+    def test_remove_resource_group(self, mocker):
+        mock_client = mocker.patch.object(
+            data_safe_haven.external.api.azure_sdk, "ResourceManagementClient"
+        )
+        mocker.patch.object(
+            AzureSdk, "subscription_id", new_callable=mocker.PropertyMock
+        )
+        resource_groups = mock_client.return_value.resource_groups
+        resource_groups.check_existence.side_effect = [True, False]
+        AzureSdk("subscription name").remove_resource_group("rg")
+        resource_groups.begin_delete.assert_called_once_with("rg")
+        resource_groups.list.assert_not_called()
+
+    def test_remove_resource_group_still_exists(self, mocker):
+        mock_client = mocker.patch.object(
+            data_safe_haven.external.api.azure_sdk, "ResourceManagementClient"
+        )
+        mocker.patch.object(
+            AzureSdk, "subscription_id", new_callable=mocker.PropertyMock
+        )
+        mock_client.return_value.resource_groups.check_existence.return_value = True
+        with pytest.raises(
+            DataSafeHavenAzureError, match="Resource group 'rg' still exists."
+        ):
+            AzureSdk("subscription name").remove_resource_group("rg")
+
+    def test_run_remote_script_waiting_retries_conflicts(self, mocker):
+        mocker.patch.object(data_safe_haven.external.api.azure_sdk.time, "sleep")
+        conflict = DataSafeHavenAzureError("Failed to run command on 'vm'.")
+        conflict.__cause__ = HttpResponseError(
+            "Run command extension execution is in progress"
+        )
+        mock_run = mocker.patch.object(
+            AzureSdk, "run_remote_script", side_effect=[conflict, conflict, "output"]
+        )
+        output = AzureSdk("subscription name").run_remote_script_waiting(
+            "rg", "script", {}, "vm", timeout=600
+        )
+        assert output == "output"
+        assert mock_run.call_count == 3
+        assert mock_run.call_args.kwargs["timeout"] <= 600
+
+    def test_run_remote_script_waiting_other_error(self, mocker):
+        error = DataSafeHavenAzureError("Failed to run command on 'vm'.")
+        error.__cause__ = HttpResponseError("VM is deallocated")
+        mocker.patch.object(AzureSdk, "run_remote_script", side_effect=error)
+        with pytest.raises(DataSafeHavenAzureError, match="Failed to run command"):
+            AzureSdk("subscription name").run_remote_script_waiting(
+                "rg", "script", {}, "vm"
+            )
+
     @pytest.mark.parametrize(
         "storage_account_name,exists",
         [("shmstorageaccount", True), ("shmstoragenonexistent", False)],
@@ -1,4 +1,8 @@
+import json
+import time
+
 import pytest
+from azure.core.credentials import AccessToken
 from azure.identity import (
     AzureCliCredential,
     DeviceCodeCredential,
@@ -89,6 +93,77 @@ class TestAzureSdkCredential:
         assert decoded["upn"] == "username@example.com"
         assert decoded["tid"] == request.config.guid_tenant
 
+    def test_get_token_persistent(
+        self,
+        mocker,
+        request,
+        azure_cli_token,
+        tmp_config_dir,  # noqa: ARG002
+    ):
+        mocker.patch.object(
+            AzureSdkCredential,
+            "azure_cli_account",
+            return_value=(request.config.guid_tenant, "username@example.com"),
+        )
+        expires_on = int(time.time()) + 3600
+        mock_get_token = mocker.patch.object(
+            AzureCliCredential,
+            "get_token",
+            return_value=AccessToken(azure_cli_token, expires_on),
+        )
+        DeferredCredential.tokens_ = {}
+        AzureSdkCredential(skip_confirmation=True).get_token("scope")
+        # A new process would start with an empty in-memory cache
+        DeferredCredential.tokens_ = {}
+        token = AzureSdkCredential(skip_confirmation=True).get_token("scope")
+        assert token == AccessToken(azure_cli_token, expires_on)
+        # Once for confirmation and once to generate the token
+        assert mock_get_token.call_count == 2
+
+    def test_get_token_persistent_no_account(
+        self,
+        mocker,
+        azure_cli_token,
+        tmp_config_dir,  # noqa: ARG002
+    ):
+        mocker.patch.object(AzureSdkCredential, "azure_cli_account", return_value=None)
+        mock_get_token = mocker.patch.object(
+            AzureCliCredential,
+            "get_token",
+            return_value=AccessToken(azure_cli_token, int(time.time()) + 3600),
+        )
+        for _ in range(2):
+            DeferredCredential.tokens_ = {}
+            AzureSdkCredential(skip_confirmation=True).get_token("scope")
+        assert mock_get_token.call_count == 4
+
+    def test_azure_cli_account(self, monkeypatch, request, tmp_path):
+        monkeypatch.setenv("AZURE_CONFIG_DIR", str(tmp_path))
+        (tmp_path / "azureProfile.json").write_text(
+            "\ufeff"
+            + json.dumps(
+                {
+                    "subscriptions": [
+                        {"isDefault": False, "tenantId": "other", "user": {}},
+                        {
+                            "isDefault": True,
+                            "tenantId": request.config.guid_tenant,
+                            "user": {"name": "username@example.com"},
+                        },
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        assert AzureSdkCredential.azure_cli_account() == (
+            request.config.guid_tenant,
+            "username@example.com",
+        )
+
+    def test_azure_cli_account_missing(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("AZURE_CONFIG_DIR", str(tmp_path))
+        assert AzureSdkCredential.azure_cli_account() is None
+
 
 class TestGraphApiCredential:
     def test_authentication_record_is_used(
@@ -76,3 +76,34 @@ class TestGraphApi:
     ):
         api = GraphApi.from_token(graph_api_token)
         assert api.token == graph_api_token
+
+    def test_get_application_by_id(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/applications/object-id",
+            json={"appId": "app-id", "displayName": "app", "id": "object-id"},
+        )
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/applications/missing", status_code=404
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        assert api.get_application_by_id("object-id")["appId"] == "app-id"
+        assert api.get_application_by_id("missing") is None
+
+    def test_read_application_role_assignments(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/servicePrincipals(appId='app-id')/appRoleAssignments",
+            json={"value": [{"appRoleId": "role-id"}]},
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        assignments = api.read_application_role_assignments("app-id")
+        assert assignments == [{"appRoleId": "role-id"}]
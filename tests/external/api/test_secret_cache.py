@@ -0,0 +1,46 @@
+from azure.keyvault.secrets import KeyVaultSecret, SecretProperties
+
+from data_safe_haven.external.api.secret_cache import KeyVaultSecretCache
+
+
+def secret(name, value, version="1"):
+    return KeyVaultSecret(
+        SecretProperties(None, f"https://kv.vault.azure.net/secrets/{name}/{version}"),
+        value,
+    )
+
+
+class TestKeyVaultSecretCache:
+    def test_get_set(self):
+        KeyVaultSecretCache.set("kv", secret("name", "value", "abc"))
+        cached = KeyVaultSecretCache.get("kv", "name")
+        assert cached.value == "value"
+        assert cached.version == "abc"
+        assert KeyVaultSecretCache.get("other", "name") is None
+
+    def test_get_expired(self, mocker):
+        mocker.patch.object(KeyVaultSecretCache, "ttl", -1)
+        KeyVaultSecretCache.set("kv", secret("name", "value"))
+        assert KeyVaultSecretCache.get("kv", "name") is None
+
+    def test_set_no_value(self):
+        assert KeyVaultSecretCache.set("kv", secret("name", None)) is None
+        assert KeyVaultSecretCache.get("kv", "name") is None
+
+    def test_client_shared(self, mocker):
+        credential = mocker.MagicMock()
+        client = KeyVaultSecretCache.client("kv", credential)
+        assert KeyVaultSecretCache.client("kv", credential) is client
+        assert KeyVaultSecretCache.client("other", credential) is not client
+        assert client.vault_url == "https://kv.vault.azure.net"
+
+    def test_invalidate(self, mocker):
+        KeyVaultSecretCache.client("kv", mocker.MagicMock())
+        KeyVaultSecretCache.set("kv", secret("one", "value"))
+        KeyVaultSecretCache.set("kv", secret("two", "value"))
+        KeyVaultSecretCache.invalidate("kv", "one")
+        assert KeyVaultSecretCache.get("kv", "one") is None
+        assert KeyVaultSecretCache.get("kv", "two")
+        KeyVaultSecretCache.invalidate("kv")
+        assert KeyVaultSecretCache.get("kv", "two") is None
+        assert "kv" not in KeyVaultSecretCache.clients_
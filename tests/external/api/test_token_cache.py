@@ -0,0 +1,41 @@
+from azure.core.credentials import AccessToken
+
+from data_safe_haven.external.api.token_cache import EncryptedTokenCache
+
+
+class TestEncryptedTokenCache:
+    def test_get_set(self, tmp_config_dir):  # noqa: ARG002
+        EncryptedTokenCache("test").set("key", AccessToken("token", 200), 100)
+        token = EncryptedTokenCache("test").get("key", 100)
+        assert token == AccessToken("token", 200)
+
+    def test_get_expired(self, tmp_config_dir):  # noqa: ARG002
+        cache = EncryptedTokenCache("test")
+        cache.set("key", AccessToken("token", 200), 100)
+        assert cache.get("key", 300) is None
+
+    def test_get_missing(self, tmp_config_dir):  # noqa: ARG002
+        assert EncryptedTokenCache("test").get("key", 100) is None
+
+    def test_set_drops_expired(self, tmp_config_dir):  # noqa: ARG002
+        cache = EncryptedTokenCache("test")
+        cache.set("old", AccessToken("old", 200), 100)
+        cache.set("new", AccessToken("new", 400), 300)
+        assert list(cache.read().keys()) == ["new"]
+
+    def test_encrypted(self, tmp_config_dir):  # noqa: ARG002
+        cache = EncryptedTokenCache("test")
+        cache.set("key", AccessToken("plaintext-token", 200), 100)
+        assert b"plaintext-token" not in cache.cache_path.read_bytes()
+        assert (cache.key_path.stat().st_mode & 0o777) == 0o600
+
+    def test_clear(self, tmp_config_dir):  # noqa: ARG002
+        cache = EncryptedTokenCache("test")
+        cache.set("key", AccessToken("token", 200), 100)
+        cache.clear()
+        assert cache.get("key", 100) is None
+
+    def test_unreadable(self, tmp_config_dir):  # noqa: ARG002
+        cache = EncryptedTokenCache("test")
+        cache.cache_path.write_bytes(b"not encrypted")
+        assert cache.read() == {}
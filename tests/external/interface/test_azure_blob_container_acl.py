@@ -0,0 +1,159 @@
+import json
+
+import pytest
+from azure.core.exceptions import AzureError
+from azure.storage.filedatalake import (
+    AccessControlChangeCounters,
+    AccessControlChangeResult,
+    AccessControlChanges,
+)
+from pytest import fixture
+
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AzureBlobContainerAcl
+from data_safe_haven.external.interface.azure_blob_container_acl import AclCheckpoint
+
+ACL = "user::rwx,group::r-x,other::---,default:user::rwx"
+
+
+class MockPath:
+    def __init__(self, name, *, is_directory):
+        self.is_directory = is_directory
+        self.name = name
+
+
+class MockDirectoryClient:
+    def __init__(self, results):
+        self.calls = []
+        self.results = iter(results)
+
+    def set_access_control_recursive(self, acl, **kwargs):
+        self.calls.append((acl, kwargs.get("continuation_token")))
+        result = next(self.results)
+        if isinstance(result, Exception):
+            raise result
+        kwargs["progress_hook"](
+            AccessControlChanges(
+                batch_counters=result.counters,
+                aggregate_counters=result.counters,
+                batch_failures=[],
+                continuation=result.continuation,
+            )
+        )
+        return result
+
+
+def change_result(continuation, *, files=10, failures=0):
+    return AccessControlChangeResult(
+        counters=AccessControlChangeCounters(
+            directories_successful=1,
+            files_successful=files,
+            failure_count=failures,
+        ),
+        continuation=continuation,
+    )
+
+
+@fixture
+def container_acl(mocker):
+    mocker.patch.object(AzureBlobContainerAcl, "container_exists", return_value=True)
+    return AzureBlobContainerAcl(
+        "container",
+        "resource_group",
+        "storage_account",
+        "subscription",
+        max_workers=2,
+    )
+
+
+@fixture
+def file_system_client(mocker):
+    client = mocker.MagicMock()
+    client.get_paths.return_value = [
+        MockPath("data", is_directory=True),
+        MockPath("README.md", is_directory=False),
+    ]
+    mocker.patch.object(
+        AzureBlobContainerAcl,
+        "file_system_client",
+        new_callable=mocker.PropertyMock,
+        return_value=client,
+    )
+    return client
+
+
+class TestAzureBlobContainerAcl:
+    def test_acl_entries(self):
+        assert AzureBlobContainerAcl.acl_entries(
+            "user::rwx,mask::rwx,group::r-x,default:mask::r-x"
+        ) == {"user::rwx", "group::r-x"}
+
+    def test_file_acl(self):
+        assert AzureBlobContainerAcl.file_acl(ACL) == "user::rwx,group::r-x,other::---"
+
+    def test_set(self, container_acl, file_system_client, tmp_path):
+        directory_client = MockDirectoryClient(
+            [change_result("token-1"), change_result(None)]
+        )
+        file_system_client.get_directory_client.return_value = directory_client
+        progress = []
+        counters = container_acl.set(
+            ACL, checkpoint_path=tmp_path / "checkpoint.json", progress=progress.append
+        )
+        assert directory_client.calls == [(ACL, None), (ACL, "token-1")]
+        assert counters.directories == 2
+        assert counters.files == 21
+        assert len(progress) == 3
+        file_system_client.get_file_client.return_value.set_access_control.assert_called_once_with(
+            acl="user::rwx,group::r-x,other::---"
+        )
+        file_system_client._get_root_directory_client.return_value.set_access_control.assert_called_once_with(
+            acl=ACL
+        )
+        assert not (tmp_path / "checkpoint.json").exists()
+
+    def test_set_resumes(self, container_acl, file_system_client, tmp_path):
+        checkpoint_path = tmp_path / "checkpoint.json"
+        directory_client = MockDirectoryClient(
+            [change_result("token-1"), AzureError("interrupted")]
+        )
+        file_system_client.get_directory_client.return_value = directory_client
+        with pytest.raises(DataSafeHavenAzureError, match="Failed to set ACL"):
+            container_acl.set(ACL, checkpoint_path=checkpoint_path)
+        assert json.loads(checkpoint_path.read_text())["paths"] == {
+            "README.md": True,
+            "data": "token-1",
+        }
+        file_system_client._get_root_directory_client.return_value.set_access_control.assert_not_called()
+
+        # Only the unfinished directory is resumed from its last token
+        file_system_client.get_file_client.reset_mock()
+        directory_client.results = iter([change_result(None)])
+        container_acl.set(ACL, checkpoint_path=checkpoint_path)
+        assert directory_client.calls[-1] == (ACL, "token-1")
+        file_system_client.get_file_client.assert_not_called()
+        assert not checkpoint_path.exists()
+
+    def test_set_failures(self, container_acl, file_system_client):
+        file_system_client.get_directory_client.return_value = MockDirectoryClient(
+            [change_result(None, failures=2)]
+        )
+        with pytest.raises(DataSafeHavenAzureError, match="on 2 paths"):
+            container_acl.set(ACL)
+        file_system_client._get_root_directory_client.return_value.set_access_control.assert_not_called()
+
+    def test_matches(self, container_acl, file_system_client):
+        file_system_client._get_root_directory_client.return_value.get_access_control.return_value = {
+            "acl": "user::rwx,group::r-x,mask::r-x,other::---,default:user::rwx"
+        }
+        assert container_acl.matches(ACL)
+        assert not container_acl.matches("user::rwx,group::rwx,other::---")
+
+
+class TestAclCheckpoint:
+    def test_discard_other_acl(self, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        checkpoint = AclCheckpoint(path, ACL)
+        checkpoint.save("data", value="token")
+        assert AclCheckpoint(path, ACL).token("data") == "token"
+        assert AclCheckpoint(path, "user::rwx").token("data") is None
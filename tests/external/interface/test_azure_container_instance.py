@@ -0,0 +1,166 @@
+import itertools
+import threading
+
+import pytest
+import websocket
+from pytest import fixture
+
+import data_safe_haven.external.interface.azure_container_instance
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AzureContainerInstance
+
+
+@fixture
+def mock_container_instance_management_client(monkeypatch):
+    class MockExecResponse:
+        password = "password"  # noqa: S105
+        web_socket_uri = "wss://example.com"
+
+    class MockContainersOperations:
+        def execute_command(self, *args, **kwargs):  # noqa: ARG002
+            return MockExecResponse()
+
+    class MockContainerInstanceManagementClient:
+        def __init__(self, *args, **kwargs):  # noqa: ARG002
+            self.containers = MockContainersOperations()
+
+    monkeypatch.setattr(
+        data_safe_haven.external.interface.azure_container_instance,
+        "ContainerInstanceManagementClient",
+        MockContainerInstanceManagementClient,
+    )
+
+
+@fixture
+def mock_websocket(monkeypatch, request):
+    frames = iter(request.param)
+
+    class MockWebSocket:
+        def __init__(self):
+            self.closed = False
+            self.sent = []
+
+        def close(self):
+            self.closed = True
+
+        def recv(self):
+            frame = next(frames, None)
+            if frame is None:
+                raise websocket.WebSocketConnectionClosedException
+            if isinstance(frame, type) and issubclass(frame, Exception):
+                raise frame
+            return frame
+
+        def send(self, payload):
+            self.sent.append(payload)
+
+    socket = MockWebSocket()
+    monkeypatch.setattr(
+        data_safe_haven.external.interface.azure_container_instance.websocket,
+        "create_connection",
+        lambda *args, **kwargs: socket,  # noqa: ARG005
+    )
+    return socket
+
+
+@fixture
+def container_instance(
+    mock_azuresdk_get_credential,  # noqa: ARG001
+    mock_azuresdk_get_subscription,  # noqa: ARG001
+    mock_container_instance_management_client,  # noqa: ARG001
+):
+    return AzureContainerInstance(
+        "container_group_name", "resource_group_name", "Data Safe Haven Acme"
+    )
+
+
+class TestAzureContainerInstance:
+    @pytest.mark.parametrize(
+        "mock_websocket",
+        [["line one\r\nline ", "two\r\n", "line three"]],
+        indirect=True,
+    )
+    def test_run_executable(self, container_instance, mock_websocket):
+        output = container_instance.run_executable("container", "/bin/cmd")
+        assert output == ["line one", "line two", "line three"]
+        assert mock_websocket.sent == ["password"]
+        assert mock_websocket.closed
+
+    @pytest.mark.parametrize(
+        "mock_websocket",
+        [["one\n", websocket.WebSocketTimeoutException, "two\n", ""]],
+        indirect=True,
+    )
+    def test_stream_executable(self, container_instance, mock_websocket):
+        stream = container_instance.stream_executable("container", "/bin/cmd")
+        assert next(stream) == "one"
+        assert next(stream) == "two"
+        assert list(stream) == []
+        assert mock_websocket.closed
+
+    @pytest.mark.parametrize("mock_websocket", [["one\n", "two\n"]], indirect=True)
+    def test_stream_executable_cancel(self, container_instance, mock_websocket):
+        cancel = threading.Event()
+        stream = container_instance.stream_executable(
+            "container", "/bin/cmd", cancel=cancel
+        )
+        assert next(stream) == "one"
+        cancel.set()
+        assert list(stream) == []
+        assert mock_websocket.closed
+
+    @pytest.mark.parametrize(
+        "mock_websocket",
+        [itertools.repeat(websocket.WebSocketTimeoutException)],
+        indirect=True,
+    )
+    def test_stream_executable_timeout(self, container_instance, mock_websocket):
+        with pytest.raises(DataSafeHavenAzureError, match="timed out after"):
+            list(
+                container_instance.stream_executable(
+                    "container", "/bin/cmd", timeout=0.001
+                )
+            )
+        assert mock_websocket.closed
+
+    @pytest.mark.parametrize("mock_websocket", [["one\n", "two\n"]], indirect=True)
+    def test_pipe_executable(
+        self,
+        container_instance,
+        mock_websocket,  # noqa: ARG002
+        tmp_path,
+    ):
+        output_path = tmp_path / "output.log"
+        n_lines = container_instance.pipe_executable(
+            "container", "/bin/cmd", output_path=output_path
+        )
+        assert n_lines == 2
+        assert output_path.read_text() == "one\ntwo\n"
+
+    def test_run_executable_parallel(self, container_instance, mocker):
+        mocker.patch.object(
+            AzureContainerInstance,
+            "run_executable",
+            side_effect=lambda name, *args, **kwargs: [name],  # noqa: ARG005
+        )
+        output = container_instance.run_executable_parallel(
+            ["one", "two", "three"], "/bin/cmd"
+        )
+        assert output == {"one": ["one"], "two": ["two"], "three": ["three"]}
+
+    def test_run_executable_parallel_fails_fast(self, container_instance, mocker):
+        def run_executable(name, *args, cancel, **kwargs):  # noqa: ARG001
+            if name == "broken":
+                msg = "unexpected"
+                raise RuntimeError(msg)
+            # Only finishes once the failure has cancelled it
+            assert cancel.wait(timeout=5)
+            return [name]
+
+        mocker.patch.object(
+            AzureContainerInstance, "run_executable", side_effect=run_executable
+        )
+        with pytest.raises(RuntimeError, match="unexpected"):
+            container_instance.run_executable_parallel(
+                ["slow", "broken"], "/bin/cmd", max_workers=2
+            )
@@ -0,0 +1,82 @@
+import ipaddress
+
+import pytest
+
+from data_safe_haven.exceptions import DataSafeHavenIPRangeError
+from data_safe_haven.external import AzureIPv4Range
+
+
+class TestAzureIPv4Range:
+    def test_from_cidr(self):
+        assert AzureIPv4Range.from_cidr("10.0.0.0/24") == AzureIPv4Range(
+            "10.0.0.0", "10.0.0.255"
+        )
+
+    def test_invalid_range(self):
+        with pytest.raises(
+            DataSafeHavenIPRangeError,
+            match="cannot be expressed as a single network range",
+        ):
+            AzureIPv4Range("10.0.0.0", "10.0.0.2")
+
+    def test_all_ips(self):
+        ips = AzureIPv4Range.from_cidr("10.0.0.0/29").all_ips()
+        assert next(ips) == ipaddress.IPv4Address("10.0.0.1")
+        assert len(list(ips)) == 5
+
+    def test_available(self):
+        assert AzureIPv4Range.from_cidr("10.0.0.0/29").available() == [
+            ipaddress.IPv4Address("10.0.0.4"),
+            ipaddress.IPv4Address("10.0.0.5"),
+            ipaddress.IPv4Address("10.0.0.6"),
+        ]
+
+    def test_available_count(self):
+        available = AzureIPv4Range.from_cidr("10.0.0.0/8").available(2)
+        assert available == [
+            ipaddress.IPv4Address("10.0.0.4"),
+            ipaddress.IPv4Address("10.0.0.5"),
+        ]
+
+    @pytest.mark.parametrize("cidr", ["10.0.0.0/30", "10.0.0.0/31", "10.0.0.0/32"])
+    def test_available_small(self, cidr):
+        assert AzureIPv4Range.from_cidr(cidr).available() == []
+
+    def test_next_subnet(self):
+        vnet = AzureIPv4Range.from_cidr("10.0.0.0/24")
+        assert vnet.next_subnet(8) == AzureIPv4Range.from_cidr("10.0.0.0/29")
+        assert vnet.next_subnet(64) == AzureIPv4Range.from_cidr("10.0.0.64/26")
+        assert vnet.next_subnet(8) == AzureIPv4Range.from_cidr("10.0.0.8/29")
+        assert vnet.next_subnet(128) == AzureIPv4Range.from_cidr("10.0.0.128/25")
+        assert vnet.next_subnet(16) == AzureIPv4Range.from_cidr("10.0.0.16/28")
+
+    def test_next_subnet_not_power_of_two(self):
+        with pytest.raises(DataSafeHavenIPRangeError, match="must be a power of 2"):
+            AzureIPv4Range.from_cidr("10.0.0.0/24").next_subnet(10)
+
+    def test_next_subnet_exhausted(self):
+        vnet = AzureIPv4Range.from_cidr("10.0.0.0/28")
+        vnet.next_subnet(8)
+        vnet.next_subnet(8)
+        with pytest.raises(DataSafeHavenIPRangeError, match="No unused subnet"):
+            vnet.next_subnet(8)
+
+    def test_next_subnet_large(self):
+        vnet = AzureIPv4Range.from_cidr("10.0.0.0/8")
+        subnets = [vnet.next_subnet(8) for _ in range(1 << 16)]
+        assert subnets[-1] == AzureIPv4Range.from_cidr("10.7.255.248/29")
+
+    def test_release_subnet(self):
+        vnet = AzureIPv4Range.from_cidr("10.0.0.0/24")
+        first = vnet.next_subnet(8)
+        second = vnet.next_subnet(8)
+        vnet.release_subnet(first)
+        vnet.release_subnet(second)
+        # Released buddies are merged so the whole range can be reused
+        assert vnet.next_subnet(256) == vnet
+
+    def test_release_subnet_outside_range(self):
+        vnet = AzureIPv4Range.from_cidr("10.0.0.0/24")
+        vnet.next_subnet(8)
+        with pytest.raises(DataSafeHavenIPRangeError, match="was not allocated"):
+            vnet.release_subnet(AzureIPv4Range.from_cidr("10.1.0.0/29"))
@@ -3,6 +3,7 @@ import requests
 
 from data_safe_haven.exceptions import DataSafeHavenValueError
 from data_safe_haven.functions import current_ip_address, ip_address_in_list
+from data_safe_haven.functions.network import IP_ADDRESS_RESOLVERS
 
 
 class TestCurrentIpAddress:
@@ -12,12 +13,46 @@ class TestCurrentIpAddress:
         assert ip_address == "1.2.3.4"
 
     def test_request_not_resolved(self, requests_mock):
+        for resolver in IP_ADDRESS_RESOLVERS:
+            requests_mock.get(resolver, exc=requests.exceptions.ConnectTimeout)
+        with pytest.raises(DataSafeHavenValueError) as exc_info:
+            current_ip_address()
+        assert exc_info.match(r"Could not determine IP address.")
+
+    def test_cached(self, requests_mock):
+        requests_mock.get("https://api.ipify.org", text="1.2.3.4")
+        assert current_ip_address() == "1.2.3.4"
+        assert current_ip_address() == "1.2.3.4"
+        assert requests_mock.call_count == 1
+
+    def test_cache_expired(self, requests_mock):
+        requests_mock.get("https://api.ipify.org", text="1.2.3.4")
+        assert current_ip_address(ttl=0) == "1.2.3.4"
+        assert current_ip_address(ttl=0) == "1.2.3.4"
+        assert requests_mock.call_count == 2
+
+    def test_fallback(self, requests_mock):
         requests_mock.get(
             "https://api.ipify.org", exc=requests.exceptions.ConnectTimeout
         )
+        requests_mock.get("https://checkip.amazonaws.com", text="not an IP address")
+        requests_mock.get("https://ipv4.icanhazip.com", text="1.2.3.4\n")
+        assert current_ip_address() == "1.2.3.4"
+
+    def test_custom_resolvers(self, requests_mock):
+        requests_mock.get("https://example.com/ip", text="1.2.3.4")
+        assert current_ip_address(resolvers=["https://example.com/ip"]) == "1.2.3.4"
+
+    def test_egress_ip_address(self, monkeypatch, requests_mock):
+        monkeypatch.setenv("DSH_EGRESS_IP_ADDRESS", "5.6.7.8")
+        assert current_ip_address() == "5.6.7.8"
+        assert requests_mock.call_count == 0
+
+    def test_egress_ip_address_invalid(self, monkeypatch):
+        monkeypatch.setenv("DSH_EGRESS_IP_ADDRESS", "not an IP address")
         with pytest.raises(DataSafeHavenValueError) as exc_info:
             current_ip_address()
-        assert exc_info.match(r"Could not determine IP address.")
+        assert exc_info.match(r"is not a valid IPv4 address.")
 
 
 class TestIpAddressInList:
@@ -38,9 +73,8 @@ class TestIpAddressInList:
         assert ip_address_in_list(["1.2.3.0/29", "2.3.4.0/29"])
 
     def test_not_resolved(self, requests_mock):
-        requests_mock.get(
-            "https://api.ipify.org", exc=requests.exceptions.ConnectTimeout
-        )
+        for resolver in IP_ADDRESS_RESOLVERS:
+            requests_mock.get(resolver, exc=requests.exceptions.ConnectTimeout)
         with pytest.raises(DataSafeHavenValueError) as exc_info:
             ip_address_in_list(["2.3.4.5"])
         assert exc_info.match(r"Could not determine IP address.")
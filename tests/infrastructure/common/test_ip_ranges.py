@@ -1,5 +1,13 @@
+import pytest
+
+from data_safe_haven.exceptions import DataSafeHavenIPRangeError
 from data_safe_haven.external import AzureIPv4Range
-from data_safe_haven.infrastructure.common import SREDnsIpRanges, SREIpRanges
+from data_safe_haven.infrastructure.common import (
+    SREDnsIpRanges,
+    SREIpRanges,
+    get_sre_ip_layout,
+    plan_sre_ip_layouts,
+)
 
 
 class TestSREIpRanges:
@@ -44,6 +52,41 @@ class TestSREIpRanges:
         )
         assert SREIpRanges.workspaces == AzureIPv4Range("10.0.2.0", "10.0.2.255")
 
+    def test_lazy(self):
+        get_sre_ip_layout.cache_clear()
+        assert get_sre_ip_layout.cache_info().currsize == 0
+        assert SREIpRanges.workspaces == AzureIPv4Range("10.0.2.0", "10.0.2.255")
+        assert SREIpRanges.workspaces is SREIpRanges.workspaces
+        assert get_sre_ip_layout.cache_info().currsize == 1
+
+
+class TestPlanSREIpLayouts:
+    def test_plan(self):
+        layouts = plan_sre_ip_layouts([0, 3, "10.100.0.0/22"])
+        assert [layout.vnet.prefix for layout in layouts] == [
+            "10.0.0.0/16",
+            "10.3.0.0/16",
+            "10.100.0.0/22",
+        ]
+        assert layouts[1].workspaces == AzureIPv4Range("10.3.2.0", "10.3.2.255")
+        assert layouts[2].firewall == AzureIPv4Range("10.100.1.64", "10.100.1.127")
+
+    def test_plan_default_layout(self):
+        (layout,) = plan_sre_ip_layouts([0])
+        assert layout.workspaces is SREIpRanges.workspaces
+
+    def test_plan_overlap(self):
+        with pytest.raises(DataSafeHavenIPRangeError, match="overlap"):
+            plan_sre_ip_layouts([1, "10.1.128.0/22"])
+
+    def test_plan_invalid_index(self):
+        with pytest.raises(DataSafeHavenIPRangeError, match="between 0 and 255"):
+            plan_sre_ip_layouts([256])
+
+    def test_plan_vnet_too_small(self):
+        with pytest.raises(DataSafeHavenIPRangeError, match="No unused subnet"):
+            plan_sre_ip_layouts(["10.100.0.0/24"])
+
 
 class TestSREDnsIpRanges:
     def test_vnet(self):
@@ -0,0 +1,48 @@
+import threading
+
+from pulumi.dynamic import CreateResult, DiffResult
+
+from data_safe_haven.infrastructure.components.dynamic.dsh_resource_provider import (
+    DshResourceProvider,
+)
+
+
+class MockProvider(DshResourceProvider):
+    def create(self, props):
+        # Another thread cannot acquire the lock while this method runs
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(
+                DshResourceProvider.lock_.acquire(blocking=False)
+            )
+        )
+        thread.start()
+        thread.join()
+        return CreateResult("id", {"acquired": acquired[0], **props})
+
+    def delete(self, id_, props):
+        pass
+
+    def diff(self, id_, old_props, new_props):  # noqa: ARG002
+        return DiffResult(changes=old_props != new_props)
+
+    def refresh(self, props):
+        return props
+
+
+class TestDshResourceProvider:
+    def test_operations_hold_lock(self):
+        provider = MockProvider()
+        assert provider.create({"key": "value"}).outs == {
+            "acquired": False,
+            "key": "value",
+        }
+        # Methods inherited from the base class re-enter the lock
+        assert provider.update("id", {}, {"key": "new"}).outs == {
+            "acquired": False,
+            "key": "new",
+        }
+
+    def test_locked_methods_are_wrapped(self):
+        for name in DshResourceProvider.locked_methods:
+            assert getattr(getattr(MockProvider, name), "serialised_", False)
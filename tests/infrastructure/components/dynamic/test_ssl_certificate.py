@@ -0,0 +1,102 @@
+from datetime import UTC, datetime, timedelta
+
+from azure.keyvault.certificates import KeyVaultCertificate
+from pytest import fixture, mark
+
+from data_safe_haven.infrastructure.components.dynamic.ssl_certificate import (
+    SSLCertificateProvider,
+)
+
+
+def expiry_in(days: float) -> str:
+    return (datetime.now(UTC) + timedelta(days=days)).isoformat()
+
+
+@fixture
+def old_props():
+    return {
+        "admin_email_address": "admin@example.com",
+        "certificate_secret_name": "certificate",
+        "domain_name": "sre.example.com",
+        "expiry": expiry_in(60),
+        "key_vault_name": "key-vault",
+        "networking_resource_group_name": "networking",
+        "renewal_days": 30,
+        "secret_id": "https://key-vault.vault.azure.net/secrets/certificate/1",
+        "subscription_name": "subscription",
+    }
+
+
+@fixture
+def new_props(old_props):
+    # Outputs are unknown in the checked inputs
+    return old_props | {"expiry": None, "secret_id": None}
+
+
+class TestSSLCertificateProvider:
+    @mark.parametrize(
+        "expiry,expected",
+        [
+            (expiry_in(60), False),
+            (expiry_in(10), True),
+            (expiry_in(-1), True),
+            ("not a date", True),
+            ("", False),
+            (None, False),
+        ],
+    )
+    def test_needs_renewal(self, expiry, expected):
+        assert SSLCertificateProvider.needs_renewal(expiry, 30) == expected
+
+    def test_certificate_expiry(self, mocker):
+        expires_on = datetime(2030, 1, 1, tzinfo=UTC)
+        certificate = mocker.MagicMock(spec=KeyVaultCertificate)
+        certificate.properties.expires_on = expires_on
+        assert SSLCertificateProvider.certificate_expiry(certificate) == (
+            expires_on.isoformat()
+        )
+        certificate.properties = None
+        certificate.cer = None
+        assert SSLCertificateProvider.certificate_expiry(certificate) == ""
+
+    def test_diff_unchanged(self, old_props, new_props):
+        diff = SSLCertificateProvider().diff("id", old_props, new_props)
+        assert not diff.changes
+        assert diff.replaces == []
+
+    def test_diff_unknown_expiry(self, old_props, new_props):
+        old_props["expiry"] = ""
+        diff = SSLCertificateProvider().diff("id", old_props, new_props)
+        assert not diff.changes
+
+    def test_diff_renewal(self, old_props, new_props):
+        old_props["expiry"] = expiry_in(10)
+        diff = SSLCertificateProvider().diff("id", old_props, new_props)
+        assert diff.changes
+        assert diff.replaces == []
+
+    def test_diff_update_in_place(self, old_props, new_props):
+        new_props["admin_email_address"] = "other@example.com"
+        new_props["renewal_days"] = 20
+        diff = SSLCertificateProvider().diff("id", old_props, new_props)
+        assert diff.changes
+        assert diff.replaces == []
+
+    @mark.parametrize(
+        "prop", ["certificate_secret_name", "domain_name", "key_vault_name"]
+    )
+    def test_diff_replace(self, old_props, new_props, prop):
+        new_props[prop] = "changed"
+        new_props["admin_email_address"] = "other@example.com"
+        diff = SSLCertificateProvider().diff("id", old_props, new_props)
+        assert diff.changes
+        assert diff.replaces == [prop]
+
+    def test_update_outside_renewal_window(self, mocker, old_props, new_props):
+        mock_create = mocker.patch.object(SSLCertificateProvider, "create")
+        new_props["admin_email_address"] = "other@example.com"
+        result = SSLCertificateProvider().update("id", old_props, new_props)
+        mock_create.assert_not_called()
+        assert result.outs["admin_email_address"] == "other@example.com"
+        assert result.outs["secret_id"] == old_props["secret_id"]
+        assert result.outs["expiry"] == old_props["expiry"]
@@ -0,0 +1,47 @@
+import io
+import tarfile
+
+from data_safe_haven.infrastructure.programs.sre.desired_state import (
+    SREDesiredStateComponent,
+)
+
+
+class TestBundle:
+    def test_bundle(self, tmp_path):
+        (tmp_path / "tasks").mkdir()
+        (tmp_path / "tasks" / "packages.yaml").write_text("---\n")
+        (tmp_path / "desired_state.yaml").write_text("---\n")
+        (tmp_path / ".hidden").write_text("secret")
+        bundle = SREDesiredStateComponent.bundle(tmp_path)
+        with tarfile.open(fileobj=io.BytesIO(bundle), mode="r:gz") as f_tar:
+            assert f_tar.getnames() == ["desired_state.yaml", "tasks/packages.yaml"]
+            assert all(member.mtime == 0 for member in f_tar.getmembers())
+
+    def test_bundle_deterministic(self, tmp_path):
+        (tmp_path / "desired_state.yaml").write_text("---\n")
+        bundle = SREDesiredStateComponent.bundle(tmp_path)
+        (tmp_path / "desired_state.yaml").touch()
+        assert SREDesiredStateComponent.bundle(tmp_path) == bundle
+        (tmp_path / "desired_state.yaml").write_text("--- \n")
+        assert SREDesiredStateComponent.bundle(tmp_path) != bundle
+
+    def test_write_bundle(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DSH_CONFIG_DIRECTORY", str(tmp_path / "config"))
+        source = tmp_path / "ansible"
+        source.mkdir()
+        (source / "desired_state.yaml").write_text("---\n")
+        bundle_path = SREDesiredStateComponent.write_bundle(source)
+        assert bundle_path.parent == tmp_path / "config" / "bundles"
+        assert bundle_path.read_bytes() == SREDesiredStateComponent.bundle(source)
+        assert SREDesiredStateComponent.write_bundle(source) == bundle_path
+
+    def test_write_bundle_prunes_old_bundles(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DSH_CONFIG_DIRECTORY", str(tmp_path / "config"))
+        source = tmp_path / "ansible"
+        source.mkdir()
+        (source / "desired_state.yaml").write_text("---\n")
+        old_bundle_path = SREDesiredStateComponent.write_bundle(source)
+        (source / "desired_state.yaml").write_text("--- \n")
+        bundle_path = SREDesiredStateComponent.write_bundle(source)
+        assert bundle_path != old_bundle_path
+        assert list(bundle_path.parent.iterdir()) == [bundle_path]
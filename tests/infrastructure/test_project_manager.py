@@ -1,21 +1,75 @@
+import json
+from importlib import metadata
+from unittest.mock import MagicMock, PropertyMock
+
 from pulumi.automation import (
+    CommandError,
+    ConfigValue,
     LocalWorkspace,
+    OutputValue,
+    PluginInfo,
     ProjectSettings,
     Stack,
     StackSettings,
 )
+from pulumi.automation._cmd import CommandResult
 from pytest import raises
 
 from data_safe_haven.config import DSHPulumiProject
 from data_safe_haven.exceptions import (
+    DataSafeHavenAzureError,
     DataSafeHavenConfigError,
     DataSafeHavenPulumiError,
 )
+from data_safe_haven.external import AzureSdk
 from data_safe_haven.infrastructure import SREProjectManager
 from data_safe_haven.infrastructure.project_manager import ProjectManager
+from data_safe_haven.logging import get_logger
 
 
 class TestSREProjectManager:
+    def test_apply_config_options(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.get_all_config.return_value = {
+            "azure-native:location": ConfigValue("uksouth"),
+            "data-safe-haven:variable": ConfigValue("8"),
+        }
+        sre_project_manager.add_option(
+            "azure-native:location", "uksouth", replace=False
+        )
+        sre_project_manager.add_option("variable", "9", replace=True)
+        sre_project_manager.add_secret("new-secret", "hunter2", replace=False)
+        sre_project_manager.apply_config_options()
+        mock_stack.return_value.get_all_config.assert_called_once()
+        mock_stack.return_value.set_all_config.assert_called_once()
+        changes = mock_stack.return_value.set_all_config.call_args.args[0]
+        assert {key: (item.value, item.secret) for key, item in changes.items()} == {
+            "data-safe-haven:variable": ("9", False),
+            "data-safe-haven:new-secret": ("hunter2", True),
+        }
+        assert sre_project_manager.pulumi_project.stack_config == {
+            "azure-native:location": "uksouth",
+            "data-safe-haven:variable": "9",
+            "data-safe-haven:new-secret": "hunter2",
+        }
+
+    def test_apply_config_options_inconsistent(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.get_all_config.return_value = {
+            "azure-native:location": ConfigValue("uksouth"),
+        }
+        sre_project_manager.add_option("azure-native:location", "ukwest", replace=False)
+        with raises(
+            DataSafeHavenPulumiError,
+            match="Applying Pulumi configuration options failed.",
+        ):
+            sre_project_manager.apply_config_options()
+        mock_stack.return_value.set_all_config.assert_not_called()
+
     def test_constructor(
         self,
         context_no_secrets,
@@ -49,6 +103,146 @@ class TestSREProjectManager:
         )
         assert "Purged Azure Key Vault shmacmedsresandbosecrets." in stdout
 
+    def test_cleanup_step_failure(
+        self,
+        mocker,
+        mock_azuresdk_blob_exists,  # noqa: ARG002
+        mock_azuresdk_remove_blob,  # noqa: ARG002
+        sre_project_manager,
+    ):
+        mocker.patch.object(
+            AzureSdk, "purge_keyvault", side_effect=DataSafeHavenAzureError("purge")
+        )
+        mock_remove_stack = mocker.patch.object(SREProjectManager, "remove_stack")
+        with raises(DataSafeHavenPulumiError, match="Pulumi destroy failed."):
+            sre_project_manager.cleanup()
+        # Other steps still run when one of them fails
+        mock_remove_stack.assert_called_once()
+        assert set(sre_project_manager.phase_timings) == {
+            "purge key vault",
+            "remove stack",
+            "remove stack blobs",
+        }
+
+    def test_changed_components(self, mocker, sre_project_manager):
+        fingerprint = sre_project_manager.program.config_fingerprint()
+        mocker.patch.object(
+            SREProjectManager, "load_deployed_config", return_value=fingerprint
+        )
+        assert sre_project_manager.changed_components() == set()
+        sre_project_manager.program.config.sre.workspace_skus = ["Standard_D8s_v4"]
+        sre_project_manager.program.config.sre.admin_ip_addresses = ["8.8.8.8/32"]
+        assert sre_project_manager.changed_components() == {
+            "data",
+            "desired_state",
+            "workspaces",
+        }
+        sre_project_manager.program.config.azure.location = "ukwest"
+        assert sre_project_manager.changed_components() is None
+
+    def test_changed_components_first_deployment(self, mocker, sre_project_manager):
+        mocker.patch.object(SREProjectManager, "load_deployed_config", return_value={})
+        assert sre_project_manager.changed_components() is None
+
+    def test_component_targets(self, sre_project_manager):
+        assert sre_project_manager.component_targets(["workspaces", "data"]) == [
+            "urn:pulumi:shm-acmedeployment-sre-sandbox::*::**dsh:sre:DataComponent**",
+            "urn:pulumi:shm-acmedeployment-sre-sandbox::*::**dsh:sre:WorkspacesComponent**",
+        ]
+
+    def test_component_targets_unknown(self, sre_project_manager):
+        with raises(DataSafeHavenPulumiError, match="Unknown component 'firewalls'"):
+            sre_project_manager.component_targets(["firewalls"])
+
+    def test_destroy_retries_failed_resources(self, mocker, sre_project_manager):
+        mocker.patch.object(SREProjectManager, "destroy_retry_interval", 0)
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns",
+            new_callable=PropertyMock,
+            return_value=["subnet"],
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns_matching",
+            return_value=["subnet"],
+        )
+        result = MagicMock()
+        result.summary.result = "succeeded"
+        mock_stack.return_value.destroy.side_effect = [
+            CommandError(
+                CommandResult(stdout="", stderr="InUseSubnetCannotBeDeleted", code=1)
+            ),
+            result,
+            result,
+        ]
+        sre_project_manager.destroy()
+        calls = mock_stack.return_value.destroy.call_args_list
+        assert [call.kwargs["target"] for call in calls] == [None, ["subnet"], None]
+        assert all(call.kwargs["continue_on_error"] for call in calls)
+
+    def test_destroy_other_resource_error(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns",
+            new_callable=PropertyMock,
+            return_value=["subnet", "key_vault"],
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns_matching",
+            return_value=["subnet"],
+        )
+        # One transient failure does not make the others worth retrying
+        mock_stack.return_value.destroy.side_effect = CommandError(
+            CommandResult(stdout="", stderr="InUseSubnetCannotBeDeleted", code=1)
+        )
+        with raises(DataSafeHavenPulumiError, match="Pulumi destroy failed."):
+            sre_project_manager.destroy()
+        mock_stack.return_value.destroy.assert_called_once()
+
+    def test_destroy_max_attempts(self, mocker, sre_project_manager):
+        mocker.patch.object(SREProjectManager, "destroy_max_attempts", 3)
+        mocker.patch.object(SREProjectManager, "destroy_retry_interval", 0)
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns",
+            new_callable=PropertyMock,
+            return_value=["subnet"],
+        )
+        mocker.patch.object(
+            type(sre_project_manager.progress),
+            "failed_urns_matching",
+            return_value=["subnet"],
+        )
+        mock_stack.return_value.destroy.side_effect = CommandError(
+            CommandResult(stdout="", stderr="InUseSubnetCannotBeDeleted", code=1)
+        )
+        with raises(DataSafeHavenPulumiError, match="Pulumi destroy failed.") as exc:
+            sre_project_manager.destroy()
+        assert "after 3 attempts" in str(exc.value.__cause__)
+        assert mock_stack.return_value.destroy.call_count == 3
+
+    def test_destroy_other_error(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.destroy.side_effect = CommandError(
+            CommandResult(stdout="", stderr="AuthorizationFailed", code=1)
+        )
+        with raises(DataSafeHavenPulumiError, match="Pulumi destroy failed."):
+            sre_project_manager.destroy()
+        mock_stack.return_value.destroy.assert_called_once()
+
     def test_ensure_config(self, sre_project_manager):
         sre_project_manager.ensure_config(
             "azure-native:location", "uksouth", secret=False
@@ -65,6 +259,29 @@ class TestSREProjectManager:
                 "azure-native:location", "ukwest", secret=False
             )
 
+    def test_install_plugins(self, monkeypatch, tmp_path, sre_project_manager):
+        monkeypatch.setenv("DSH_CONFIG_DIRECTORY", str(tmp_path))
+        workspace = MagicMock()
+        workspace.list_plugins.return_value = [
+            PluginInfo(
+                name="random",
+                kind="resource",
+                size=0,
+                last_used_time=None,
+                version=metadata.version("pulumi-random"),
+            )
+        ]
+        sre_project_manager.install_plugins(workspace)
+        workspace.install_plugin.assert_called_once_with(
+            "azure-native", metadata.version("pulumi-azure-native")
+        )
+        assert (tmp_path / ".pulumi-plugins").is_file()
+        # A second call is short-circuited by the marker file
+        workspace.reset_mock()
+        sre_project_manager.install_plugins(workspace)
+        workspace.list_plugins.assert_not_called()
+        workspace.install_plugin.assert_not_called()
+
     def test_new_project(
         self,
         context_no_secrets,
@@ -101,6 +318,40 @@ class TestSREProjectManager:
         ):
             _ = sre.pulumi_project
 
+    def test_output_from_snapshot(self, mocker, sre_project_manager):
+        snapshot = {
+            "version": 3,
+            "checkpoint_etag": "etag",
+            "outputs": {"data": {"key_vault_name": "snapshot"}},
+        }
+        mocker.patch.object(
+            AzureSdk, "download_blob_bytes", return_value=json.dumps(snapshot).encode()
+        )
+        mocker.patch.object(AzureSdk, "get_blob_etag", return_value="etag")
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        assert sre_project_manager.output("data") == {"key_vault_name": "snapshot"}
+        mock_stack.assert_not_called()
+
+    def test_output_stale_snapshot(self, mocker, sre_project_manager):
+        snapshot = {
+            "version": 3,
+            "checkpoint_etag": "etag",
+            "outputs": {"data": {"key_vault_name": "snapshot"}},
+        }
+        mocker.patch.object(
+            AzureSdk, "download_blob_bytes", return_value=json.dumps(snapshot).encode()
+        )
+        mocker.patch.object(AzureSdk, "get_blob_etag", return_value="new-etag")
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.outputs.return_value = {
+            "data": OutputValue({"key_vault_name": "live"}, secret=False)
+        }
+        assert sre_project_manager.output("data") == {"key_vault_name": "live"}
+
     def test_project_settings(self, sre_project_manager):
         project_settings = sre_project_manager.project_settings
         assert isinstance(project_settings, ProjectSettings)
@@ -124,6 +375,36 @@ class TestSREProjectManager:
     def test_pulumi_project(self, sre_project_manager, pulumi_project_sandbox):
         assert sre_project_manager.pulumi_project == pulumi_project_sandbox
 
+    def test_refresh(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        sre_project_manager.refresh(parallel=4)
+        mock_stack.return_value.refresh.assert_called_once_with(
+            parallel=4, target=None, **sre_project_manager.pulumi_extra_args
+        )
+        mock_stack.return_value.refresh.reset_mock()
+        sre_project_manager.refresh(components=["data"], drift_prone_only=True)
+        call = mock_stack.return_value.refresh.call_args
+        assert call.kwargs["parallel"] == ProjectManager.default_parallelism
+        assert call.kwargs["target"] == [
+            "urn:pulumi:shm-acmedeployment-sre-sandbox::*::**dsh:sre:DataComponent**azure-native:compute:VirtualMachine::**",
+            "urn:pulumi:shm-acmedeployment-sre-sandbox::*::**dsh:sre:DataComponent**azure-native:containerinstance:ContainerGroup::**",
+            "urn:pulumi:shm-acmedeployment-sre-sandbox::*::**dsh:sre:DataComponent**pulumi-python:dynamic:Resource::**",
+        ]
+
+    def test_teardown_timings(self, caplog, mocker, sre_project_manager):
+        for method in ("cancel", "refresh", "destroy", "cleanup"):
+            mocker.patch.object(SREProjectManager, method)
+        sre_project_manager.teardown(force=True)
+        assert list(sre_project_manager.phase_timings) == [
+            "cancel",
+            "refresh",
+            "destroy",
+            "cleanup",
+        ]
+        assert "Teardown timings: cancel 0s, refresh 0s" in caplog.text
+
     def test_run_pulumi_command(self, sre_project_manager):
         stdout = sre_project_manager.run_pulumi_command("stack ls")
         assert "shm-acmedeployment-sre-sandbox*" in stdout
@@ -152,6 +433,27 @@ class TestSREProjectManager:
         assert config["azure-native:location"].value == "uksouth"
         assert config["data-safe-haven:variable"].value == "8"
 
+    def test_constructor_without_log_handlers(
+        self,
+        mocker,
+        context_no_secrets,
+        sre_config,
+        pulumi_config_no_key,
+    ):
+        mocker.patch.object(get_logger(), "handlers", [])
+        sre = SREProjectManager(context_no_secrets, sre_config, pulumi_config_no_key)
+        assert sre.progress.log_file is None
+        assert sre.pulumi_extra_args["debug"] is None
+
+    def test_preview_shows_diff(self, mocker, sre_project_manager):
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.preview.return_value.stdout = "+ create vnet"
+        mock_out = mocker.patch.object(sre_project_manager.progress.console, "out")
+        sre_project_manager.preview()
+        mock_out.assert_called_once_with("+ create vnet", highlight=False)
+
     def test_update_dsh_pulumi_project(self, sre_project_manager):
         sre_project_manager.set_config("new-key", "hello", secret=False)
         config = sre_project_manager.stack.get_all_config()
@@ -161,3 +463,38 @@ class TestSREProjectManager:
         stack_config = sre_project_manager.pulumi_project.stack_config
         assert "data-safe-haven:new-key" in stack_config
         assert stack_config.get("data-safe-haven:new-key") == "hello"
+
+    def test_write_deployed_config(self, mocker, sre_project_manager):
+        previous = {"sre.workspace_skus": "old", "sre.databases": "old"}
+        mocker.patch.object(
+            SREProjectManager, "load_deployed_config", return_value=previous
+        )
+        mock_upload_blob = mocker.patch.object(AzureSdk, "upload_blob")
+        sre_project_manager.write_deployed_config({"workspaces"})
+        fingerprint = json.loads(mock_upload_blob.call_args.args[0])
+        current = sre_project_manager.program.config_fingerprint()
+        assert fingerprint["sre.workspace_skus"] == current["sre.workspace_skus"]
+        assert fingerprint["sre.databases"] == "old"
+        assert "version" not in fingerprint
+
+    def test_write_outputs_snapshot(self, mocker, sre_project_manager):
+        mocker.patch.object(AzureSdk, "get_blob_etag", return_value="etag")
+        mock_upload_blob = mocker.patch.object(AzureSdk, "upload_blob")
+        mock_stack = mocker.patch.object(
+            SREProjectManager, "stack", new_callable=PropertyMock
+        )
+        mock_stack.return_value.outputs.return_value = {
+            "data": OutputValue({"key_vault_name": "live"}, secret=False),
+            "password": OutputValue("hunter2", secret=True),
+        }
+        sre_project_manager.write_outputs_snapshot(4)
+        snapshot = json.loads(mock_upload_blob.call_args.args[0])
+        assert snapshot == {
+            "version": 4,
+            "checkpoint_etag": "etag",
+            "outputs": {"data": {"key_vault_name": "live"}},
+        }
+        assert (
+            mock_upload_blob.call_args.args[1]
+            == "shm-acmedeployment-sre-sandbox.outputs.json"
+        )
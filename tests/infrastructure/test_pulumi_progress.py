@@ -0,0 +1,118 @@
+from io import StringIO
+
+from pulumi.automation import EngineEvent
+from pytest import fixture
+from rich.console import Console
+
+from data_safe_haven.infrastructure.pulumi_progress import PulumiProgress
+
+URN = "urn:pulumi:shm-green-sre-sandbox::data-safe-haven::azure-native:network:VirtualNetwork::sre_sandbox_vnet"
+
+
+def resource_event(key: str, op: str, *, planning: bool = False) -> EngineEvent:
+    return EngineEvent.from_json(
+        {
+            key: {
+                "metadata": {
+                    "op": op,
+                    "urn": URN,
+                    "type": "azure-native:network:VirtualNetwork",
+                },
+                "planning": planning,
+            }
+        }
+    )
+
+
+@fixture
+def progress(tmp_path) -> PulumiProgress:
+    return PulumiProgress(
+        console=Console(file=StringIO()),
+        log_file=tmp_path / "pulumi.log",
+    )
+
+
+class TestPulumiProgress:
+    def test_resource_events(self, progress):
+        with progress:
+            progress.on_event(resource_event("resourcePreEvent", "create"))
+            resource = progress.resources[URN]
+            assert resource.name == "sre_sandbox_vnet"
+            assert str(resource.status) == "create..."
+            progress.on_event(resource_event("resOutputsEvent", "create"))
+            assert str(resource.status) == "create done"
+            progress.on_event(
+                EngineEvent.from_json(
+                    {"summaryEvent": {"resourceChanges": {"create": 1, "same": 4}}}
+                )
+            )
+        assert progress.resource_changes == {"create": 1}
+
+    def test_resource_failed(self, progress):
+        with progress:
+            progress.on_event(resource_event("resourcePreEvent", "update"))
+            progress.on_event(resource_event("resOpFailedEvent", "update"))
+            assert str(progress.resources[URN].status) == "update failed"
+            assert "0 done, 0 in progress, 1 failed" in str(
+                progress.__rich__().renderables[1]
+            )
+
+    def test_failed_urns(self, progress):
+        with progress:
+            progress.on_event(resource_event("resourcePreEvent", "delete"))
+            assert progress.failed_urns == []
+            progress.on_event(resource_event("resOpFailedEvent", "delete"))
+        assert progress.failed_urns == [URN]
+
+    def test_failed_urns_matching(self, progress):
+        other = URN.replace("sre_sandbox_vnet", "sre_sandbox_kv")
+        with progress:
+            progress.on_event(resource_event("resourcePreEvent", "delete"))
+            progress.on_event(resource_event("resOpFailedEvent", "delete"))
+            for urn, message in (
+                (URN, "InUseSubnetCannotBeDeleted: subnet is in use"),
+                (other, "InUseSubnetCannotBeDeleted: subnet is in use"),
+            ):
+                progress.on_event(
+                    EngineEvent.from_json(
+                        {
+                            "diagnosticEvent": {
+                                "message": message,
+                                "color": "never",
+                                "severity": "error",
+                                "urn": urn,
+                            }
+                        }
+                    )
+                )
+        # Only resources which failed are matched
+        assert progress.failed_urns_matching(("InUseSubnetCannotBeDeleted",)) == [URN]
+        assert progress.failed_urns_matching(("AuthorizationFailed",)) == []
+
+    def test_unchanged_resources_ignored(self, progress):
+        with progress:
+            progress.on_event(resource_event("resourcePreEvent", "same"))
+        assert not progress.resources
+
+    def test_planned_resources_logged(self, progress, caplog):
+        with progress:
+            progress.on_event(
+                resource_event("resourcePreEvent", "replace", planning=True)
+            )
+        assert "Pulumi will replace sre_sandbox_vnet" in caplog.text
+
+    def test_raw_output(self, progress, mocker):
+        mocker.patch.object(PulumiProgress, "flush_lines", 2)
+        with progress:
+            progress.on_output("line 1")
+            assert not progress.log_file.exists()
+            progress.on_output("line 2")
+            assert progress.log_file.read_text() == "line 1\nline 2\n"
+            progress.on_output("line 3")
+        assert progress.log_file.read_text() == "line 1\nline 2\nline 3\n"
+
+    def test_raw_output_without_log_file(self):
+        progress = PulumiProgress(console=Console(file=StringIO()))
+        with progress:
+            progress.on_output("line 1")
+        assert progress.log_file is None